@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import itertools
+import os
 from pathlib import Path
+import threading
 import tkinter as tk
-from tkinter import ttk
+from tkinter import filedialog, messagebox, ttk
 
 from .layout.header import Header
 from .layout.footer import Footer
@@ -22,8 +25,21 @@ from .sections.state_machine import StateMachineViewer
 from .sections.dashboard import DashboardPage
 from .utils.splashscreen import SplashScreen
 from .utils.theme import apply_theme
+from .utils.project_io import (
+    PROJECT_SUFFIX,
+    JOURNAL_SUFFIX,
+    AutosaveJournal,
+    dumps_project,
+    find_journals,
+    journal_dir,
+    load_project,
+    replay_journal,
+    write_project_text,
+)
+from .utils.schema import SchemaError, check_state
 from .utils.state import StateManager
-from .utils.workflow import compute_module_statuses
+from .utils.workflow import module_statuses
+from .utils.workspace import Workspace, WorkspaceProject
 
 __all__ = ["main"]
 
@@ -63,7 +79,6 @@ class TestbenchEcosystemApp(tk.Tk):
 
         self.title("Testbench Ecosystem")
         self._app_dir = Path(__file__).resolve().parent
-        self._section_cache: dict[str, tk.Widget] = {}
         self._theme_name = "dark"
         self._theme = apply_theme(self, self._theme_name)
 
@@ -73,10 +88,15 @@ class TestbenchEcosystemApp(tk.Tk):
         # self.geometry("1200x700")
         self.configure(bg=self._theme.bg)
 
+        # One autosave journal per open project, from _start_autosave on.
+        self._journals: dict[WorkspaceProject, AutosaveJournal] | None = None
+        self._journal_ids = itertools.count(1)
+        # Each open project has its own state, undo history and section
+        # widgets; the first one adopts the StateManager singleton.
+        self._workspace = Workspace(on_attach=self._attach_project, on_evict=self._evict_project)
+        self._workspace.open(None, "Untitled", manager=StateManager.get_instance())
         self._build_menubar()
         self._bind_shortcuts()
-        self._state = StateManager.get_instance()
-        self._state.subscribe(self._on_state_change)
 
         # Show animated splash screen (expected to call parent.start_main_app())
         self.splash = SplashScreen(self)
@@ -130,6 +150,339 @@ class TestbenchEcosystemApp(tk.Tk):
         self.load_section("dashboard")
         self.set_theme(self._theme_name)
         self._refresh_workflow_ui()
+        self._start_autosave()
+
+    # -- Projects -----------------------------------------------------------
+
+    @property
+    def _project(self) -> WorkspaceProject:
+        return self._workspace.active
+
+    @property
+    def _state(self) -> StateManager:
+        return self._project.manager
+
+    @property
+    def _history(self):
+        return self._project.history
+
+    @property
+    def _section_cache(self) -> dict[str, tk.Widget]:
+        return self._project.widgets
+
+    @property
+    def _project_path(self) -> Path | None:
+        return self._project.path
+
+    @_project_path.setter
+    def _project_path(self, path: Path | None) -> None:
+        self._project.path = path
+        self._project.name = path.name if path else "Untitled"
+
+    @property
+    def _current_section(self) -> str:
+        return self._project.section
+
+    @_current_section.setter
+    def _current_section(self, section: str) -> None:
+        self._project.section = section
+
+    def _attach_project(self, project: WorkspaceProject) -> None:
+        manager = project.manager
+        # Listeners update widgets, so changes made on worker threads are
+        # announced on the Tk thread.
+        manager.set_dispatcher(self._call_on_ui)
+        manager.subscribe(self._on_state_change)
+        manager.subscribe_changes(lambda keys, snapshot: self._record_journal(project, keys, snapshot))
+        # A rehydrated project starts its journal over from the reloaded state.
+        journal = self._journal_for(project)
+        if journal is not None:
+            journal.start(manager.snapshot())
+
+    def _evict_project(self, project: WorkspaceProject) -> None:
+        for widget in project.widgets.values():
+            try:
+                widget.destroy()
+            except tk.TclError:
+                pass
+
+    def _journal_for(self, project: WorkspaceProject) -> AutosaveJournal | None:
+        if self._journals is None:
+            return None
+        journal = self._journals.get(project)
+        if journal is None:
+            path = journal_dir() / f"{os.getpid()}-{next(self._journal_ids)}{JOURNAL_SUFFIX}"
+            journal = self._journals[project] = AutosaveJournal(path)
+        return journal
+
+    def _drop_journal(self, project: WorkspaceProject) -> None:
+        journal = self._journals.pop(project, None) if self._journals is not None else None
+        if journal is not None:
+            journal.discard()
+            journal.close()
+
+    def _record_journal(self, project: WorkspaceProject, keys, snapshot) -> None:
+        # Evicted projects don't change, so their journal just stays as it is.
+        journal = self._journals.get(project) if self._journals is not None else None
+        if journal is not None:
+            journal.record(keys, snapshot)
+
+    def _is_pristine(self) -> bool:
+        return self._project_path is None and not self._state.get_all()
+
+    def _open_in_workspace(self, state: dict, path: Path | None = None) -> None:
+        try:
+            check_state(state)
+        except SchemaError as exc:
+            messagebox.showerror("Open Project", f"Cannot open {path or 'the project'}:\n{exc}")
+            return
+        # Reuse an untouched Untitled project rather than leaving it behind.
+        if self._is_pristine():
+            self._project_path = path
+            self._apply_loaded_state(state)
+        else:
+            self._hide_active_section_widgets()
+            self._workspace.open(state, path.name if path else "Untitled", path)
+            self._after_switch()
+        self._update_title()
+
+    def _after_switch(self) -> None:
+        if hasattr(self, "footer"):
+            self.footer.state = self._state
+        if hasattr(self, "main_frame"):
+            self.load_section(self._current_section)
+        self._refresh_workflow_ui()
+        self._update_title()
+
+    def switch_project(self, project: WorkspaceProject) -> None:
+        if project is self._project:
+            return
+        try:
+            self._workspace.activate(project)
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("Switch Project", f"Cannot reload {project.name}:\n{exc}")
+            return
+        self._after_switch()
+
+    def next_project(self, event=None):
+        projects = self._workspace.projects
+        if len(projects) > 1:
+            self.switch_project(projects[(projects.index(self._project) + 1) % len(projects)])
+        return "break"
+
+    def close_project(self) -> None:
+        if self._state.get_all() and not messagebox.askyesno(
+            "Close Project", f"Close {self._project.name}? Unsaved changes are lost."
+        ):
+            return
+        self._hide_active_section_widgets()
+        self._drop_journal(self._project)
+        if self._workspace.close(self._project) is None:
+            self._workspace.open({}, "Untitled")
+        self._after_switch()
+
+    def _rebuild_projects_menu(self) -> None:
+        menu = self._projects_menu
+        menu.delete(0, "end")
+        menu.add_command(label="Next Project", command=self.next_project, accelerator="Ctrl+Tab")
+        menu.add_command(label="Close Project", command=self.close_project, accelerator="Ctrl+W")
+        menu.add_separator()
+        for project in self._workspace.projects:
+            label = project.name if project.resident else f"{project.name} (on disk)"
+            menu.add_radiobutton(
+                label=label,
+                variable=self._active_project_var,
+                value=str(id(project)),
+                command=lambda p=project: self.switch_project(p),
+            )
+        self._active_project_var.set(str(id(self._project)))
+
+    def _start_autosave(self) -> None:
+        leftovers = find_journals()
+        recovered = [state for state in map(replay_journal, leftovers) if state]
+        # The projects restored below get fresh journals; declined ones are gone.
+        for path in leftovers:
+            path.unlink(missing_ok=True)
+        self._journals = {}
+        for project in self._workspace.projects:
+            if project.resident:
+                self._journal_for(project).start(project.manager.snapshot())
+        if recovered and messagebox.askyesno(
+            "Recover Project",
+            f"Unsaved changes to {len(recovered)} project(s) from the last session were found.\n\nRestore them?",
+        ):
+            for state in recovered:
+                self._open_in_workspace(state)
+
+    def _update_title(self) -> None:
+        self.title(f"Testbench Ecosystem - {self._project.name}")
+        if hasattr(self, "_projects_menu"):
+            self._rebuild_projects_menu()
+
+    def _reload_sections(self, section: str = "dashboard") -> None:
+        # Forms read the state when built, so rebuild them for the new project.
+        for widget in self._section_cache.values():
+            try:
+                widget.destroy()
+            except tk.TclError:
+                pass
+        self._section_cache.clear()
+        if hasattr(self, "main_frame"):
+            self.load_section(section)
+
+    def _apply_loaded_state(self, state: dict) -> None:
+        # The journal hears about load() and restarts from the new state.
+        self._state.load(state)
+        self._history.reset()
+        self._reload_sections()
+
+    def new_project(self) -> None:
+        if not self._is_pristine():
+            self._open_in_workspace({})
+
+    def open_project(self) -> None:
+        path = filedialog.askopenfilename(
+            title="Open Project",
+            filetypes=[("Testbench project", f"*{PROJECT_SUFFIX}"), ("State JSON", "*.json"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+
+        def worker() -> None:
+            try:
+                state = load_project(path)
+            except (OSError, ValueError) as exc:
+                err = exc
+                self.after(0, lambda: messagebox.showerror("Open Project", f"Cannot open {path}:\n{err}"))
+                return
+            self.after(0, lambda: self._finish_open(Path(path), state))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _finish_open(self, path: Path, state: dict) -> None:
+        self._open_in_workspace(state, path if path.suffix == PROJECT_SUFFIX else None)
+
+    def save_project(self, save_as: bool = False) -> None:
+        path = self._project_path
+        if save_as or path is None:
+            chosen = filedialog.asksaveasfilename(
+                title="Save Project",
+                defaultextension=PROJECT_SUFFIX,
+                filetypes=[("Testbench project", f"*{PROJECT_SUFFIX}")],
+            )
+            if not chosen:
+                return
+            path = Path(chosen)
+        # Serialize here, where the state can't change underneath; write off the Tk thread.
+        text = dumps_project(self._state.snapshot())
+        project = self._project
+        journal = self._journals.get(project) if self._journals is not None else None
+
+        def saved() -> None:
+            # Only a successful write retargets the project.
+            project.path = path
+            project.name = path.name
+            self._update_title()
+
+        def worker() -> None:
+            try:
+                write_project_text(path, text)
+            except OSError as exc:
+                err = exc
+                self.after(0, lambda: messagebox.showerror("Save Project", f"Cannot save {path}:\n{err}"))
+                return
+            if journal is not None:
+                journal.discard()
+            self.after(0, saved)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def export_bundle(self) -> None:
+        from .utils.bundle import BUNDLE_SUFFIX, pack_bundle
+
+        path = filedialog.asksaveasfilename(
+            title="Export Bundle",
+            defaultextension=BUNDLE_SUFFIX,
+            filetypes=[("Testbench bundle", f"*{BUNDLE_SUFFIX}")],
+        )
+        if not path:
+            return
+        state = self._state.snapshot()
+
+        def worker() -> None:
+            try:
+                summary = pack_bundle(state, path)
+            except (OSError, ValueError) as exc:
+                err = exc
+                self.after(0, lambda: messagebox.showerror("Export Bundle", f"Cannot write {path}:\n{err}"))
+                return
+            if summary.warnings:
+                text = "\n".join(summary.warnings)
+                self.after(0, lambda: messagebox.showwarning("Export Bundle", text))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def import_bundle(self) -> None:
+        from .utils.bundle import BUNDLE_SUFFIX, unpack_bundle
+
+        path = filedialog.askopenfilename(
+            title="Import Bundle",
+            filetypes=[("Testbench bundle", f"*{BUNDLE_SUFFIX}"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        dest = filedialog.askdirectory(title="Unpack Bundle Into", mustexist=False)
+        if not dest:
+            return
+
+        def worker() -> None:
+            try:
+                state = unpack_bundle(path, dest)
+            except (OSError, ValueError, KeyError) as exc:
+                err = exc
+                self.after(0, lambda: messagebox.showerror("Import Bundle", f"Cannot unpack {path}:\n{err}"))
+                return
+            self.after(0, lambda: self._finish_open(Path(dest) / f"project{PROJECT_SUFFIX}", state))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _is_text_focus(self) -> bool:
+        try:
+            return isinstance(self.focus_get(), (tk.Text, tk.Entry, ttk.Entry))
+        except (tk.TclError, KeyError):
+            return False
+
+    def undo(self, event=None):
+        # Inside a text box Ctrl+Z belongs to the widget.
+        if event is not None and self._is_text_focus():
+            return None
+        if self._history.undo():
+            self._reload_sections(self._current_section)
+        return "break"
+
+    def redo(self, event=None):
+        if event is not None and self._is_text_focus():
+            return None
+        if self._history.redo():
+            self._reload_sections(self._current_section)
+        return "break"
+
+    def _call_on_ui(self, fn) -> None:
+        try:
+            self.after(0, fn)
+        except (tk.TclError, RuntimeError):
+            pass  # window already gone
+
+    def destroy(self) -> None:
+        for project in self._workspace.projects:
+            if project.manager is not None:
+                project.manager.set_dispatcher(None)
+        self._workspace.shutdown()
+        # Closing keeps the journals: they are what recovery reads next time.
+        for journal in (self._journals or {}).values():
+            journal.close()
+        self._journals = None
+        super().destroy()
 
     def _on_state_change(self, key, value, snapshot) -> None:
         # Called from StateManager.set(); keep it UI-safe via after.
@@ -139,8 +492,6 @@ class TestbenchEcosystemApp(tk.Tk):
             pass
 
     def _refresh_workflow_ui(self) -> None:
-        snapshot = self._state.get_all()
-
         if hasattr(self, "footer"):
             try:
                 self.footer.refresh_status_indicators()
@@ -149,7 +500,7 @@ class TestbenchEcosystemApp(tk.Tk):
 
         if hasattr(self, "sidebar"):
             try:
-                self.sidebar.set_statuses(compute_module_statuses(snapshot))
+                self.sidebar.set_statuses(module_statuses(self._state))
             except Exception:
                 pass
 
@@ -157,13 +508,33 @@ class TestbenchEcosystemApp(tk.Tk):
         menubar = tk.Menu(self)
 
         file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="New Project", command=self.new_project)
+        file_menu.add_command(label="Open Project...", command=self.open_project, accelerator="Ctrl+O")
+        file_menu.add_command(label="Save Project", command=self.save_project, accelerator="Ctrl+S")
+        file_menu.add_command(
+            label="Save Project As...", command=lambda: self.save_project(save_as=True), accelerator="Ctrl+Shift+S"
+        )
+        file_menu.add_separator()
+        file_menu.add_command(label="Export Bundle...", command=self.export_bundle)
+        file_menu.add_command(label="Import Bundle...", command=self.import_bundle)
+        file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.destroy, accelerator="Ctrl+Q")
         menubar.add_cascade(label="File", menu=file_menu)
 
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="Undo", command=self.undo, accelerator="Ctrl+Z")
+        edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y")
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+
         view_menu = tk.Menu(menubar, tearoff=0)
         view_menu.add_command(label="Toggle Theme", command=self.toggle_theme, accelerator="Ctrl+T")
         menubar.add_cascade(label="View", menu=view_menu)
 
+        self._projects_menu = tk.Menu(menubar, tearoff=0)
+        self._active_project_var = tk.StringVar(self)
+        self._rebuild_projects_menu()
+        menubar.add_cascade(label="Projects", menu=self._projects_menu)
+
         help_menu = tk.Menu(menubar, tearoff=0)
         help_menu.add_command(label="About", command=self._show_about)
         menubar.add_cascade(label="Help", menu=help_menu)
@@ -186,6 +557,14 @@ class TestbenchEcosystemApp(tk.Tk):
     def _bind_shortcuts(self) -> None:
         self.bind_all("<Control-q>", lambda e: self.destroy())
         self.bind_all("<Control-t>", lambda e: self.toggle_theme())
+        self.bind_all("<Control-o>", lambda e: self.open_project())
+        self.bind_all("<Control-s>", lambda e: self.save_project())
+        self.bind_all("<Control-S>", lambda e: self.save_project(save_as=True))
+        self.bind_all("<Control-z>", self.undo)
+        self.bind_all("<Control-y>", self.redo)
+        self.bind_all("<Control-Z>", self.redo)
+        self.bind_all("<Control-Tab>", self.next_project)
+        self.bind_all("<Control-w>", lambda e: self.close_project())
 
         self.bind_all("<Alt-d>", lambda e: self.load_section("dashboard"))
         self.bind_all("<Alt-p>", lambda e: self.load_section("project_details"))
@@ -247,6 +626,7 @@ class TestbenchEcosystemApp(tk.Tk):
             self._section_cache[section_name] = widget
 
         widget.pack(fill="both", expand=True)
+        self._current_section = section_name
 
         if hasattr(self, "sidebar") and hasattr(self.sidebar, "set_active"):
             self.sidebar.set_active(section_name)
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+import time
+
+from .utils.generator import GenerationResult, generate_project, validate_state
+from .utils.project_io import unwrap_project
+from .utils.synthesis import fill_dut_info
+from .utils.workflow import Status, compute_module_statuses
+
+__all__ = ["main"]
+
+# `tbgen` with no sub-command starts the GUI. Every other command runs headless
+# and must not import tkinter or PIL (directly or via .app), so display-less
+# farm nodes can use it and start-up stays fast.
+
+
+def load_state(path: str | Path) -> dict:
+    """Read a state JSON file or a saved ``.tbproj`` project ('-' for stdin)."""
+    text = sys.stdin.read() if str(path) == "-" else Path(path).read_text(encoding="utf-8")
+    return unwrap_project(json.loads(text), path)
+
+
+def _print_result(result: GenerationResult, args: argparse.Namespace) -> None:
+    # Keep stdout clean when the archive itself is streamed there.
+    out = sys.stderr if getattr(args, "archive", None) == "-" else sys.stdout
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2), file=out)
+        return
+    cached = " (from cache)" if result.cache_hit else ""
+    print(f"Generated {len(result.files_written)} files in {result.output_root}{cached}", file=out)
+    for w in result.warnings:
+        print(f"warning: {w}", file=sys.stderr)
+    if result.metrics is not None and not args.quiet:
+        for line in result.metrics.summary_lines():
+            print(f"  {line}", file=out)
+
+
+def cmd_generate(args: argparse.Namespace) -> int:
+    try:
+        state = load_state(args.state)
+    except (OSError, ValueError) as exc:
+        print(f"error: cannot read state: {exc}", file=sys.stderr)
+        return 1
+    if args.output_dir:
+        state["project"] = {**(state.get("project") or {}), "output_dir": args.output_dir}
+    try:
+        fill_dut_info(state)
+    except OSError as exc:
+        print(f"error: cannot read DUT: {exc}", file=sys.stderr)
+        return 1
+
+    errors = validate_state(state, require_output_dir=args.archive is None)
+    if errors:
+        for e in errors:
+            print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    if not args.quiet:
+        for name, st in compute_module_statuses(state).items():
+            if st.status != Status.COMPLETE and st.missing:
+                print(f"note: {name} incomplete (missing: {', '.join(st.missing)})", file=sys.stderr)
+
+    try:
+        if args.archive is not None:
+            from .utils.export import export_archive
+
+            result = export_archive(state, args.archive, args.format)
+        else:
+            result = generate_project(
+                state,
+                cache_dir=args.cache_dir,
+                cache_links=args.cache_links,
+                manifest_metrics=args.manifest_metrics,
+            )
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+
+    _print_result(result, args)
+    return 0
+
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    from .utils.batch import format_summary, load_batch_spec, run_batch
+
+    try:
+        jobs = load_batch_spec(args.spec, log_dir=args.log_dir, cache_dir=args.cache_dir)
+    except (OSError, ValueError) as exc:
+        print(f"error: cannot read batch spec: {exc}", file=sys.stderr)
+        return 1
+
+    def progress(res) -> None:
+        if not args.quiet and not args.json:
+            status = "ok" if res.ok else "FAILED"
+            print(f"[{status}] {res.name} ({res.seconds:.2f}s)", file=sys.stderr)
+
+    results = run_batch(jobs, workers=args.jobs, on_result=progress)
+    if args.json:
+        print(
+            json.dumps(
+                [
+                    {
+                        "name": r.name,
+                        "ok": r.ok,
+                        "seconds": round(r.seconds, 3),
+                        "files": r.files,
+                        "output_root": r.output_root,
+                        "error": r.error,
+                        "log": r.log_path,
+                    }
+                    for r in results
+                ],
+                indent=2,
+            )
+        )
+    else:
+        print(format_summary(results))
+    return 0 if all(r.ok for r in results) else 1
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    from .utils.daemon import serve
+
+    try:
+        serve(
+            args.listen,
+            workers=args.workers,
+            cache_dir=args.cache_dir,
+            log=lambda msg: print(msg, file=sys.stderr, flush=True),
+        )
+    except OSError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_call(args: argparse.Namespace) -> int:
+    from .utils.daemon import RpcError, absolute_paths, call
+
+    try:
+        params = json.loads(args.params) if args.params else None
+        if args.state:
+            params = {**(params or {}), "state": load_state(args.state)}
+        if isinstance(params, dict):
+            # The daemon runs elsewhere; paths given here mean this directory.
+            params = absolute_paths(params)
+        result = call(args.method, params, address=args.connect, timeout=args.timeout)
+    except (OSError, ValueError, RpcError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    if args.method == "preview" and isinstance(result, dict) and not args.json:
+        sys.stdout.write(result.get("text", ""))
+    else:
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+def cmd_regen(args: argparse.Namespace) -> int:
+    from .utils.regen import regenerate_all
+
+    statuses, outcomes = regenerate_all(args.root, workers=args.jobs, force=args.force, dry_run=args.dry_run)
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "trees": [
+                        {"root": str(s.root), "stale": s.stale, "reason": s.reason, "generator_version": s.generator_version}
+                        for s in statuses
+                    ],
+                    "regenerated": [
+                        {"root": str(o.root), "ok": o.ok, "changed": list(o.changed), "error": o.error}
+                        for o in outcomes
+                    ],
+                },
+                indent=2,
+            )
+        )
+        return 0 if all(o.ok for o in outcomes) else 1
+
+    stale = [s for s in statuses if s.stale]
+    if args.dry_run or args.verbose:
+        for s in statuses:
+            if s.stale or args.verbose:
+                print(f"{s.root}: {s.reason}")
+    for o in outcomes:
+        if not o.ok:
+            print(f"{o.root}: FAILED: {o.error}", file=sys.stderr)
+        elif o.changed:
+            print(f"{o.root}: {len(o.changed)} changed")
+            for rel in o.changed:
+                print(f"  {rel}")
+    skipped = sum(1 for s in statuses if not s.has_snapshot)
+    failed = sum(1 for o in outcomes if not o.ok)
+    print(
+        f"{len(statuses)} trees, {len(stale)} stale, {len(outcomes) - failed} regenerated, "
+        f"{failed} failed, {skipped} without a state snapshot",
+        file=sys.stderr,
+    )
+    return 0 if failed == 0 else 1
+
+
+def cmd_watch(args: argparse.Namespace) -> int:
+    from .utils.watch import watch
+
+    def report(result: GenerationResult, seconds: float) -> None:
+        unchanged = set(result.files_unchanged)
+        changed = [p for p in result.files_written if p not in unchanged]
+        stamp = time.strftime("%H:%M:%S")
+        print(
+            f"[{stamp}] {len(changed)} changed, {len(unchanged)} unchanged in {seconds * 1000:.0f} ms",
+            file=sys.stderr,
+            flush=True,
+        )
+        if not args.quiet:
+            for p in changed:
+                print(f"  {p}", file=sys.stderr, flush=True)
+        for w in result.warnings:
+            print(f"warning: {w}", file=sys.stderr, flush=True)
+
+    def error(exc: Exception) -> None:
+        print(f"[{time.strftime('%H:%M:%S')}] error: {exc}", file=sys.stderr, flush=True)
+
+    print(f"watching {args.state} (Ctrl-C to stop)", file=sys.stderr, flush=True)
+    try:
+        watch(
+            args.state,
+            output_dir=args.output_dir,
+            cache_dir=args.cache_dir,
+            interval=args.interval,
+            debounce=args.debounce,
+            on_result=report,
+            on_error=error,
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_worker(args: argparse.Namespace) -> int:
+    from .utils.spool import run_worker
+
+    def report(outcome) -> None:
+        if not args.quiet:
+            status = "done" if outcome.ok else f"FAILED: {outcome.error}"
+            print(f"{outcome.job_id}: {status} ({outcome.seconds:.2f}s)", file=sys.stderr, flush=True)
+
+    try:
+        count = run_worker(
+            args.spool,
+            once=args.once,
+            poll_interval=args.poll,
+            cache_dir=args.cache_dir,
+            stale_after=args.stale_after,
+            heartbeat=args.heartbeat,
+            on_outcome=report,
+        )
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(f"{count} jobs processed", file=sys.stderr)
+    return 0
+
+
+def cmd_submit(args: argparse.Namespace) -> int:
+    from .utils.spool import submit_job
+
+    try:
+        state = load_state(args.state)
+        path = submit_job(args.spool, state, output_dir=args.output_dir, job_id=args.id)
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    print(path)
+    return 0
+
+
+def cmd_bundle(args: argparse.Namespace) -> int:
+    from .utils.bundle import pack_bundle, unpack_bundle
+
+    try:
+        if args.action == "pack":
+            summary = pack_bundle(load_state(args.state), args.out)
+            for w in summary.warnings:
+                print(f"warning: {w}", file=sys.stderr)
+            print(
+                f"Wrote {summary.path}: {summary.blobs} blobs, {summary.bytes} bytes"
+                f" ({summary.deduplicated} duplicates skipped)"
+            )
+        else:
+            unpack_bundle(args.bundle, args.dest)
+            print(Path(args.dest) / "project.tbproj")
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="tbgen", description="UVM testbench generator.")
+    sub = parser.add_subparsers(dest="command")
+
+    sub.add_parser("gui", help="start the GUI (default)")
+
+    gen = sub.add_parser("generate", help="generate a project from a saved state file, without the GUI")
+    gen.add_argument("--state", required=True, help="state JSON file ('-' for stdin)")
+    gen.add_argument("--output-dir", help="override project.output_dir")
+    gen.add_argument("--cache-dir", help="content-addressed output cache directory")
+    gen.add_argument(
+        "--cache-links", action="store_true", help="hardlink cached files instead of copying them (they become read-only)"
+    )
+    gen.add_argument("--manifest-metrics", action="store_true", help="record timings in manifest.json")
+    gen.add_argument("--archive", help="write a .tar.gz/.zip instead of a tree ('-' for stdout)")
+    gen.add_argument("--format", choices=("tar.gz", "zip"), help="archive format (default: from --archive suffix)")
+    gen.add_argument("--json", action="store_true", help="print the result as JSON")
+    gen.add_argument("-q", "--quiet", action="store_true", help="only print the result line and warnings")
+    gen.set_defaults(func=cmd_generate)
+
+    batch = sub.add_parser("batch", help="generate one project per DUT listed in a batch spec, in parallel")
+    batch.add_argument("--spec", required=True, help="batch spec JSON file")
+    batch.add_argument("-j", "--jobs", type=int, help="worker processes (default: CPU count)")
+    batch.add_argument("--log-dir", help="write one <block>.log per block here")
+    batch.add_argument("--cache-dir", help="content-addressed output cache directory, shared by all workers")
+    batch.add_argument("--json", action="store_true", help="print per-block results as JSON")
+    batch.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    batch.set_defaults(func=cmd_batch)
+
+    rgn = sub.add_parser("regen", help="regenerate every stale generated tree under a directory")
+    rgn.add_argument("--root", required=True, help="directory to search for manifest.json files")
+    rgn.add_argument("-j", "--jobs", type=int, help="worker processes (default: CPU count)")
+    rgn.add_argument("--force", action="store_true", help="regenerate trees that are up to date too")
+    rgn.add_argument("--dry-run", action="store_true", help="only list stale trees")
+    rgn.add_argument("-v", "--verbose", action="store_true", help="list every tree with its status")
+    rgn.add_argument("--json", action="store_true", help="print statuses and results as JSON")
+    rgn.set_defaults(func=cmd_regen)
+
+    wat = sub.add_parser("watch", help="regenerate whenever the state file, DUT or templates change")
+    wat.add_argument("--state", required=True, help="state JSON file")
+    wat.add_argument("--output-dir", help="override project.output_dir")
+    wat.add_argument("--cache-dir", help="content-addressed output cache directory")
+    wat.add_argument("--interval", type=float, default=0.2, help="seconds between polls (default: 0.2)")
+    wat.add_argument("--debounce", type=float, default=0.3, help="quiet time before regenerating (default: 0.3)")
+    wat.add_argument("-q", "--quiet", action="store_true", help="do not list changed files")
+    wat.set_defaults(func=cmd_watch)
+
+    wrk = sub.add_parser("worker", help="run generation jobs dropped into a spool directory")
+    wrk.add_argument("--spool", required=True, help="spool directory (may be shared between hosts)")
+    wrk.add_argument("--once", action="store_true", help="exit when the spool is empty instead of polling")
+    wrk.add_argument("--poll", type=float, default=1.0, help="seconds between scans of an empty spool (default: 1)")
+    wrk.add_argument("--cache-dir", help="content-addressed output cache directory")
+    wrk.add_argument(
+        "--stale-after", type=float, help="requeue other hosts' claims without a heartbeat for this many seconds"
+    )
+    wrk.add_argument(
+        "--heartbeat", type=float, default=30.0, help="seconds between touches of a running job's claim (default: 30)"
+    )
+    wrk.add_argument("-q", "--quiet", action="store_true", help="do not report each job")
+    wrk.set_defaults(func=cmd_worker)
+
+    sbm = sub.add_parser("submit", help="queue a state file as a spool job")
+    sbm.add_argument("--spool", required=True, help="spool directory")
+    sbm.add_argument("--state", required=True, help="state JSON file ('-' for stdin)")
+    sbm.add_argument("--output-dir", help="override project.output_dir (relative paths resolve against the spool)")
+    sbm.add_argument("--id", help="job id (default: timestamp plus random suffix)")
+    sbm.set_defaults(func=cmd_submit)
+
+    bnd = sub.add_parser("bundle", help="pack a project with its DUT, templates and overrides into one file, or unpack one")
+    bnd_sub = bnd.add_subparsers(dest="action", required=True)
+    bpk = bnd_sub.add_parser("pack", help="write a .tbbundle")
+    bpk.add_argument("--state", required=True, help="state JSON file or .tbproj ('-' for stdin)")
+    bpk.add_argument("--out", required=True, help="bundle file to write")
+    bup = bnd_sub.add_parser("unpack", help="unpack a .tbbundle into a directory")
+    bup.add_argument("bundle", help="bundle file")
+    bup.add_argument("--dest", required=True, help="directory for project.tbproj, sources/ and templates/")
+    bnd.set_defaults(func=cmd_bundle)
+
+    srv = sub.add_parser("serve", help="run a local JSON-RPC daemon with warm parse/render caches")
+    srv.add_argument("--listen", help="unix:PATH, a socket path, or HOST:PORT (default: $TBGEN_DAEMON or a per-user socket)")
+    srv.add_argument("--workers", type=int, help="requests doing generator work at once (default: CPU count)")
+    srv.add_argument("--cache-dir", help="content-addressed output cache used by 'generate'")
+    srv.set_defaults(func=cmd_serve)
+
+    rpc = sub.add_parser("call", help="send one request to a running daemon")
+    rpc.add_argument("method", help="ping, stats, parse, validate, preview, generate or shutdown")
+    rpc.add_argument("--params", help="params as a JSON object")
+    rpc.add_argument("--state", help="state JSON file ('-' for stdin), passed as params.state")
+    rpc.add_argument("--connect", help="daemon address (default: as for serve)")
+    rpc.add_argument("--timeout", type=float, help="seconds to wait for the reply")
+    rpc.add_argument("--json", action="store_true", help="print preview results as JSON too")
+    rpc.set_defaults(func=cmd_call)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command in (None, "gui"):
+        from .app import main as gui_main
+
+        gui_main()
+        return 0
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,7 @@ from PIL import Image, ImageSequence, ImageTk
 from ..utils.paths import resource_path
 from ..utils.state import StateManager
 from ..utils.theme import Theme
-from ..utils.workflow import Status, compute_module_statuses
+from ..utils.workflow import Status, module_statuses
 
 COPYRIGHT_SIGN = "\N{COPYRIGHT SIGN}"
 
@@ -236,11 +236,11 @@ class Footer(tk.Frame):
             self.after(2000, self.refresh_status_indicators)
 
     def refresh_status_indicators(self) -> None:
-        data = self.state.get_all()
+        data = self.state.snapshot()
 
         # Always keep footer status in sync with workflow completion.
         try:
-            statuses = compute_module_statuses(data)
+            statuses = module_statuses(self.state)
             required = [
                 "project_details",
                 "interface_dut",
@@ -5,8 +5,9 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 
 from ..utils.generator import generate_files
+from ..utils.schema import SchemaError
 from ..utils.state import StateManager
-from ..utils.ui import CodeNotebook, ScrollableFrame, section_title
+from ..utils.ui import CodeNotebook, ScrollableFrame, release_on_destroy, section_title
 
 
 class AgentClassForm(ttk.Frame):
@@ -41,7 +42,7 @@ class AgentClassForm(ttk.Frame):
         self.include_monitor.trace_add("write", lambda *_: self._apply_intelligence())
         self.use_custom_code.trace_add("write", lambda *_: self._refresh_previews())
 
-        self.state.subscribe_key("transaction", self._on_transaction_change)
+        release_on_destroy(self, self.state.subscribe_key("transaction", self._on_transaction_change))
 
         self._apply_intelligence()
         self._refresh_previews()
@@ -184,7 +185,11 @@ class AgentClassForm(ttk.Frame):
         data["agent_type"] = data["type"]
         data["components"] = dict(data["include_components"])
 
-        self.state.set("agent", data)
+        try:
+            self.state.set("agent", data)
+        except SchemaError as exc:
+            messagebox.showerror("Invalid", f"Cannot save the agent configuration:\n{exc}", parent=self.winfo_toplevel())
+            return
         messagebox.showinfo("Saved", "Agent configuration saved successfully!", parent=self.winfo_toplevel())
         if hasattr(self.master.master, "footer"):
             self.master.master.footer.mark_done("agent")
@@ -205,7 +210,9 @@ class AgentClassForm(ttk.Frame):
         temp_state["agent"] = self._effective_agent_state()
 
         try:
-            files, _warnings = generate_files(temp_state)
+            files, _warnings = generate_files(
+                temp_state, only=[Path(f"src/{n}.sv") for n in ("agent", "driver", "monitor", "sequencer")]
+            )
         except Exception as exc:
             for tab in tabs:
                 w = self.notebook.get_text_widget(tab)
@@ -253,9 +260,10 @@ class AgentClassForm(ttk.Frame):
             if text:
                 code[key] = text
 
-        self.state.set("agent_code", code)
         self.use_custom_code.set(True)
-        self.save_agent()
+        with self.state.batch():
+            self.state.set("agent_code", code)
+            self.save_agent()
         messagebox.showinfo("Saved", "Edited code saved. Generation will use custom agent code.", parent=self.winfo_toplevel())
 
     def revert_current_tab(self) -> None:
@@ -271,13 +279,15 @@ class AgentClassForm(ttk.Frame):
         if not isinstance(agent_code, dict):
             agent_code = {}
         if key in agent_code:
+            agent_code = dict(agent_code)
             agent_code.pop(key, None)
             self.state.set("agent_code", agent_code)
         self._refresh_previews()
 
     def revert_all_tabs(self) -> None:
-        self.state.set("agent_code", {})
         self.use_custom_code.set(False)
-        self.save_agent()
+        with self.state.batch():
+            self.state.set("agent_code", {})
+            self.save_agent()
         self._refresh_previews()
 
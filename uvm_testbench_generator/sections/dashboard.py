@@ -1,10 +1,12 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import threading
 
 from ..utils.state import StateManager
+from ..utils.ui import release_on_destroy
+from ..utils.export import export_archive
 from ..utils.generator import generate_project
-from ..utils.workflow import compute_module_statuses, Status
+from ..utils.workflow import module_statuses, Status
 
 class DashboardPage(ttk.Frame):
     def __init__(self, parent):
@@ -14,7 +16,7 @@ class DashboardPage(ttk.Frame):
 
         self.build_ui()
         self.refresh_dashboard()
-        self.state.subscribe(self._on_state_change)
+        release_on_destroy(self, self.state.subscribe(self._on_state_change))
 
     def _on_state_change(self, _key, _value, _snapshot) -> None:
         try:
@@ -96,7 +98,7 @@ class DashboardPage(ttk.Frame):
         generate_btn.grid(row=2, column=0, columnspan=2, pady=10)
 
     def refresh_dashboard(self):
-        data = self.state.get_all()
+        data = self.state.snapshot()
 
         project = data.get("project", {})
         if project:
@@ -113,7 +115,7 @@ class DashboardPage(ttk.Frame):
         else:
             self.proj_summary.config(text="No project loaded yet.")
 
-        statuses = compute_module_statuses(data)
+        statuses = module_statuses(self.state)
         order = [
             ("Project Details", "project_details"),
             ("Interface & DUT", "interface_dut"),
@@ -187,7 +189,7 @@ class DashboardPage(ttk.Frame):
         self.diagnostics_text.config(state="disabled")
 
     def generate_testbench(self):
-        data = self.state.get_all()
+        data = self.state.snapshot()
 
         def worker():
             try:
@@ -204,6 +206,8 @@ class DashboardPage(ttk.Frame):
 
             def done():
                 msg = f"Generated {len(result.files_written)} files in:\n{result.output_root}"
+                if result.metrics is not None:
+                    msg += "\n\nTimings:\n" + "\n".join(result.metrics.summary_lines())
                 if result.warnings:
                     msg += "\n\nWarnings:\n" + "\n".join(f"- {w}" for w in result.warnings)
                 messagebox.showinfo("Generate Complete", msg)
@@ -213,20 +217,45 @@ class DashboardPage(ttk.Frame):
         threading.Thread(target=worker, daemon=True).start()
 
     def export_testbench(self):
-        data = self.state.get_all()
+        data = self.state.snapshot()
         project = data.get("project", {}) or {}
-        output_dir = (project.get("output_dir") or "").strip()
         project_name = (project.get("project_name") or "").strip()
-        if not output_dir or not project_name:
+        if not project_name:
             messagebox.showwarning(
                 "Export",
-                "Please save Project Details first (Project Name + Output Directory).",
+                "Please save Project Details first (Project Name).",
             )
             return
-        messagebox.showinfo(
-            "Export",
-            "Use Generate Testbench to write the multi-file project into the Output Directory.",
+        dest = filedialog.asksaveasfilename(
+            initialfile=f"{project_name}.tar.gz",
+            defaultextension=".tar.gz",
+            filetypes=[("Gzipped tar", "*.tar.gz *.tgz"), ("Zip archive", "*.zip")],
         )
+        if not dest:
+            return
+
+        def worker():
+            try:
+                result = export_archive(data, dest)
+            except Exception as exc:
+                err_text = str(exc)
+                self.after(
+                    0,
+                    lambda: messagebox.showerror(
+                        "Export Failed", f"Export failed:\n\n{err_text}"
+                    ),
+                )
+                return
+
+            def done():
+                msg = f"Exported {len(result.files_written)} files to:\n{result.output_root}"
+                if result.warnings:
+                    msg += "\n\nWarnings:\n" + "\n".join(f"- {w}" for w in result.warnings)
+                messagebox.showinfo("Export Complete", msg)
+
+            self.after(0, done)
+
+        threading.Thread(target=worker, daemon=True).start()
 
     def reset_project(self):
         self.state.clear()
@@ -3,6 +3,7 @@ from __future__ import annotations
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from ..utils.schema import SchemaError
 from ..utils.state import StateManager
 from ..utils.ui import CodePreview, ScrollableFrame
 
@@ -404,7 +405,11 @@ class InterfaceDUTForm(ttk.Frame):
             "signals": self.signals,
             "modports": self.modports,
         }
-        self.state.set("interface", data)
+        try:
+            self.state.set("interface", data)
+        except SchemaError as exc:
+            messagebox.showerror("Invalid", f"Cannot save the interface:\n{exc}")
+            return
         messagebox.showinfo("Saved", "Interface details and modports saved successfully!")
         if hasattr(self.master.master, "footer"):
             self.master.master.footer.mark_done("interface")
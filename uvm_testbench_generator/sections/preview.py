@@ -5,6 +5,7 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
 from ..utils.generator import generate_files
+from ..utils.overrides import with_override
 from ..utils.state import StateManager
 from ..utils.ui import CodeNotebook, ScrollableFrame, section_title
 
@@ -23,7 +24,6 @@ class PreviewPage(ttk.Frame):
 
         self.use_overrides = tk.BooleanVar(value=bool(self.state.get("custom_files_enabled", True)))
 
-        self._file_cache: dict[str, str] = {}
         self._files: list[str] = []
         self._iid_to_name: dict[str, str] = {}
         self.file_filter = tk.StringVar()
@@ -151,7 +151,7 @@ class PreviewPage(ttk.Frame):
 
     def refresh_preview(self) -> None:
         previous = self.notebook.current_tab_name()
-        data = self.state.get_all()
+        data = self.state.snapshot()
         try:
             files, warnings = generate_files(data)
         except Exception as exc:
@@ -165,14 +165,9 @@ class PreviewPage(ttk.Frame):
         tabs.extend([p.as_posix() for p in file_paths])
         self.notebook.set_tabs(tabs)
 
-        # Cache the generated content so we can revert even if overrides exist.
-        self._file_cache = {p.as_posix(): files[p] for p in file_paths}
         self._files = [p.as_posix() for p in file_paths if p.as_posix() != "WARNINGS"]
         self._refresh_file_list()
 
-        custom_files = self.state.get("custom_files", {}) or {}
-        enabled = bool(self.use_overrides.get())
-
         if warnings:
             w = self.notebook.get_text_widget("WARNINGS")
             if w is not None:
@@ -185,12 +180,8 @@ class PreviewPage(ttk.Frame):
             if w is None:
                 continue
             w.delete("1.0", tk.END)
-
-            override = None
-            if enabled and isinstance(custom_files, dict):
-                override = custom_files.get(name)
-
-            w.insert(tk.END, str(override) if override is not None else files[p])
+            # Saved overrides are already applied (and rebased) by the generator.
+            w.insert(tk.END, files[p])
 
         # Restore selection for better UX.
         if previous and previous in self.notebook.tab_names():
@@ -198,6 +189,13 @@ class PreviewPage(ttk.Frame):
         elif self._files:
             self.notebook.select_tab(self._files[0])
 
+    def _generated(self, only: list[str] | None = None) -> dict[str, str]:
+        # The files as generated without overrides: what overrides are diffed against.
+        files, _warnings = generate_files(
+            self.state.snapshot(), only=None if only is None else [Path(n) for n in only], overrides=False
+        )
+        return {p.as_posix(): text for p, text in files.items()}
+
     def _current_filename(self) -> str | None:
         tab = self.notebook.current_tab_name()
         if not tab or tab == "WARNINGS":
@@ -212,30 +210,51 @@ class PreviewPage(ttk.Frame):
         if w is None:
             return
         text = (w.get("1.0", tk.END) or "").rstrip() + "\n"
+        base = self._generated([name]).get(name)
 
         custom_files = self.state.get("custom_files", {}) or {}
-        if not isinstance(custom_files, dict):
-            custom_files = {}
-        custom_files[name] = text
-        self.state.set("custom_files", custom_files)
+        if base is None:
+            # Not a generated file: keep the whole text.
+            custom_files = dict(custom_files) if isinstance(custom_files, dict) else {}
+            custom_files[name] = text
+        else:
+            custom_files = with_override(custom_files, name, base, text)
         self.use_overrides.set(True)
-        self.state.set("custom_files_enabled", True)
-        messagebox.showinfo("Saved", f"Override saved for:\n{name}", parent=self.winfo_toplevel())
+        with self.state.batch():
+            self.state.set("custom_files", custom_files)
+            self.state.set("custom_files_enabled", True)
+        if name in custom_files:
+            messagebox.showinfo("Saved", f"Override saved for:\n{name}", parent=self.winfo_toplevel())
+        else:
+            messagebox.showinfo(
+                "Saved", f"{name} matches the generated code; no override kept.", parent=self.winfo_toplevel()
+            )
 
     def save_all_overrides(self) -> None:
-        custom_files: dict[str, str] = {}
+        # Only edited tabs are kept, each as a patch against the generated file.
+        generated = self._generated()
+        custom_files: dict = {}
         for name in self.notebook.tab_names():
             if name == "WARNINGS":
                 continue
             w = self.notebook.get_text_widget(name)
             if w is None:
                 continue
-            custom_files[name] = (w.get("1.0", tk.END) or "").rstrip() + "\n"
+            text = (w.get("1.0", tk.END) or "").rstrip() + "\n"
+            if name in generated:
+                custom_files = with_override(custom_files, name, generated[name], text)
+            else:
+                custom_files[name] = text
 
-        self.state.set("custom_files", custom_files)
         self.use_overrides.set(True)
-        self.state.set("custom_files_enabled", True)
-        messagebox.showinfo("Saved", "Overrides saved for all tabs.", parent=self.winfo_toplevel())
+        with self.state.batch():
+            self.state.set("custom_files", custom_files)
+            self.state.set("custom_files_enabled", True)
+        messagebox.showinfo(
+            "Saved",
+            f"Overrides saved for {len(custom_files)} edited file(s); unedited tabs match the generated code.",
+            parent=self.winfo_toplevel(),
+        )
 
     def revert_current_override(self) -> None:
         name = self._current_filename()
@@ -249,13 +268,15 @@ class PreviewPage(ttk.Frame):
         if not messagebox.askyesno("Revert", f"Revert saved override for:\n{name}?", parent=self.winfo_toplevel()):
             return
 
+        custom_files = dict(custom_files)
+
         custom_files.pop(name, None)
         self.state.set("custom_files", custom_files)
 
         w = self.notebook.get_text_widget(name)
         if w is not None:
             w.delete("1.0", tk.END)
-            w.insert(tk.END, self._file_cache.get(name, ""))
+            w.insert(tk.END, self._generated([name]).get(name, ""))
 
     def revert_all_overrides(self) -> None:
         custom_files = self.state.get("custom_files", {}) or {}
@@ -1,7 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext
+from ..utils.schema import SchemaError
 from ..utils.state import StateManager
-from ..utils.verilog_parser import extract_parameters, extract_signals, extract_module_info
+from ..utils.verilog_parser import extract_parameters, extract_signals, extract_module_info_cached
 from tkinter import messagebox
 
 class ProjectDetailsForm(ttk.Frame):
@@ -35,6 +36,7 @@ class ProjectDetailsForm(ttk.Frame):
         self.prefix = tk.StringVar()
         self.owner_name = tk.StringVar()
         self.dut_path = tk.StringVar()
+        self.template_dir = tk.StringVar()
         self.uvm_version = tk.StringVar(value="UVM 1.2")
         self.language = tk.StringVar(value="SystemVerilog")
         self.project_mode = tk.StringVar(value="Full Testbench")
@@ -50,6 +52,8 @@ class ProjectDetailsForm(ttk.Frame):
         add_labeled_entry("Owner Name:", self.owner_name)
         add_labeled_entry("DUT File Path:", self.dut_path)
         ttk.Button(left_frame, text="Browse", command=self.browse_dut).grid(row=row-1, column=2)
+        add_labeled_entry("Template Directory:", self.template_dir)
+        ttk.Button(left_frame, text="Browse", command=self.browse_templates).grid(row=row-1, column=2)
 
         ttk.Label(left_frame, text="UVM Version:").grid(row=row, column=0, sticky="w")
         ttk.Combobox(left_frame, textvariable=self.uvm_version, values=["UVM 1.1d", "UVM 1.2", "UVM 1.3"], state="readonly").grid(row=row, column=1, sticky="ew", pady=2)
@@ -118,6 +122,11 @@ class ProjectDetailsForm(ttk.Frame):
         if path:
             self.dut_path.set(path)
 
+    def browse_templates(self):
+        path = filedialog.askdirectory()
+        if path:
+            self.template_dir.set(path)
+
     def save_project_details(self):
         data = {
             "project_name": self.project_name.get(),
@@ -125,6 +134,7 @@ class ProjectDetailsForm(ttk.Frame):
             "prefix": self.prefix.get(),
             "owner_name": self.owner_name.get(),
             "dut_path": self.dut_path.get(),
+            "template_dir": self.template_dir.get(),
             "uvm_version": self.uvm_version.get(),
             "language": self.language.get(),
             "project_mode": self.project_mode.get(),
@@ -137,14 +147,18 @@ class ProjectDetailsForm(ttk.Frame):
         }
     
         if data["dut_path"]:
-            dut_info = extract_module_info(data["dut_path"])
+            dut_info = extract_module_info_cached(data["dut_path"])
             data["dut_info"] = dut_info
             data["module_name"] = dut_info["module_name"]
             self.populate_treeviews(dut_info["parameters"], dut_info["signals"])
         else:
             self.populate_treeviews({}, [])
     
-        self.state.set("project", data)
+        try:
+            self.state.set("project", data)
+        except SchemaError as exc:
+            messagebox.showerror("Invalid", f"Cannot save the project details:\n{exc}")
+            return
         self.update_preview(data)
         if hasattr(self.master.master, 'footer'):
            self.master.master.footer.mark_done("project")
@@ -217,14 +231,17 @@ class ProjectDetailsForm(ttk.Frame):
                 })
     
         # Get current state and update
-        data = self.state.get("project", {})
-        if "dut_info" not in data:
-            data["dut_info"] = {}
+        data = dict(self.state.get("project", {}) or {})
+        data["dut_info"] = dict(data.get("dut_info") or {})
     
         data["dut_info"]["parameters"] = updated_params
         data["dut_info"]["signals"] = updated_signals
     
-        self.state.set("project", data)
+        try:
+            self.state.set("project", data)
+        except SchemaError as exc:
+            messagebox.showerror("Invalid", f"Cannot save the project details:\n{exc}")
+            return
         self.update_preview(data)
     
         messagebox.showinfo("Saved", "Edited parameters and signals have been saved to state.")
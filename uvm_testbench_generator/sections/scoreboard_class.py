@@ -6,8 +6,10 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 
 from ..utils.generator import generate_files
+from ..utils.overrides import with_override
+from ..utils.schema import Field, SchemaError, parse_slice
 from ..utils.state import StateManager
-from ..utils.ui import CodePreview, ScrollableFrame, section_title
+from ..utils.ui import CodePreview, ScrollableFrame, release_on_destroy, section_title
 
 
 class ScoreboardClassForm(ttk.Frame):
@@ -33,9 +35,13 @@ class ScoreboardClassForm(ttk.Frame):
         self._load_from_state()
         self.build_ui()
 
-        self.state.subscribe_key("transaction", lambda *_: self._rebuild_fields())
-        self.state.subscribe_key("agent", lambda *_: self._refresh_info())
-        self.state.subscribe_key("interface", lambda *_: self._refresh_info())
+        release_on_destroy(
+            self,
+            self.state.subscribe_key("transaction", lambda *_: self._rebuild_fields()),
+            self.state.subscribe_path("agent.include_components.monitor", lambda *_: self._refresh_info()),
+            self.state.subscribe_path("agent.components.monitor", lambda *_: self._refresh_info()),
+            self.state.subscribe_key("interface", lambda *_: self._refresh_info()),
+        )
 
         self.compare_mode.trace_add("write", lambda *_: self.refresh_preview())
         self.use_expected_queue.trace_add("write", lambda *_: self.refresh_preview())
@@ -53,18 +59,12 @@ class ScoreboardClassForm(ttk.Frame):
         txn = self.state.get("transaction", {}) or {}
         return str(txn.get("class_name") or "txn_item")
 
-    def _txn_fields(self) -> list[dict]:
-        txn = self.state.get("transaction", {}) or {}
-        fields = txn.get("fields", []) or []
-        out: list[dict] = []
-        for f in fields:
-            if not isinstance(f, dict):
-                continue
-            name = str(f.get("name") or "").strip()
-            if not name:
-                continue
-            out.append(f)
-        return out
+    def _txn_fields(self) -> list[Field]:
+        try:
+            txn = parse_slice("transaction", self.state.get("transaction") or {})
+        except SchemaError:
+            return []
+        return [f for f in txn.fields if f.name]
 
     def _load_from_state(self) -> None:
         sb = self.state.get("scoreboard", {}) or {}
@@ -215,12 +215,8 @@ class ScoreboardClassForm(ttk.Frame):
         # Default: outputs (non-rand). If user had selections saved, keep them.
         has_saved = bool(existing_selected)
         for f in txn_fields:
-            name = str(f.get("name") or "").strip()
-            if not name:
-                continue
-            is_output = not bool(f.get("rand"))
-            default_on = (name in existing_selected) if has_saved else is_output
-            self._field_vars[name] = tk.BooleanVar(value=default_on)
+            default_on = (f.name in existing_selected) if has_saved else not f.rand
+            self._field_vars[f.name] = tk.BooleanVar(value=default_on)
 
         r = 0
         for name, var in sorted(self._field_vars.items(), key=lambda kv: kv[0].lower()):
@@ -236,10 +232,9 @@ class ScoreboardClassForm(ttk.Frame):
         return [name for name, var in self._field_vars.items() if bool(var.get())]
 
     def select_outputs(self) -> None:
-        txn_fields = {str(f.get("name") or "").strip(): f for f in self._txn_fields()}
+        rand = {f.name: f.rand for f in self._txn_fields()}
         for name, var in self._field_vars.items():
-            f = txn_fields.get(name, {})
-            var.set(not bool(f.get("rand")))
+            var.set(not rand.get(name, False))
         self.refresh_preview()
 
     def select_all(self) -> None:
@@ -278,43 +273,50 @@ class ScoreboardClassForm(ttk.Frame):
         data["use_queue"] = data["use_expected_queue"]
         data["use_coverage"] = data["enable_coverage"]
 
-        self.state.set("scoreboard", data)
+        try:
+            self.state.set("scoreboard", data)
+        except SchemaError as exc:
+            messagebox.showerror("Invalid", f"Cannot save the scoreboard configuration:\n{exc}", parent=self.winfo_toplevel())
+            return
         messagebox.showinfo("Saved", "Scoreboard configuration saved successfully!", parent=self.winfo_toplevel())
         if hasattr(self.master.master, "footer"):
             self.master.master.footer.mark_done("scoreboard")
 
-    def refresh_preview(self) -> None:
+    def _preview_state(self) -> dict:
         temp = self.state.get_all()
         temp["scoreboard"] = self._effective_scoreboard_state()
+        return temp
 
+    def refresh_preview(self) -> None:
+        # A saved override is already applied (and rebased) by the generator.
         try:
-            files, _warnings = generate_files(temp)
+            files, _warnings = generate_files(self._preview_state(), only=[Path("src/scoreboard.sv")])
             content = files.get(Path("src/scoreboard.sv"), "")
         except Exception as exc:
             content = f"// Preview failed:\n// {exc}\n"
 
-        # If override exists and overrides enabled, show override (with a note)
-        custom_files = self.state.get("custom_files", {}) or {}
-        enabled = bool(self.state.get("custom_files_enabled", True))
-        override = None
-        if enabled and isinstance(custom_files, dict):
-            override = custom_files.get("src/scoreboard.sv")
-
         self.preview_box.delete("1.0", tk.END)
-        if override is not None:
-            self.preview_box.insert(tk.END, str(override))
-        else:
-            self.preview_box.insert(tk.END, content)
+        self.preview_box.insert(tk.END, content)
 
     def save_preview_override(self) -> None:
         text = (self.preview_box.get("1.0", tk.END) or "").rstrip() + "\n"
-        custom_files = self.state.get("custom_files", {}) or {}
-        if not isinstance(custom_files, dict):
-            custom_files = {}
-        custom_files["src/scoreboard.sv"] = text
-        self.state.set("custom_files", custom_files)
-        self.state.set("custom_files_enabled", True)
-        messagebox.showinfo("Saved", "Override saved for src/scoreboard.sv", parent=self.winfo_toplevel())
+        try:
+            files, _warnings = generate_files(self._preview_state(), only=[Path("src/scoreboard.sv")], overrides=False)
+        except Exception as exc:
+            messagebox.showerror("Error", f"Cannot generate src/scoreboard.sv:\n{exc}", parent=self.winfo_toplevel())
+            return
+        # Stored as a patch against the generated file; none if nothing was edited.
+        base = files.get(Path("src/scoreboard.sv"), "")
+        custom_files = with_override(self.state.get("custom_files"), "src/scoreboard.sv", base, text)
+        with self.state.batch():
+            self.state.set("custom_files", custom_files)
+            self.state.set("custom_files_enabled", True)
+        if "src/scoreboard.sv" in custom_files:
+            messagebox.showinfo("Saved", "Override saved for src/scoreboard.sv", parent=self.winfo_toplevel())
+        else:
+            messagebox.showinfo(
+                "Saved", "src/scoreboard.sv matches the generated code; no override kept.", parent=self.winfo_toplevel()
+            )
 
     def revert_preview_override(self) -> None:
         custom_files = self.state.get("custom_files", {}) or {}
@@ -326,6 +328,7 @@ class ScoreboardClassForm(ttk.Frame):
             parent=self.winfo_toplevel(),
         ):
             return
+        custom_files = dict(custom_files)
         custom_files.pop("src/scoreboard.sv", None)
         self.state.set("custom_files", custom_files)
         self.refresh_preview()
@@ -5,8 +5,8 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 
 from ..utils.state import StateManager
-from ..utils.ui import CodePreview, ScrollableFrame, section_title
-from ..utils.workflow import Status, compute_module_statuses
+from ..utils.ui import CodePreview, ScrollableFrame, release_on_destroy, section_title
+from ..utils.workflow import Status, module_statuses
 
 
 class StateMachineViewer(ttk.Frame):
@@ -22,11 +22,12 @@ class StateMachineViewer(ttk.Frame):
 
         self._raw_cache: dict = {}
         self._workflow_cache: dict = {}
+        self._listener_cache: dict = {}
 
         self.build_ui()
         self.refresh_all()
 
-        self.state.subscribe(self._on_state_change)
+        release_on_destroy(self, self.state.subscribe(self._on_state_change))
 
     def _on_state_change(self, _key, _value, _snapshot) -> None:
         try:
@@ -54,11 +55,14 @@ class StateMachineViewer(ttk.Frame):
 
         self.workflow_tab = ttk.Frame(self.nb, padding=10)
         self.raw_tab = ttk.Frame(self.nb, padding=10)
+        self.listeners_tab = ttk.Frame(self.nb, padding=10)
         self.nb.add(self.workflow_tab, text="Workflow")
         self.nb.add(self.raw_tab, text="Raw State")
+        self.nb.add(self.listeners_tab, text="Listeners")
 
         self._build_workflow_tab(self.workflow_tab)
         self._build_raw_tab(self.raw_tab)
+        self._build_listeners_tab(self.listeners_tab)
 
     def _build_workflow_tab(self, parent: ttk.Frame) -> None:
         parent.columnconfigure(0, weight=1)
@@ -135,13 +139,87 @@ class StateMachineViewer(ttk.Frame):
         preview.grid(row=0, column=0, sticky="nsew")
         self.raw_detail = preview.text
 
+    def _build_listeners_tab(self, parent: ttk.Frame) -> None:
+        parent.columnconfigure(0, weight=1)
+        parent.rowconfigure(1, weight=1)
+
+        bar = ttk.Frame(parent)
+        bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 8))
+        self.record_var = tk.BooleanVar(value=self.state.instrumented)
+        ttk.Checkbutton(bar, text="Time listeners", variable=self.record_var, command=self._toggle_recording).pack(
+            side="left"
+        )
+        ttk.Button(bar, text="Reset", command=self._reset_recording).pack(side="left", padx=(8, 0))
+        ttk.Label(bar, text="Calls over 16 ms and errors are also logged as warnings.").pack(side="left", padx=(12, 0))
+
+        cols = ("Listener", "Kind", "Calls", "Total ms", "Max ms", "Mean ms", "Errors")
+        self.listener_tree = ttk.Treeview(parent, columns=cols, show="headings", height=16)
+        for col, w in [
+            ("Listener", 420),
+            ("Kind", 70),
+            ("Calls", 70),
+            ("Total ms", 90),
+            ("Max ms", 90),
+            ("Mean ms", 90),
+            ("Errors", 70),
+        ]:
+            self.listener_tree.heading(col, text=col)
+            self.listener_tree.column(col, width=w, stretch=(col == "Listener"), anchor="w" if col == "Listener" else "e")
+
+        y = ttk.Scrollbar(parent, orient="vertical", command=self.listener_tree.yview)
+        self.listener_tree.configure(yscrollcommand=y.set)
+        self.listener_tree.grid(row=1, column=0, sticky="nsew")
+        y.grid(row=1, column=1, sticky="ns")
+
+        self.listener_error = tk.StringVar(value="")
+        ttk.Label(parent, textvariable=self.listener_error, wraplength=900, justify="left").grid(
+            row=2, column=0, columnspan=2, sticky="w", pady=(8, 0)
+        )
+        self.listener_tree.bind("<<TreeviewSelect>>", self._show_listener_error)
+
+    def _toggle_recording(self) -> None:
+        if self.record_var.get():
+            self.state.instrument()
+        else:
+            self.state.uninstrument()
+        self._refresh_listener_tree()
+
+    def _reset_recording(self) -> None:
+        if self.state.instrumented:
+            self.state.instrument()
+        self._refresh_listener_tree()
+
     def refresh_all(self) -> None:
-        snapshot = self.state.get_all()
+        snapshot = self.state.snapshot()
         self._raw_cache = snapshot
-        self._workflow_cache = compute_module_statuses(snapshot)
+        self._workflow_cache = module_statuses(self.state)
 
         self._refresh_workflow_tree()
         self._refresh_raw_tree()
+        self._refresh_listener_tree()
+
+    def _refresh_listener_tree(self) -> None:
+        self.listener_tree.delete(*self.listener_tree.get_children())
+        self._listener_cache = {f"{row.kind}:{row.name}": row for row in self.state.listener_stats()}
+        for iid, row in self._listener_cache.items():
+            self.listener_tree.insert(
+                "",
+                "end",
+                iid=iid,
+                values=(
+                    row.name,
+                    row.kind,
+                    row.calls,
+                    f"{row.total_seconds * 1000:.1f}",
+                    f"{row.max_seconds * 1000:.1f}",
+                    f"{row.mean_seconds * 1000:.2f}",
+                    row.errors,
+                ),
+            )
+        if not self.state.instrumented:
+            self.listener_error.set("Turn on \"Time listeners\", then use the other pages to collect timings.")
+        else:
+            self.listener_error.set("")
 
     def _refresh_workflow_tree(self) -> None:
         self.workflow_tree.delete(*self.workflow_tree.get_children())
@@ -240,6 +318,12 @@ class StateMachineViewer(ttk.Frame):
         except Exception:
             self.raw_detail.insert(tk.END, str(value))
 
+    def _show_listener_error(self, _event=None) -> None:
+        sel = self.listener_tree.selection()
+        row = self._listener_cache.get(str(sel[0])) if sel else None
+        if row is not None and row.last_error:
+            self.listener_error.set(f"Last error in {row.name}: {row.last_error}")
+
     def clear_state(self) -> None:
         if not messagebox.askyesno("Confirm", "Clear all saved state data?", parent=self.winfo_toplevel()):
             return
@@ -6,8 +6,10 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 
 from ..utils.generator import generate_files
+from ..utils.overrides import with_override
+from ..utils.schema import SchemaError
 from ..utils.state import StateManager
-from ..utils.ui import CodePreview, ScrollableFrame, section_title
+from ..utils.ui import CodePreview, ScrollableFrame, release_on_destroy, section_title
 
 
 class TestClassForm(ttk.Frame):
@@ -36,11 +38,14 @@ class TestClassForm(ttk.Frame):
         self._load_from_state()
         self.build_ui()
 
-        self.state.subscribe_key("environment", lambda *_: self._refresh_info_and_preview())
-        self.state.subscribe_key("agent", lambda *_: self._refresh_info_and_preview())
-        self.state.subscribe_key("sequence", lambda *_: self._refresh_info_and_preview())
-        self.state.subscribe_key("custom_files", lambda *_: self.refresh_preview())
-        self.state.subscribe_key("custom_files_enabled", lambda *_: self.refresh_preview())
+        release_on_destroy(
+            self,
+            self.state.subscribe_key("environment", lambda *_: self._refresh_info_and_preview()),
+            self.state.subscribe_key("agent", lambda *_: self._refresh_info_and_preview()),
+            self.state.subscribe_key("sequence", lambda *_: self._refresh_info_and_preview()),
+            self.state.subscribe_path(("custom_files", "src/test.sv"), lambda *_: self.refresh_preview()),
+            self.state.subscribe_key("custom_files_enabled", lambda *_: self.refresh_preview()),
+        )
 
         self.create_env.trace_add("write", lambda *_: self._refresh_info_and_preview())
         self.start_sequence.trace_add("write", lambda *_: self._refresh_info_and_preview())
@@ -200,39 +205,50 @@ class TestClassForm(ttk.Frame):
             return
 
         data = self._effective_test_state()
-        self.state.set("test", data)
+        try:
+            self.state.set("test", data)
+        except SchemaError as exc:
+            messagebox.showerror("Invalid", f"Cannot save the test class configuration:\n{exc}", parent=self.winfo_toplevel())
+            return
         messagebox.showinfo("Saved", "Test class configuration saved successfully!", parent=self.winfo_toplevel())
         if hasattr(self.master.master, "footer"):
             self.master.master.footer.mark_done("test")
 
-    def refresh_preview(self) -> None:
+    def _preview_state(self) -> dict:
         temp = self.state.get_all()
         temp["test"] = self._effective_test_state()
+        return temp
 
+    def refresh_preview(self) -> None:
+        # A saved override is already applied (and rebased) by the generator.
         try:
-            files, _warnings = generate_files(temp)
+            files, _warnings = generate_files(self._preview_state(), only=[Path("src/test.sv")])
             content = files.get(Path("src/test.sv"), "")
         except Exception as exc:
             content = f"// Preview failed:\n// {exc}\n"
 
-        custom_files = self.state.get("custom_files", {}) or {}
-        enabled = bool(self.state.get("custom_files_enabled", True))
-        override = None
-        if enabled and isinstance(custom_files, dict):
-            override = custom_files.get("src/test.sv")
-
         self.preview_box.delete("1.0", tk.END)
-        self.preview_box.insert(tk.END, str(override) if override is not None else content)
+        self.preview_box.insert(tk.END, content)
 
     def save_preview_override(self) -> None:
         text = (self.preview_box.get("1.0", tk.END) or "").rstrip() + "\n"
-        custom_files = self.state.get("custom_files", {}) or {}
-        if not isinstance(custom_files, dict):
-            custom_files = {}
-        custom_files["src/test.sv"] = text
-        self.state.set("custom_files", custom_files)
-        self.state.set("custom_files_enabled", True)
-        messagebox.showinfo("Saved", "Override saved for src/test.sv", parent=self.winfo_toplevel())
+        try:
+            files, _warnings = generate_files(self._preview_state(), only=[Path("src/test.sv")], overrides=False)
+        except Exception as exc:
+            messagebox.showerror("Error", f"Cannot generate src/test.sv:\n{exc}", parent=self.winfo_toplevel())
+            return
+        # Stored as a patch against the generated file; none if nothing was edited.
+        base = files.get(Path("src/test.sv"), "")
+        custom_files = with_override(self.state.get("custom_files"), "src/test.sv", base, text)
+        with self.state.batch():
+            self.state.set("custom_files", custom_files)
+            self.state.set("custom_files_enabled", True)
+        if "src/test.sv" in custom_files:
+            messagebox.showinfo("Saved", "Override saved for src/test.sv", parent=self.winfo_toplevel())
+        else:
+            messagebox.showinfo(
+                "Saved", "src/test.sv matches the generated code; no override kept.", parent=self.winfo_toplevel()
+            )
 
     def revert_preview_override(self) -> None:
         custom_files = self.state.get("custom_files", {}) or {}
@@ -244,6 +260,7 @@ class TestClassForm(ttk.Frame):
             parent=self.winfo_toplevel(),
         ):
             return
+        custom_files = dict(custom_files)
         custom_files.pop("src/test.sv", None)
         self.state.set("custom_files", custom_files)
         self.refresh_preview()
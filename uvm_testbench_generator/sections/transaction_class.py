@@ -4,6 +4,7 @@ import re
 import tkinter as tk
 from tkinter import messagebox, ttk
 
+from ..utils.schema import SchemaError
 from ..utils.state import StateManager
 from ..utils.ui import CodePreview, ScrollableFrame, code_text, section_title
 
@@ -591,7 +592,11 @@ class TransactionClassForm(ttk.Frame):
             "fields": self.fields,
             "constraints": self.constraints,
         }
-        self.state.set("transaction", data)
+        try:
+            self.state.set("transaction", data)
+        except SchemaError as exc:
+            messagebox.showerror("Invalid", f"Cannot save the transaction class:\n{exc}", parent=self.winfo_toplevel())
+            return
 
         messagebox.showinfo("Saved", "Transaction class saved successfully!", parent=self.winfo_toplevel())
         if hasattr(self.master.master, "footer"):
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import inspect
+from pathlib import Path
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, Union
+
+from .generator import (
+    GenerationResult,
+    _atomic_write,
+    _safe_name,
+    _same_content,
+    iter_files,
+    validate_state,
+)
+from .metrics import MetricsRecorder
+from .verilog_parser import extract_module_info_cached
+
+# asyncio front-end for event-loop hosts. Rendering and file I/O run in the
+# loop's default executor one file at a time, so many generations can share a
+# loop, and cancellation takes effect between files; each file is written
+# atomically, so a cancelled run never leaves a half-written file behind.
+
+
+@dataclass(frozen=True)
+class FileWritten:
+    path: Path
+    rel_path: Path
+    index: int
+    bytes: int
+    unchanged: bool = False
+
+
+ProgressCallback = Callable[[FileWritten], Union[Awaitable[None], None]]
+
+
+async def parse_dut(path: str | Path) -> dict:
+    return await asyncio.to_thread(extract_module_info_cached, str(path))
+
+
+def _next_rendered(files: Iterator[tuple[Path, Iterable[str]]]) -> tuple[Path, str] | None:
+    try:
+        rel_path, chunks = next(files)
+    except StopIteration:
+        return None
+    return rel_path, "".join(chunks)
+
+
+def _write_one(path: Path, text: str, incremental: bool) -> bool:
+    """Write ``text`` unless ``incremental`` and it is already there; True if skipped."""
+    if incremental and _same_content(path, text.encode("utf-8")):
+        return True
+    _atomic_write(path, (text,))
+    return False
+
+
+async def aiter_write(
+    output_root: Path,
+    files: Iterable[tuple[Path, Iterable[str]]],
+    *,
+    recorder: MetricsRecorder | None = None,
+    incremental: bool = False,
+) -> AsyncIterator[FileWritten]:
+    """Render and write ``files`` one at a time off the loop, yielding after each."""
+    it = iter(files)
+    index = 0
+    while True:
+        t0 = time.perf_counter()
+        item = await asyncio.to_thread(_next_rendered, it)
+        if item is None:
+            return
+        rel_path, text = item
+        abs_path = output_root / rel_path
+        skipped = await asyncio.to_thread(_write_one, abs_path, text, incremental)
+        if recorder is not None:
+            recorder.add_elapsed(rel_path, time.perf_counter() - t0)
+        yield FileWritten(abs_path, rel_path, index, len(text.encode("utf-8")), skipped)
+        index += 1
+
+
+async def write_files_async(
+    output_root: Path, files: Iterable[tuple[Path, Iterable[str]]], *, incremental: bool = False
+) -> list[Path]:
+    return [ev.path async for ev in aiter_write(output_root, files, incremental=incremental)]
+
+
+async def generate_project_async(
+    state: dict, *, incremental: bool = False, progress: ProgressCallback | None = None
+) -> GenerationResult:
+    """``generate_project`` for asyncio callers.
+
+    ``progress`` (a plain or ``async`` callable) receives a ``FileWritten``
+    after every file. Cancelling the awaiting task stops before the next file.
+    """
+    errors = validate_state(state)
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    project = state.get("project", {}) or {}
+    output_dir = Path(str(project.get("output_dir", "")).strip())
+    output_root = output_dir / _safe_name(project.get("project_name", "testbench"), "testbench")
+
+    recorder = MetricsRecorder()
+    warnings: list[str] = []
+    written: list[Path] = []
+    unchanged: list[Path] = []
+    files = iter_files(state, warnings, recorder)
+    async for event in aiter_write(output_root, files, recorder=recorder, incremental=incremental):
+        written.append(event.path)
+        if event.unchanged:
+            unchanged.append(event.path)
+        if progress is not None:
+            ret = progress(event)
+            if inspect.isawaitable(ret):
+                await ret
+    return GenerationResult(
+        output_root=output_root,
+        files_written=tuple(written),
+        warnings=tuple(warnings),
+        metrics=recorder.result(),
+        files_unchanged=tuple(unchanged),
+    )
+
+
+async def aiter_generate(state: dict, *, incremental: bool = False) -> AsyncIterator[FileWritten | GenerationResult]:
+    """Stream ``FileWritten`` events, then the final ``GenerationResult``.
+
+    Leaving the ``async for`` early cancels the remaining files.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def run() -> None:
+        try:
+            result = await generate_project_async(state, incremental=incremental, progress=queue.put)
+            queue.put_nowait(result)
+        finally:
+            queue.put_nowait(done)
+
+    task = asyncio.ensure_future(run())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+        await task  # re-raise errors from the run
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
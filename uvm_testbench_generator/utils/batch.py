@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import re
+import time
+import traceback
+from typing import Callable, TextIO
+
+from .generator import generate_project, validate_state
+from .synthesis import deep_merge, state_from_dut
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    name: str
+    dut_path: str
+    output_dir: str
+    overrides: dict
+    log_path: str | None = None
+    cache_dir: str | None = None
+
+
+@dataclass(frozen=True)
+class BatchJobResult:
+    name: str
+    ok: bool
+    seconds: float
+    files: int = 0
+    output_root: str = ""
+    error: str = ""
+    log_path: str | None = None
+
+
+def load_batch_spec(path: str | Path, *, log_dir: str | Path | None = None, cache_dir: str | None = None) -> list[BatchJob]:
+    """Read a batch spec and resolve it into jobs.
+
+    The spec is a JSON object with ``blocks`` (each needing ``dut`` and
+    optionally ``name``, ``output_dir`` and ``overrides``), plus optional
+    top-level ``output_dir`` and ``defaults``. Relative paths resolve against
+    the spec's directory; ``defaults`` and each block's ``overrides`` are
+    partial states deep-merged over the synthesized one.
+    """
+    spec_path = Path(path)
+    spec = json.loads(spec_path.read_text(encoding="utf-8"))
+    if not isinstance(spec, dict) or not isinstance(spec.get("blocks"), list):
+        raise ValueError(f"{spec_path}: expected an object with a 'blocks' list")
+    base = spec_path.parent
+
+    def resolve(p: str) -> str:
+        q = Path(p).expanduser()
+        return str(q if q.is_absolute() else base / q)
+
+    defaults = spec.get("defaults") or {}
+    default_out = spec.get("output_dir") or "."
+    jobs: list[BatchJob] = []
+    seen: set[str] = set()
+    for idx, block in enumerate(spec["blocks"]):
+        if not isinstance(block, dict) or not block.get("dut"):
+            raise ValueError(f"{spec_path}: block #{idx} has no 'dut'")
+        name = str(block.get("name") or Path(block["dut"]).stem)
+        if name in seen:
+            raise ValueError(f"{spec_path}: duplicate block name {name!r}")
+        seen.add(name)
+        log_path = None
+        if log_dir is not None:
+            log_path = str(Path(log_dir) / f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}.log")
+        jobs.append(
+            BatchJob(
+                name=name,
+                dut_path=resolve(block["dut"]),
+                output_dir=resolve(block.get("output_dir") or default_out),
+                overrides=deep_merge(defaults, block.get("overrides") or {}),
+                log_path=log_path,
+                cache_dir=cache_dir,
+            )
+        )
+    return jobs
+
+
+def run_job(job: BatchJob) -> BatchJobResult:
+    """Parse, synthesize and generate one block. Runs inside a pool worker."""
+    t0 = time.perf_counter()
+    log: TextIO | None = None
+    if job.log_path:
+        Path(job.log_path).parent.mkdir(parents=True, exist_ok=True)
+        log = open(job.log_path, "w", encoding="utf-8")
+
+    def note(msg: str) -> None:
+        if log is not None:
+            log.write(f"[{time.perf_counter() - t0:8.3f}s] {msg}\n")
+            log.flush()
+
+    try:
+        note(f"parse {job.dut_path}")
+        state = state_from_dut(job.dut_path, project_name=job.name, output_dir=job.output_dir)
+        state = deep_merge(state, job.overrides)
+        errors = validate_state(state)
+        if errors:
+            raise ValueError("; ".join(errors))
+        note("generate")
+        result = generate_project(state, cache_dir=job.cache_dir)
+        for w in result.warnings:
+            note(f"warning: {w}")
+        if result.metrics is not None:
+            for line in result.metrics.summary_lines():
+                note(line)
+        note(f"done: {len(result.files_written)} files in {result.output_root}")
+        return BatchJobResult(
+            name=job.name,
+            ok=True,
+            seconds=time.perf_counter() - t0,
+            files=len(result.files_written),
+            output_root=str(result.output_root),
+            log_path=job.log_path,
+        )
+    except Exception as exc:
+        note("failed:\n" + traceback.format_exc())
+        return BatchJobResult(
+            name=job.name,
+            ok=False,
+            seconds=time.perf_counter() - t0,
+            error=f"{type(exc).__name__}: {exc}",
+            log_path=job.log_path,
+        )
+    finally:
+        if log is not None:
+            log.close()
+
+
+def run_batch(
+    jobs: list[BatchJob],
+    *,
+    workers: int | None = None,
+    on_result: Callable[[BatchJobResult], None] | None = None,
+) -> list[BatchJobResult]:
+    """Run ``jobs`` in a process pool; results come back in spec order."""
+    if not jobs:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    results: dict[str, BatchJobResult] = {}
+    if workers == 1:
+        for job in jobs:
+            results[job.name] = run_job(job)
+            if on_result is not None:
+                on_result(results[job.name])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_job, job): job for job in jobs}
+            for fut in as_completed(futures):
+                job = futures[fut]
+                try:
+                    res = fut.result()
+                except Exception as exc:
+                    res = BatchJobResult(name=job.name, ok=False, seconds=0.0, error=f"worker crashed: {exc}")
+                results[job.name] = res
+                if on_result is not None:
+                    on_result(res)
+    return [results[job.name] for job in jobs]
+
+
+def format_summary(results: list[BatchJobResult]) -> str:
+    rows = [("BLOCK", "STATUS", "FILES", "TIME", "OUTPUT / ERROR")]
+    for r in results:
+        rows.append(
+            (
+                r.name,
+                "ok" if r.ok else "FAILED",
+                str(r.files) if r.ok else "-",
+                f"{r.seconds:.2f}s",
+                r.output_root if r.ok else r.error,
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(4)]
+    lines = ["  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row[:4])) + "  " + row[4] for row in rows]
+    failed = sum(1 for r in results if not r.ok)
+    lines.append(f"{len(results) - failed}/{len(results)} blocks generated")
+    return "\n".join(lines)
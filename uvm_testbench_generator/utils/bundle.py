@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass
+import hashlib
+import json
+from pathlib import Path
+import re
+import tempfile
+from typing import BinaryIO
+import zipfile
+
+from .. import __version__
+from .generator import _safe_rel_path
+from .project_io import PROJECT_SUFFIX, save_project
+from .templates import TEMPLATE_SUFFIX
+from .verilog_parser import extract_module_info_cached, prime_module_info
+
+# A bundle is a zip holding bundle.json (state, file references and DUT parse
+# results) plus content-addressed blobs/<sha256> members, so a DUT referenced
+# twice or two identical overrides are stored once.
+BUNDLE_SUFFIX = ".tbbundle"
+BUNDLE_FORMAT = "tbgen-bundle"
+BUNDLE_FORMAT_VERSION = 1
+_CHUNK = 1 << 16
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+@dataclass(frozen=True)
+class BundleSummary:
+    path: Path
+    blobs: int
+    deduplicated: int
+    bytes: int
+    warnings: tuple[str, ...] = ()
+
+
+class _BlobWriter:
+    def __init__(self, zf: zipfile.ZipFile) -> None:
+        self.zf = zf
+        self.seen: set[str] = set()
+        self.deduplicated = 0
+        self.bytes = 0
+
+    def _open(self, digest: str) -> BinaryIO | None:
+        if digest in self.seen:
+            self.deduplicated += 1
+            return None
+        self.seen.add(digest)
+        info = zipfile.ZipInfo(f"blobs/{digest}", date_time=(1980, 1, 1, 0, 0, 0))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        return self.zf.open(info, "w")  # type: ignore[return-value]
+
+    def add_file(self, path: Path) -> str:
+        # Hash first (the member name is the digest), then stream the copy.
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        out = self._open(digest)
+        if out is not None:
+            with out, open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(_CHUNK), b""):
+                    out.write(chunk)
+                    self.bytes += len(chunk)
+        return digest
+
+    def add_bytes(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        out = self._open(digest)
+        if out is not None:
+            with out:
+                out.write(data)
+            self.bytes += len(data)
+        return digest
+
+
+def _write_bundle(out: BinaryIO, state: dict) -> tuple[_BlobWriter, list[str]]:
+    state = copy.deepcopy(state)
+    warnings: list[str] = []
+    manifest: dict = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_FORMAT_VERSION,
+        "generator_version": __version__,
+        "overrides": {},
+        "sources": {},
+        "templates": {},
+        "parse_cache": {},
+    }
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        blobs = _BlobWriter(zf)
+
+        # Whole-file overrides become blobs; patches are small and stay in the state.
+        custom_files = state.get("custom_files", None) or {}
+        for rel, content in custom_files.items():
+            if isinstance(content, str):
+                manifest["overrides"][str(rel)] = blobs.add_bytes(content.encode("utf-8"))
+        patches = {rel: c for rel, c in custom_files.items() if not isinstance(c, str)}
+        if patches:
+            state["custom_files"] = patches
+        else:
+            state.pop("custom_files", None)
+
+        for section in ("project", "top"):
+            dut = str((state.get(section, {}) or {}).get("dut_path") or "").strip()
+            if not dut or dut in manifest["sources"]:
+                continue
+            try:
+                digest = blobs.add_file(Path(dut))
+            except OSError as exc:
+                warnings.append(f"DUT not bundled: {dut} ({exc.strerror or exc})")
+                continue
+            manifest["sources"][dut] = {"name": Path(dut).name, "digest": digest}
+            if digest not in manifest["parse_cache"]:
+                try:
+                    manifest["parse_cache"][digest] = extract_module_info_cached(dut)
+                except OSError:
+                    pass
+
+        template_dir = str((state.get("project", {}) or {}).get("template_dir") or "").strip()
+        if template_dir and Path(template_dir).is_dir():
+            for tpl in sorted(Path(template_dir).rglob("*" + TEMPLATE_SUFFIX)):
+                rel = tpl.relative_to(template_dir).as_posix()
+                manifest["templates"][rel] = blobs.add_file(tpl)
+
+        manifest["state"] = state
+        zf.writestr("bundle.json", json.dumps(manifest, indent=1, default=str))
+    return blobs, warnings
+
+
+def pack_bundle(state: dict, dest: str | Path | BinaryIO) -> BundleSummary:
+    """Write ``state`` with its overrides, DUT sources, templates and DUT parses into one zip."""
+    if isinstance(dest, (str, Path)):
+        dest_path = Path(dest)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", delete=False, dir=str(dest_path.parent)) as tmp:
+            tmp_path = Path(tmp.name)
+            try:
+                blobs, warnings = _write_bundle(tmp, state)
+            except BaseException:
+                tmp.close()
+                tmp_path.unlink(missing_ok=True)
+                raise
+        tmp_path.replace(dest_path)
+    else:
+        blobs, warnings = _write_bundle(dest, state)
+        dest_path = Path(getattr(dest, "name", "<stream>"))
+    return BundleSummary(dest_path, len(blobs.seen), blobs.deduplicated, blobs.bytes, tuple(warnings))
+
+
+def _extract_blob(zf: zipfile.ZipFile, digest: str, target: Path) -> None:
+    if not _DIGEST.match(digest):
+        raise ValueError(f"Bad blob reference {digest!r}")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    h = hashlib.sha256()
+    with zf.open(f"blobs/{digest}") as src, tempfile.NamedTemporaryFile(
+        "wb", delete=False, dir=str(target.parent)
+    ) as tmp:
+        tmp_path = Path(tmp.name)
+        try:
+            for chunk in iter(lambda: src.read(_CHUNK), b""):
+                h.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+    if h.hexdigest() != digest:
+        tmp_path.unlink(missing_ok=True)
+        raise ValueError(f"Blob {digest[:12]} is corrupt")
+    tmp_path.replace(target)
+
+
+def _read_blob_text(zf: zipfile.ZipFile, digest: str) -> str:
+    if not _DIGEST.match(digest):
+        raise ValueError(f"Bad blob reference {digest!r}")
+    data = zf.read(f"blobs/{digest}")
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Blob {digest[:12]} is corrupt")
+    return data.decode("utf-8")
+
+
+def unpack_bundle(src: str | Path | BinaryIO, dest_dir: str | Path) -> dict:
+    """Unpack a bundle into ``dest_dir`` and return its state, rewritten to the unpacked paths.
+
+    DUT sources go to ``sources/``, templates to ``templates/``, generated
+    output defaults to ``out/``, and the state is saved as
+    ``project.tbproj``. The bundled DUT parses are primed into the parse
+    cache, so nothing is re-parsed when the project is opened.
+    """
+    dest = Path(dest_dir)
+    dest.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(src) as zf:
+        manifest = json.loads(zf.read("bundle.json").decode("utf-8"))
+        if not isinstance(manifest, dict) or manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError("Not a testbench bundle")
+        if int(manifest.get("version", 0)) > BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Bundle format {manifest.get('version')} is newer than this generator supports")
+        state = manifest.get("state")
+        if not isinstance(state, dict):
+            raise ValueError("Bundle has no state")
+
+        placed: dict[str, Path] = {}  # digest -> extracted path
+        names: dict[str, str] = {}  # file name -> digest already using it
+        remap: dict[str, str] = {}
+        for original, ref in (manifest.get("sources") or {}).items():
+            digest = str(ref.get("digest", ""))
+            target = placed.get(digest)
+            if target is None:
+                name = Path(str(ref.get("name") or "dut.sv")).name
+                clash = names.get(name)
+                target = dest / "sources" / (name if clash in (None, digest) else f"{digest[:12]}-{name}")
+                names.setdefault(name, digest)
+                _extract_blob(zf, digest, target)
+                info = (manifest.get("parse_cache") or {}).get(digest)
+                if isinstance(info, dict):
+                    prime_module_info(target, info)
+                placed[digest] = target
+            remap[original] = str(target)
+
+        templates = manifest.get("templates") or {}
+        for rel, digest in templates.items():
+            safe = _safe_rel_path(rel)
+            if safe is None:
+                continue
+            _extract_blob(zf, str(digest), dest / "templates" / safe)
+
+        overrides = {rel: _read_blob_text(zf, str(d)) for rel, d in (manifest.get("overrides") or {}).items()}
+
+    for section in ("project", "top"):
+        sec = state.get(section)
+        if isinstance(sec, dict) and sec.get("dut_path") in remap:
+            sec["dut_path"] = remap[sec["dut_path"]]
+    project = state.setdefault("project", {})
+    if isinstance(project, dict):
+        if templates:
+            project["template_dir"] = str(dest / "templates")
+        project["output_dir"] = str(dest / "out")
+    if overrides:
+        patches = state.get("custom_files")
+        state["custom_files"] = {**(patches if isinstance(patches, dict) else {}), **overrides}
+
+    save_project(dest / f"project{PROJECT_SUFFIX}", state)
+    return state
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+from typing import Iterable
+
+# Linux FICLONE ioctl; copy-on-write clone on btrfs/xfs.
+_FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    try:
+        import fcntl
+    except ImportError as exc:
+        raise OSError("reflink not supported on this platform") from exc
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            dst.unlink()
+            raise
+
+
+def _link_or_copy(src: Path, dst: Path, link: bool) -> None:
+    if link:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    try:
+        _reflink(src, dst)
+        return
+    except OSError:
+        pass
+    shutil.copyfile(src, dst)
+
+
+class ContentStore:
+    """Content-addressed store for generated files.
+
+    Blobs live under ``objects/`` keyed by SHA-256 and are kept read-only.
+    ``manifests/`` maps a state fingerprint to the list of
+    ``(path, digest, size, lines)`` it produced.
+
+    Outputs are private, writable copies (reflinked where the filesystem
+    can). With ``link=True`` they are hardlinks to the blobs instead: no
+    extra disk space, but read-only, and sharing an inode with the store.
+    """
+
+    def __init__(self, root: Path, *, link: bool = False) -> None:
+        self.root = Path(root)
+        self.link = link
+        self.objects = self.root / "objects"
+        self.manifests = self.root / "manifests"
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest[2:]
+
+    def put_chunks(self, chunks: Iterable[str]) -> tuple[str, int]:
+        self.objects.mkdir(parents=True, exist_ok=True)
+        h = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile("wb", delete=False, dir=str(self.objects)) as tmp:
+            for chunk in chunks:
+                data = chunk.encode("utf-8")
+                h.update(data)
+                tmp.write(data)
+                size += len(data)
+            tmp_path = Path(tmp.name)
+        digest = h.hexdigest()
+        dest = self.object_path(digest)
+        if dest.exists():
+            tmp_path.unlink()
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(tmp_path, 0o444)
+            tmp_path.replace(dest)
+        return digest, size
+
+    def materialize(self, digest: str, size: int, dest: Path) -> bool:
+        """Copy (or with ``link``, hardlink) blob ``digest`` to ``dest``; False if the blob is missing or damaged."""
+        obj = self.object_path(digest)
+        try:
+            st = obj.stat()
+        except OSError:
+            return False
+        if st.st_size != size:
+            obj.unlink(missing_ok=True)
+            return False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if self.link and self.is_linked(dest, digest):
+            return True
+        tmp = dest.with_name(f".{dest.name}.tbgen-tmp")
+        tmp.unlink(missing_ok=True)
+        _link_or_copy(obj, tmp, self.link)
+        tmp.replace(dest)
+        return True
+
+    def is_linked(self, path: Path, digest: str) -> bool:
+        """True if ``path`` is a hardlink to blob ``digest``."""
+        try:
+            return os.path.samefile(path, self.object_path(digest))
+        except OSError:
+            return False
+
+    def _manifest_path(self, fingerprint: str) -> Path:
+        return self.manifests / f"{fingerprint}.json"
+
+    def load_manifest(self, fingerprint: str) -> dict | None:
+        try:
+            data = json.loads(self._manifest_path(fingerprint).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("files"), list):
+            return None
+        return data
+
+    def save_manifest(
+        self, fingerprint: str, files: list[tuple[str, str, int, int]], warnings: Iterable[str]
+    ) -> None:
+        self.manifests.mkdir(parents=True, exist_ok=True)
+        payload = {"files": [list(f) for f in files], "warnings": list(warnings)}
+        with tempfile.NamedTemporaryFile(
+            "w", delete=False, encoding="utf-8", dir=str(self.manifests), suffix=".tmp"
+        ) as tmp:
+            json.dump(payload, tmp)
+            tmp_path = Path(tmp.name)
+        tmp_path.replace(self._manifest_path(fingerprint))
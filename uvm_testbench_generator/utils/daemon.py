@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import nullcontext
+import ipaddress
+import json
+import os
+from pathlib import Path
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from typing import Any, Callable
+
+from .. import __version__
+from .generator import generate_project, render_preview, state_fingerprint, validate_state
+from .synthesis import fill_dut_info
+from .verilog_parser import extract_module_info_cached
+
+DAEMON_ADDRESS_ENV = "TBGEN_DAEMON"
+
+# JSON-RPC 2.0 error codes.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+# State paths a client means relative to its own directory, not the daemon's.
+PATH_KEYS = (("project", "dut_path"), ("project", "output_dir"), ("project", "template_dir"), ("top", "dut_path"))
+# Only these do generator work; the rest must answer even when all workers are busy.
+_THROTTLED = frozenset({"preview", "generate"})
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def default_address() -> str:
+    env = os.environ.get(DAEMON_ADDRESS_ENV, "").strip()
+    if env:
+        return env
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return str(Path(runtime) / f"tbgen-{uid}.sock")
+
+
+def _parse_address(address: str) -> tuple[str, Any]:
+    """``unix:/path``, a filesystem path, or ``host:port`` (``tcp:`` prefix optional)."""
+    if address.startswith("unix:"):
+        return "unix", address[5:]
+    if address.startswith("tcp:"):
+        address = address[4:]
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return "tcp", (host or "127.0.0.1", int(port))
+    return "unix", address
+
+
+def _require_loopback(host: str, port: int) -> None:
+    """Refuse to listen beyond this machine: the daemon has no authentication."""
+    try:
+        infos = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)
+    except socket.gaierror as exc:
+        raise OSError(f"cannot resolve {host!r}: {exc}") from exc
+    for info in infos:
+        if not ipaddress.ip_address(info[4][0]).is_loopback:
+            raise OSError(f"refusing to listen on {host!r}: the daemon only accepts loopback addresses (127.0.0.1, localhost)")
+
+
+def _params(params: Any, *required: str) -> dict:
+    if params is None:
+        params = {}
+    if not isinstance(params, dict):
+        raise RpcError(INVALID_PARAMS, "params must be an object")
+    missing = [k for k in required if k not in params]
+    if missing:
+        raise RpcError(INVALID_PARAMS, f"missing params: {', '.join(missing)}")
+    return params
+
+
+def absolute_paths(params: dict, base: str | Path | None = None) -> dict:
+    """``params`` with relative paths made absolute against ``base`` (default: the cwd).
+
+    Covers ``path``, ``output_dir``, ``cache_dir`` and the state's
+    ``PATH_KEYS``; clients call it before sending, since the daemon rejects
+    relative paths.
+    """
+    base = Path(base or os.getcwd())
+
+    def absolute(value: Any) -> Any:
+        text = str(value or "").strip()
+        return str(base / Path(text).expanduser()) if text else value
+
+    params = dict(params)
+    for key in ("path", "output_dir", "cache_dir"):
+        if key in params:
+            params[key] = absolute(params[key])
+    if isinstance(params.get("state"), dict):
+        state = dict(params["state"])
+        for section, key in PATH_KEYS:
+            if isinstance(state.get(section), dict) and key in state[section]:
+                state[section] = {**state[section], key: absolute(state[section][key])}
+        params["state"] = state
+    return params
+
+
+def _require_absolute(name: str, value: Any) -> None:
+    text = str(value or "").strip()
+    if text and not Path(text).expanduser().is_absolute():
+        raise RpcError(INVALID_PARAMS, f"{name} must be an absolute path (the daemon's cwd is not the client's): {text!r}")
+
+
+def _state_param(params: dict) -> dict:
+    state = params["state"]
+    if not isinstance(state, dict):
+        raise RpcError(INVALID_PARAMS, "state must be an object")
+    for section, key in PATH_KEYS:
+        block = state.get(section)
+        if isinstance(block, dict):
+            _require_absolute(f"{section}.{key}", block.get(key))
+    return state
+
+
+class GeneratorService:
+    """The daemon's methods, independent of the transport.
+
+    Keeps DUT parses (keyed by path, mtime and size) and rendered previews
+    (keyed by ``state_fingerprint``) warm across requests, and limits how many
+    requests do generator work at once.
+    """
+
+    def __init__(self, *, workers: int | None = None, cache_dir: str | None = None, preview_cache: int = 64) -> None:
+        self.cache_dir = cache_dir
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._preview: OrderedDict[str, str] = OrderedDict()
+        self._preview_max = preview_cache
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._stats: dict[str, dict[str, float]] = {}
+        self._preview_hits = 0
+        self.methods: dict[str, Callable[[dict], Any]] = {
+            "ping": self.ping,
+            "stats": self.stats,
+            "parse": self.parse,
+            "validate": self.validate,
+            "preview": self.preview,
+            "generate": self.generate,
+        }
+
+    def ping(self, params: dict) -> dict:
+        return {"version": __version__, "pid": os.getpid()}
+
+    def stats(self, params: dict) -> dict:
+        with self._lock:
+            methods = {
+                name: {"calls": int(s["calls"]), "errors": int(s["errors"]), "total_ms": round(s["seconds"] * 1000, 3)}
+                for name, s in self._stats.items()
+            }
+            return {
+                "uptime_s": round(time.time() - self._started, 3),
+                "workers": self.workers,
+                "preview_cache": {"entries": len(self._preview), "hits": self._preview_hits},
+                "methods": methods,
+            }
+
+    def parse(self, params: dict) -> dict:
+        params = _params(params, "path")
+        _require_absolute("path", params["path"])
+        return extract_module_info_cached(str(params["path"]))
+
+    def validate(self, params: dict) -> dict:
+        params = _params(params, "state")
+        state = _state_param(params)
+        fill_dut_info(state)
+        return {"errors": validate_state(state, require_output_dir=bool(params.get("require_output_dir", True)))}
+
+    def preview(self, params: dict) -> dict:
+        params = _params(params, "state")
+        state = _state_param(params)
+        fill_dut_info(state)
+        key = state_fingerprint(state)
+        with self._lock:
+            text = self._preview.get(key)
+            if text is not None:
+                self._preview.move_to_end(key)
+                self._preview_hits += 1
+                return {"text": text, "cached": True}
+        text = render_preview(state)
+        with self._lock:
+            self._preview[key] = text
+            while len(self._preview) > self._preview_max:
+                self._preview.popitem(last=False)
+        return {"text": text, "cached": False}
+
+    def generate(self, params: dict) -> dict:
+        params = _params(params, "state")
+        state = _state_param(params)
+        _require_absolute("output_dir", params.get("output_dir"))
+        _require_absolute("cache_dir", params.get("cache_dir"))
+        if params.get("output_dir"):
+            state["project"] = {**(state.get("project") or {}), "output_dir": str(params["output_dir"])}
+        fill_dut_info(state)
+        errors = validate_state(state)
+        if errors:
+            raise RpcError(INVALID_PARAMS, "; ".join(errors))
+        result = generate_project(
+            state,
+            cache_dir=params.get("cache_dir") or self.cache_dir,
+            manifest_metrics=bool(params.get("manifest_metrics", False)),
+        )
+        return result.to_dict()
+
+    def _record(self, method: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            s = self._stats.setdefault(method, {"calls": 0, "errors": 0, "seconds": 0.0})
+            s["calls"] += 1
+            s["seconds"] += seconds
+            if not ok:
+                s["errors"] += 1
+
+    def dispatch(self, request: Any) -> dict | None:
+        """Handle one decoded JSON-RPC request; returns None for notifications."""
+        req_id = request.get("id") if isinstance(request, dict) else None
+        t_queued = time.perf_counter()
+        try:
+            if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or not isinstance(request.get("method"), str):
+                raise RpcError(INVALID_REQUEST, "invalid request")
+            method = request["method"]
+            handler = self.methods.get(method)
+            if handler is None:
+                raise RpcError(METHOD_NOT_FOUND, f"unknown method {method!r}")
+            with self._slots if method in _THROTTLED else nullcontext():
+                t_start = time.perf_counter()
+                try:
+                    result = handler(request.get("params"))
+                except Exception:
+                    self._record(method, time.perf_counter() - t_start, False)
+                    raise
+            t_end = time.perf_counter()
+            self._record(method, t_end - t_start, True)
+            response: dict = {"jsonrpc": "2.0", "id": req_id, "result": result}
+            response["timing"] = {
+                "queue_ms": round((t_start - t_queued) * 1000, 3),
+                "run_ms": round((t_end - t_start) * 1000, 3),
+            }
+        except RpcError as exc:
+            response = {"jsonrpc": "2.0", "id": req_id, "error": {"code": exc.code, "message": exc.message}}
+        except Exception as exc:
+            response = {
+                "jsonrpc": "2.0",
+                "id": req_id,
+                "error": {"code": SERVER_ERROR, "message": f"{type(exc).__name__}: {exc}"},
+            }
+        if isinstance(request, dict) and "id" not in request:
+            return None
+        return response
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # One connection may carry any number of newline-delimited requests.
+    def handle(self) -> None:
+        service: GeneratorService = self.server.service  # type: ignore[attr-defined]
+        for raw in self.rfile:
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as exc:
+                response: dict | None = {
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {"code": PARSE_ERROR, "message": f"parse error: {exc}"},
+                }
+            else:
+                if isinstance(request, dict) and request.get("method") == "shutdown":
+                    self.wfile.write((json.dumps({"jsonrpc": "2.0", "id": request.get("id"), "result": True}) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+                response = service.dispatch(request)
+            if response is not None:
+                self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def _remove_stale_socket(path: str) -> None:
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise OSError(f"another daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def serve(
+    address: str | None = None,
+    *,
+    workers: int | None = None,
+    cache_dir: str | None = None,
+    log: Callable[[str], None] | None = None,
+) -> None:
+    """Serve JSON-RPC on ``address`` until a ``shutdown`` request or Ctrl-C.
+
+    TCP addresses must be loopback; raises OSError for anything else.
+    """
+    address = address or default_address()
+    kind, target = _parse_address(address)
+    if kind == "tcp":
+        _require_loopback(*target)
+    service = GeneratorService(workers=workers, cache_dir=cache_dir)
+    if kind == "unix":
+        if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+            raise OSError("Unix sockets are not available here; listen on host:port instead")
+        _remove_stale_socket(target)
+        server: socketserver.BaseServer = _UnixServer(target, _Handler)
+        os.chmod(target, 0o600)
+    else:
+        server = _TCPServer(target, _Handler)
+    server.service = service  # type: ignore[attr-defined]
+    if log is not None:
+        log(f"tbgen daemon {__version__} listening on {address}, workers={service.workers}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if kind == "unix":
+            try:
+                os.unlink(target)
+            except OSError:
+                pass
+
+
+class Client:
+    """Keeps one connection to the daemon open for any number of calls."""
+
+    def __init__(self, address: str | None = None, *, timeout: float | None = None) -> None:
+        kind, target = _parse_address(address or default_address())
+        family = socket.AF_UNIX if kind == "unix" else socket.AF_INET
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(target)
+        self._rfile = self._sock.makefile("rb")
+        self._next_id = 0
+
+    def call(self, method: str, params: dict | None = None) -> Any:
+        self._next_id += 1
+        request = {"jsonrpc": "2.0", "id": self._next_id, "method": method}
+        if params is not None:
+            request["params"] = params
+        self._sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        line = self._rfile.readline()
+        if not line:
+            raise ConnectionError("daemon closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            err = response["error"]
+            raise RpcError(err.get("code", SERVER_ERROR), err.get("message", "error"))
+        return response["result"]
+
+    def close(self) -> None:
+        self._rfile.close()
+        self._sock.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def call(method: str, params: dict | None = None, *, address: str | None = None, timeout: float | None = None) -> Any:
+    with Client(address, timeout=timeout) as client:
+        return client.call(method, params)
+
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import io
+import os
+from pathlib import Path
+import sys
+import tarfile
+import tempfile
+import time
+from typing import BinaryIO, Iterable
+import zipfile
+
+from .generator import GenerationResult, _safe_name, iter_files, validate_state
+from .metrics import MetricsRecorder
+
+ARCHIVE_FORMATS = ("tar.gz", "zip")
+
+
+def archive_format_for(dest: str | Path) -> str:
+    name = str(dest).lower()
+    if name.endswith(".zip"):
+        return "zip"
+    if name.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    raise ValueError(f"Cannot infer archive format from {str(dest)!r}; use .tar.gz, .tgz or .zip.")
+
+
+def _write_tar(
+    out: BinaryIO, files: Iterable[tuple[Path, Iterable[str]]], prefix: str, recorder: MetricsRecorder
+) -> list[Path]:
+    members: list[Path] = []
+    mtime = int(os.environ.get("SOURCE_DATE_EPOCH") or time.time())
+    # "w|gz" is the pure streaming mode: no seeks, so stdout and pipes work.
+    with tarfile.open(fileobj=out, mode="w|gz") as tar:
+        for rel_path, chunks in files:
+            t0 = time.perf_counter()
+            # tar headers need the size up front, so only this file is buffered.
+            data = "".join(chunks).encode("utf-8")
+            info = tarfile.TarInfo(f"{prefix}/{rel_path.as_posix()}")
+            info.size = len(data)
+            info.mtime = mtime
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(data))
+            recorder.add_elapsed(rel_path, time.perf_counter() - t0)
+            members.append(Path(info.name))
+    return members
+
+
+def _write_zip(
+    out: BinaryIO, files: Iterable[tuple[Path, Iterable[str]]], prefix: str, recorder: MetricsRecorder
+) -> list[Path]:
+    members: list[Path] = []
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    date_time = time.gmtime(int(epoch))[:6] if epoch else time.localtime()[:6]
+    # ZipFile falls back to data descriptors on unseekable streams.
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for rel_path, chunks in files:
+            t0 = time.perf_counter()
+            info = zipfile.ZipInfo(f"{prefix}/{rel_path.as_posix()}", date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            with zf.open(info, "w") as member:
+                for chunk in chunks:
+                    member.write(chunk.encode("utf-8"))
+            recorder.add_elapsed(rel_path, time.perf_counter() - t0)
+            members.append(Path(info.filename))
+    return members
+
+
+def export_archive(state: dict, dest: str | Path | BinaryIO, fmt: str | None = None) -> GenerationResult:
+    """Stream the generated project straight into a ``.tar.gz`` or ``.zip``.
+
+    ``dest`` is a path, ``"-"`` for stdout, or a writable binary stream. Members
+    are placed under ``<project_name>/`` exactly as ``generate_project`` would
+    lay them out on disk; no intermediate tree is written.
+    """
+    errors = validate_state(state, require_output_dir=False)
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    to_stdout = isinstance(dest, (str, Path)) and str(dest) == "-"
+    if fmt is None:
+        if not isinstance(dest, (str, Path)) or to_stdout:
+            raise ValueError("Archive format is required when writing to a stream.")
+        fmt = archive_format_for(dest)
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format {fmt!r}; expected one of {', '.join(ARCHIVE_FORMATS)}.")
+    writer = _write_zip if fmt == "zip" else _write_tar
+
+    project = state.get("project", {}) or {}
+    prefix = _safe_name(project.get("project_name", "testbench"), "testbench")
+    recorder = MetricsRecorder()
+    warnings: list[str] = []
+    files = iter_files(state, warnings, recorder)
+
+    if to_stdout:
+        members = writer(sys.stdout.buffer, files, prefix, recorder)
+        sys.stdout.buffer.flush()
+        output_root = Path("-")
+    elif isinstance(dest, (str, Path)):
+        output_root = Path(dest)
+        output_root.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", delete=False, dir=str(output_root.parent)) as tmp:
+            tmp_path = Path(tmp.name)
+            try:
+                members = writer(tmp, files, prefix, recorder)
+            except BaseException:
+                tmp.close()
+                tmp_path.unlink(missing_ok=True)
+                raise
+        tmp_path.replace(output_root)
+    else:
+        members = writer(dest, files, prefix, recorder)
+        output_root = Path(getattr(dest, "name", "<stream>"))
+
+    return GenerationResult(
+        output_root=output_root,
+        files_written=tuple(members),
+        warnings=tuple(warnings),
+        metrics=recorder.result(),
+    )
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+from contextlib import nullcontext
 from dataclasses import dataclass
+import filecmp
+import hashlib
 import json
 import re
 from pathlib import Path
 import tempfile
-from typing import Iterable
+import time
+from typing import Callable, Iterable, Iterator
+
+from .. import __version__
+from .cache import ContentStore
+from .metrics import GenerationMetrics, MetricsRecorder
+from .overrides import apply_override, is_patch
+from .renderers import RendererSpec, registry
+from .schema import DEFAULTS
+from .templates import TEMPLATE_SUFFIX, ContextValue, TemplateError, find_template, template_dirs
 
 
 @dataclass(frozen=True)
@@ -13,6 +25,36 @@ class GenerationResult:
     output_root: Path
     files_written: tuple[Path, ...]
     warnings: tuple[str, ...] = ()
+    cache_hit: bool = False
+    metrics: GenerationMetrics | None = None
+    files_unchanged: tuple[Path, ...] = ()
+
+    def to_dict(self) -> dict:
+        return {
+            "output_root": str(self.output_root),
+            "files_written": [str(p) for p in self.files_written],
+            "warnings": list(self.warnings),
+            "cache_hit": self.cache_hit,
+            "files_unchanged": [str(p) for p in self.files_unchanged],
+            "metrics": self.metrics.to_dict() if self.metrics is not None else None,
+        }
+
+
+# Every generated tree carries the state it was generated from, so it can be
+# regenerated later without the GUI (see utils.regen).
+STATE_SNAPSHOT = Path(".tbgen") / "state.json"
+
+
+def _portable_state(state: dict) -> dict:
+    """``state`` without ``project.output_dir``, which says where a tree goes, not what is in it."""
+    project = state.get("project")
+    if not isinstance(project, dict) or "output_dir" not in project:
+        return state
+    return {**state, "project": {k: v for k, v in project.items() if k != "output_dir"}}
+
+
+def state_hash(state: dict) -> str:
+    return hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode("utf-8")).hexdigest()
 
 
 def _safe_name(value: str, fallback: str) -> str:
@@ -39,13 +81,13 @@ def _safe_rel_path(value: str) -> Path | None:
     return p
 
 
-def validate_state(state: dict) -> list[str]:
+def validate_state(state: dict, *, require_output_dir: bool = True) -> list[str]:
     errors: list[str] = []
     project = state.get("project", {}) or {}
 
     if not (project.get("project_name") or "").strip():
         errors.append("Project Name is required.")
-    if not (project.get("output_dir") or "").strip():
+    if require_output_dir and not (project.get("output_dir") or "").strip():
         errors.append("Output Directory is required.")
 
     if "interface" not in state:
@@ -123,7 +165,7 @@ def _extract_module_ports_from_file(path: Path, module_name: str) -> list[str]:
     return out
 
 
-def _render_interface(state: dict) -> str:
+def _render_interface(state: dict) -> Iterator[str]:
     interface = state.get("interface", {}) or {}
     name = _safe_name(interface.get("name", "my_if"), "my_if")
     clk = (interface.get("clock") or "").strip()
@@ -137,28 +179,28 @@ def _render_interface(state: dict) -> str:
     ports = ", ".join(header_ports)
     port_clause = f"({ports})" if ports else ""
 
-    lines: list[str] = [f"interface {name}{port_clause};", ""]
+    yield f"interface {name}{port_clause};"
+    yield ""
 
     for sig in interface.get("signals", []) or []:
-        direction = (sig.get("direction") or "input").strip()
+        direction = (sig.get("direction") or DEFAULTS["signal"]["direction"]).strip()
         sig_name = _safe_name(sig.get("name", ""), "sig")
-        vec = _vector_decl(sig.get("width", "1"))
-        lines.append(f"  {direction} logic {vec}{sig_name};")
+        vec = _vector_decl(sig.get("width", DEFAULTS["signal"]["width"]))
+        yield f"  {direction} logic {vec}{sig_name};"
 
     modports: dict = interface.get("modports", {}) or {}
     if modports:
-        lines.append("")
+        yield ""
         for mod_name, sigs in modports.items():
             mod_name_s = _safe_name(str(mod_name), "mp")
             entries = []
             for sig_name, access in (sigs or {}).items():
                 entries.append(f"    {access} {sig_name}")
             joined = ",\n".join(entries) if entries else ""
-            lines.append(f"  modport {mod_name_s} (\n{joined}\n  );")
+            yield f"  modport {mod_name_s} (\n{joined}\n  );"
 
-    lines.append("")
-    lines.append(f"endinterface : {name}")
-    return "\n".join(lines) + "\n"
+    yield ""
+    yield f"endinterface : {name}"
 
 
 def _field_macro(type_str: str) -> str:
@@ -172,63 +214,66 @@ def _field_macro(type_str: str) -> str:
     return "uvm_field_int"
 
 
-def _render_transaction(state: dict) -> str:
+def _render_transaction(state: dict) -> Iterator[str]:
     txn = state.get("transaction", {}) or {}
     class_name = _safe_name(txn.get("class_name", "txn_item"), "txn_item")
     base = _safe_name(txn.get("base_class", "uvm_sequence_item"), "uvm_sequence_item")
     fields = txn.get("fields", []) or []
     constraints = txn.get("constraints", []) or []
 
-    lines = [f"class {class_name} extends {base};", f"  `uvm_object_utils({class_name})", ""]
+    yield f"class {class_name} extends {base};"
+    yield f"  `uvm_object_utils({class_name})"
+    yield ""
     for f in fields:
-        rand = "rand " if bool(f.get("rand")) else ""
-        type_str = (f.get("type") or "bit").strip()
+        rand = "rand " if bool(f.get("rand", DEFAULTS["field"]["rand"])) else ""
+        type_str = (f.get("type") or DEFAULTS["field"]["type"]).strip()
         name = _safe_name(f.get("name", ""), "field")
-        lines.append(f"  {rand}{type_str} {name};")
+        yield f"  {rand}{type_str} {name};"
 
-    lines.append("")
+    yield ""
     for c in constraints:
         c_name = _safe_name(c.get("name", "c"), "c")
         body = (c.get("body") or "").strip().rstrip(";")
         if body:
-            lines.append(f"  constraint {c_name} {{ {body}; }}")
-
-    lines.append("")
-    lines.append(f"  function new(string name = \"{class_name}\");")
-    lines.append("    super.new(name);")
-    lines.append("  endfunction")
-    lines.append("")
-    lines.append(f"  `uvm_object_utils_begin({class_name})")
+            yield f"  constraint {c_name} {{ {body}; }}"
+
+    yield ""
+    yield f"  function new(string name = \"{class_name}\");"
+    yield "    super.new(name);"
+    yield "  endfunction"
+    yield ""
+    yield f"  `uvm_object_utils_begin({class_name})"
     for f in fields:
         name = _safe_name(f.get("name", ""), "field")
         macro = _field_macro(f.get("type", ""))
-        lines.append(f"    `{macro}({name}, UVM_ALL_ON)")
-    lines.append("  `uvm_object_utils_end")
-    lines.append("")
-    lines.append(f"endclass : {class_name}")
-    return "\n".join(lines) + "\n"
+        yield f"    `{macro}({name}, UVM_ALL_ON)"
+    yield "  `uvm_object_utils_end"
+    yield ""
+    yield f"endclass : {class_name}"
 
 
-def _render_sequence(state: dict) -> str:
+def _render_sequence(state: dict) -> Iterator[str]:
     seq = state.get("sequence", {}) or {}
     name = _safe_name(seq.get("name", "my_sequence"), "my_sequence")
     txn_class = _safe_name(seq.get("transaction_class", "txn_item"), "txn_item")
     steps = seq.get("steps", []) or []
 
-    lines = [f"class {name} extends uvm_sequence #({txn_class});", f"  `uvm_object_utils({name})", ""]
-    lines.append(f"  function new(string name = \"{name}\");")
-    lines.append("    super.new(name);")
-    lines.append("  endfunction")
-    lines.append("")
-    lines.append("  virtual task body();")
+    yield f"class {name} extends uvm_sequence #({txn_class});"
+    yield f"  `uvm_object_utils({name})"
+    yield ""
+    yield f"  function new(string name = \"{name}\");"
+    yield "    super.new(name);"
+    yield "  endfunction"
+    yield ""
+    yield "  virtual task body();"
 
     def render_step(step: dict, *, idx: int) -> list[str]:
         out: list[str] = []
         if not isinstance(step, dict):
             return out
 
-        delay = str(step.get("delay") or "0").strip()
-        repeat_raw = str(step.get("repeat") or "1").strip()
+        delay = str(step.get("delay") or DEFAULTS["step"]["delay"]).strip()
+        repeat_raw = str(step.get("repeat") or DEFAULTS["step"]["repeat"]).strip()
         try:
             repeat_n = int(repeat_raw)
         except Exception:
@@ -237,7 +282,7 @@ def _render_sequence(state: dict) -> str:
             repeat_n = 1
 
         item_name = _safe_name(step.get("item_name") or step.get("item") or f"tx_{idx}", f"tx_{idx}")
-        randomize = bool(step.get("randomize", True))
+        randomize = bool(step.get("randomize", DEFAULTS["step"]["randomize"]))
         assigns = step.get("assignments", {}) or {}
         assigns = assigns if isinstance(assigns, dict) else {}
 
@@ -288,150 +333,134 @@ def _render_sequence(state: dict) -> str:
         block = render_step(step, idx=idx)
         if not block:
             continue
-        lines.extend(block)
-        lines.append("")
+        yield from block
+        yield ""
 
-    lines.append("  endtask")
-    lines.append("")
-    lines.append(f"endclass : {name}")
-    return "\n".join(lines) + "\n"
+    yield "  endtask"
+    yield ""
+    yield f"endclass : {name}"
 
 
-def _render_agent_and_components(state: dict) -> dict[str, str]:
+def _render_agent_and_components(state: dict) -> dict[str, Iterable[str]]:
     agent_cfg = state.get("agent", {}) or {}
     txn = _safe_name(agent_cfg.get("transaction", "txn_item"), "txn_item")
     agent_name = _safe_name(agent_cfg.get("agent_name", "my_agent"), "my_agent")
-    is_active = (agent_cfg.get("type") or "active").strip() == "active"
+    is_active = (agent_cfg.get("type") or DEFAULTS["agent"]["type"]).strip() == "active"
     include = (agent_cfg.get("include_components") or {}) if isinstance(agent_cfg.get("include_components"), dict) else {}
-    inc_seqr = bool(include.get("sequencer", True))
-    inc_drv = bool(include.get("driver", True))
-    inc_mon = bool(include.get("monitor", True))
+    inc_seqr = bool(include.get("sequencer", DEFAULTS["agent.components"]["sequencer"]))
+    inc_drv = bool(include.get("driver", DEFAULTS["agent.components"]["driver"]))
+    inc_mon = bool(include.get("monitor", DEFAULTS["agent.components"]["monitor"]))
 
     # Allow user-edited code to win if enabled
     agent_code = state.get("agent_code", {}) or {}
-    use_custom = bool(agent_cfg.get("use_custom_code", False))
-    out: dict[str, str] = {}
+    use_custom = bool(agent_cfg.get("use_custom_code", DEFAULTS["agent"]["use_custom_code"]))
+    out: dict[str, Iterable[str]] = {}
     if use_custom and isinstance(agent_code, dict) and agent_code:
         for k, v in agent_code.items():
             if isinstance(v, str) and v.strip():
-                out[f"{k}.sv"] = v.strip() + "\n"
+                out[f"{k}.sv"] = (v.strip(),)
         if out:
             return out
 
-    agent_lines = [f"class {agent_name} extends uvm_agent;", f"  `uvm_component_utils({agent_name})", ""]
-    if inc_seqr:
-        agent_lines.append(f"  uvm_sequencer #({txn}) seqr;")
-    if inc_drv:
-        agent_lines.append(f"  uvm_driver #({txn}) drv;")
-    if inc_mon:
-        agent_lines.append(f"  {agent_name}_monitor mon;")
-    agent_lines.append("")
-    agent_lines.append("  function new(string name, uvm_component parent);")
-    agent_lines.append("    super.new(name, parent);")
-    agent_lines.append("  endfunction")
-    agent_lines.append("")
-    agent_lines.append("  function void build_phase(uvm_phase phase);")
-    agent_lines.append("    super.build_phase(phase);")
-    if is_active:
+    def render_agent() -> Iterator[str]:
+        yield f"class {agent_name} extends uvm_agent;"
+        yield f"  `uvm_component_utils({agent_name})"
+        yield ""
         if inc_seqr:
-            agent_lines.append(
-                f"    seqr = uvm_sequencer #({txn})::type_id::create(\"seqr\", this);"
-            )
+            yield f"  uvm_sequencer #({txn}) seqr;"
         if inc_drv:
-            agent_lines.append(
-                f"    drv = uvm_driver #({txn})::type_id::create(\"drv\", this);"
-            )
-    if inc_mon:
-        agent_lines.append(f"    mon = {agent_name}_monitor::type_id::create(\"mon\", this);")
-    agent_lines.append("  endfunction")
-    agent_lines.append("")
-    agent_lines.append("  function void connect_phase(uvm_phase phase);")
-    agent_lines.append("    super.connect_phase(phase);")
-    if inc_seqr and inc_drv:
-        agent_lines.append("    if (seqr != null && drv != null) drv.seq_item_port.connect(seqr.seq_item_export);")
-    agent_lines.append("  endfunction")
-    agent_lines.append("")
-    agent_lines.append(f"endclass : {agent_name}")
-
-    out["agent.sv"] = "\n".join(agent_lines) + "\n"
+            yield f"  uvm_driver #({txn}) drv;"
+        if inc_mon:
+            yield f"  {agent_name}_monitor mon;"
+        yield ""
+        yield "  function new(string name, uvm_component parent);"
+        yield "    super.new(name, parent);"
+        yield "  endfunction"
+        yield ""
+        yield "  function void build_phase(uvm_phase phase);"
+        yield "    super.build_phase(phase);"
+        if is_active:
+            if inc_seqr:
+                yield f"    seqr = uvm_sequencer #({txn})::type_id::create(\"seqr\", this);"
+            if inc_drv:
+                yield f"    drv = uvm_driver #({txn})::type_id::create(\"drv\", this);"
+        if inc_mon:
+            yield f"    mon = {agent_name}_monitor::type_id::create(\"mon\", this);"
+        yield "  endfunction"
+        yield ""
+        yield "  function void connect_phase(uvm_phase phase);"
+        yield "    super.connect_phase(phase);"
+        if inc_seqr and inc_drv:
+            yield "    if (seqr != null && drv != null) drv.seq_item_port.connect(seqr.seq_item_export);"
+        yield "  endfunction"
+        yield ""
+        yield f"endclass : {agent_name}"
+
+    out["agent.sv"] = render_agent()
 
     if inc_drv:
         drv_name = f"{agent_name}_driver"
-        out["driver.sv"] = (
-            "\n".join(
-                [
-                    f"class {drv_name} extends uvm_driver #({txn});",
-                    f"  `uvm_component_utils({drv_name})",
-                    "",
-                    "  function new(string name, uvm_component parent);",
-                    "    super.new(name, parent);",
-                    "  endfunction",
-                    "",
-                    "  task run_phase(uvm_phase phase);",
-                    "    super.run_phase(phase);",
-                    "    // Drive logic here",
-                    "  endtask",
-                    "",
-                    f"endclass : {drv_name}",
-                    "",
-                ]
-            )
-        )
+        out["driver.sv"] = [
+            f"class {drv_name} extends uvm_driver #({txn});",
+            f"  `uvm_component_utils({drv_name})",
+            "",
+            "  function new(string name, uvm_component parent);",
+            "    super.new(name, parent);",
+            "  endfunction",
+            "",
+            "  task run_phase(uvm_phase phase);",
+            "    super.run_phase(phase);",
+            "    // Drive logic here",
+            "  endtask",
+            "",
+            f"endclass : {drv_name}",
+        ]
 
     if inc_mon:
         mon_name = f"{agent_name}_monitor"
-        out["monitor.sv"] = (
-            "\n".join(
-                [
-                    f"class {mon_name} extends uvm_monitor;",
-                    f"  `uvm_component_utils({mon_name})",
-                    "",
-                    f"  uvm_analysis_port #({txn}) ap;",
-                    "",
-                    "  function new(string name, uvm_component parent);",
-                    "    super.new(name, parent);",
-                    "    ap = new(\"ap\", this);",
-                    "  endfunction",
-                    "",
-                    "  task run_phase(uvm_phase phase);",
-                    "    super.run_phase(phase);",
-                    f"    // Sample bus and publish {txn} on ap",
-                    "  endtask",
-                    "",
-                    f"endclass : {mon_name}",
-                    "",
-                ]
-            )
-        )
+        out["monitor.sv"] = [
+            f"class {mon_name} extends uvm_monitor;",
+            f"  `uvm_component_utils({mon_name})",
+            "",
+            f"  uvm_analysis_port #({txn}) ap;",
+            "",
+            "  function new(string name, uvm_component parent);",
+            "    super.new(name, parent);",
+            "    ap = new(\"ap\", this);",
+            "  endfunction",
+            "",
+            "  task run_phase(uvm_phase phase);",
+            "    super.run_phase(phase);",
+            f"    // Sample bus and publish {txn} on ap",
+            "  endtask",
+            "",
+            f"endclass : {mon_name}",
+        ]
 
     if inc_seqr:
         seqr_name = f"{agent_name}_sequencer"
-        out["sequencer.sv"] = (
-            "\n".join(
-                [
-                    f"class {seqr_name} extends uvm_sequencer #({txn});",
-                    f"  `uvm_component_utils({seqr_name})",
-                    "",
-                    "  function new(string name, uvm_component parent);",
-                    "    super.new(name, parent);",
-                    "  endfunction",
-                    "",
-                    f"endclass : {seqr_name}",
-                    "",
-                ]
-            )
-        )
+        out["sequencer.sv"] = [
+            f"class {seqr_name} extends uvm_sequencer #({txn});",
+            f"  `uvm_component_utils({seqr_name})",
+            "",
+            "  function new(string name, uvm_component parent);",
+            "    super.new(name, parent);",
+            "  endfunction",
+            "",
+            f"endclass : {seqr_name}",
+        ]
 
     return out
 
 
-def _render_scoreboard(state: dict) -> str:
+def _render_scoreboard(state: dict) -> Iterator[str]:
     sb = state.get("scoreboard", {}) or {}
     name = _safe_name(sb.get("name", "my_scoreboard"), "my_scoreboard")
     txn = _safe_name(sb.get("transaction", "txn_item"), "txn_item")
-    use_queue = bool(sb.get("use_expected_queue", sb.get("use_queue", True)))
-    use_cov = bool(sb.get("enable_coverage", sb.get("use_coverage", False)))
-    compare_mode = (sb.get("compare_mode") or "uvm_compare").strip()
+    defaults = DEFAULTS["scoreboard"]
+    use_queue = bool(sb.get("use_expected_queue", sb.get("use_queue", defaults["use_expected_queue"])))
+    use_cov = bool(sb.get("enable_coverage", sb.get("use_coverage", defaults["enable_coverage"])))
+    compare_mode = (sb.get("compare_mode") or defaults["compare_mode"]).strip()
     selected_fields = sb.get("fields", []) or []
     if not isinstance(selected_fields, list):
         selected_fields = []
@@ -458,109 +487,110 @@ def _render_scoreboard(state: dict) -> str:
             return False
         return True
 
-    lines = [f"class {name} extends uvm_component;", f"  `uvm_component_utils({name})", ""]
-    lines.append(f"  uvm_analysis_imp #({txn}, {name}) ap;")
+    yield f"class {name} extends uvm_component;"
+    yield f"  `uvm_component_utils({name})"
+    yield ""
+    yield f"  uvm_analysis_imp #({txn}, {name}) ap;"
     if use_queue:
-        lines.append(f"  {txn} expected_q[$];")
-    lines.append("  int unsigned pass_count;")
-    lines.append("  int unsigned fail_count;")
+        yield f"  {txn} expected_q[$];"
+    yield "  int unsigned pass_count;"
+    yield "  int unsigned fail_count;"
     if use_queue:
-        lines.append("  int unsigned expected_count;")
-    lines.append("")
+        yield "  int unsigned expected_count;"
+    yield ""
 
     cov_fields = [n for n in selected_fields if is_integral_type(txn_type_by_name.get(n, ""))] if use_cov else []
     if use_cov:
-        lines.append("  // Coverage (auto-generated)")
-        lines.append(f"  covergroup cg_t with function sample({txn} t);")
+        yield "  // Coverage (auto-generated)"
+        yield f"  covergroup cg_t with function sample({txn} t);"
         if cov_fields:
             for n in cov_fields:
                 safe_n = _safe_name(n, "sig")
-                lines.append(f"    coverpoint t.{safe_n};")
+                yield f"    coverpoint t.{safe_n};"
         else:
-            lines.append("    // No integral fields selected for coverage")
-        lines.append("  endgroup")
-        lines.append("")
-        lines.append("  cg_t cg;")
-        lines.append("")
-
-    lines.append("  function new(string name, uvm_component parent);")
-    lines.append("    super.new(name, parent);")
-    lines.append("    ap = new(\"ap\", this);")
+            yield "    // No integral fields selected for coverage"
+        yield "  endgroup"
+        yield ""
+        yield "  cg_t cg;"
+        yield ""
+
+    yield "  function new(string name, uvm_component parent);"
+    yield "    super.new(name, parent);"
+    yield "    ap = new(\"ap\", this);"
     if use_cov:
-        lines.append("    cg = new();")
-    lines.append("  endfunction")
-    lines.append("")
+        yield "    cg = new();"
+    yield "  endfunction"
+    yield ""
 
     if use_queue:
-        lines.append(f"  function void expect({txn} exp);")
-        lines.append("    expected_q.push_back(exp);")
-        lines.append("    expected_count++;")
-        lines.append("  endfunction")
-        lines.append("")
+        yield f"  function void expect({txn} exp);"
+        yield "    expected_q.push_back(exp);"
+        yield "    expected_count++;"
+        yield "  endfunction"
+        yield ""
 
-    lines.append(f"  function void write({txn} tx);")
+    yield f"  function void write({txn} tx);"
     if use_cov:
-        lines.append("    cg.sample(tx);")
-        lines.append("")
+        yield "    cg.sample(tx);"
+        yield ""
 
     if use_queue:
-        lines.append("    if (expected_q.size() == 0) begin")
-        lines.append("      `uvm_error(\"SB\", \"Received tx but expected_q is empty\")")
-        lines.append("      fail_count++;")
-        lines.append("      return;")
-        lines.append("    end")
-        lines.append("")
-        lines.append(f"    {txn} exp;")
-        lines.append("    exp = expected_q.pop_front();")
-        lines.append("")
+        yield "    if (expected_q.size() == 0) begin"
+        yield "      `uvm_error(\"SB\", \"Received tx but expected_q is empty\")"
+        yield "      fail_count++;"
+        yield "      return;"
+        yield "    end"
+        yield ""
+        yield f"    {txn} exp;"
+        yield "    exp = expected_q.pop_front();"
+        yield ""
 
         if compare_mode == "manual" and selected_fields:
-            lines.append("    bit ok = 1;")
+            yield "    bit ok = 1;"
             for field_name in selected_fields:
                 safe_n = _safe_name(field_name, "field")
-                lines.append(f"    if (tx.{safe_n} !== exp.{safe_n}) begin")
-                lines.append(
+                yield f"    if (tx.{safe_n} !== exp.{safe_n}) begin"
+                yield (
                     f"      `uvm_error(\"SB\", $sformatf(\"Mismatch {safe_n}: act=%0h exp=%0h\", tx.{safe_n}, exp.{safe_n}))"
                 )
-                lines.append("      ok = 0;")
-                lines.append("    end")
-            lines.append("    if (ok) pass_count++; else fail_count++;")
+                yield "      ok = 0;"
+                yield "    end"
+            yield "    if (ok) pass_count++; else fail_count++;"
         else:
-            lines.append("    uvm_comparer cmp = new();")
-            lines.append("    if (!tx.compare(exp, cmp)) begin")
-            lines.append("      `uvm_error(\"SB\", \"Transaction compare failed\")")
-            lines.append("      fail_count++;")
-            lines.append("    end else begin")
-            lines.append("      pass_count++;")
-            lines.append("    end")
+            yield "    uvm_comparer cmp = new();"
+            yield "    if (!tx.compare(exp, cmp)) begin"
+            yield "      `uvm_error(\"SB\", \"Transaction compare failed\")"
+            yield "      fail_count++;"
+            yield "    end else begin"
+            yield "      pass_count++;"
+            yield "    end"
     else:
-        lines.append("    // Add checks here (no expected queue)")
-        lines.append("    pass_count++;")
+        yield "    // Add checks here (no expected queue)"
+        yield "    pass_count++;"
 
-    lines.append("  endfunction")
-    lines.append("")
+    yield "  endfunction"
+    yield ""
 
-    lines.append("  function void report_phase(uvm_phase phase);")
-    lines.append("    super.report_phase(phase);")
+    yield "  function void report_phase(uvm_phase phase);"
+    yield "    super.report_phase(phase);"
     if use_queue:
-        lines.append(
+        yield (
             "    `uvm_info(\"SB\", $sformatf(\"pass=%0d fail=%0d expected_seen=%0d pending_expected=%0d\", pass_count, fail_count, expected_count, expected_q.size()), UVM_LOW)"
         )
     else:
-        lines.append(
+        yield (
             "    `uvm_info(\"SB\", $sformatf(\"pass=%0d fail=%0d\", pass_count, fail_count), UVM_LOW)"
         )
-    lines.append("  endfunction")
-    lines.append("")
-    lines.append(f"endclass : {name}")
-    return "\n".join(lines) + "\n"
+    yield "  endfunction"
+    yield ""
+    yield f"endclass : {name}"
 
 
-def _render_environment(state: dict) -> str:
+def _render_environment(state: dict) -> Iterator[str]:
     env = state.get("environment", {}) or {}
     name = _safe_name(env.get("name", "env"), "env")
-    include_agent = bool(env.get("include_agent", True))
-    include_sb = bool(env.get("include_scoreboard", True))
+    include_agent = bool(env.get("include_agent", DEFAULTS["environment"]["include_agent"]))
+    include_sb = bool(env.get("include_scoreboard", DEFAULTS["environment"]["include_scoreboard"]))
 
     agent_cfg = state.get("agent", {}) or {}
     agent_name = _safe_name(agent_cfg.get("agent_name", "my_agent"), "my_agent")
@@ -571,54 +601,56 @@ def _render_environment(state: dict) -> str:
     )
     has_monitor = True
     if isinstance(include_components, dict):
-        has_monitor = bool(include_components.get("monitor", True))
+        has_monitor = bool(include_components.get("monitor", DEFAULTS["agent.components"]["monitor"]))
 
     sb_cfg = state.get("scoreboard", {}) or {}
     sb_name = _safe_name(sb_cfg.get("name", "my_scoreboard"), "my_scoreboard")
 
-    lines = [f"class {name} extends uvm_env;", f"  `uvm_component_utils({name})", ""]
+    yield f"class {name} extends uvm_env;"
+    yield f"  `uvm_component_utils({name})"
+    yield ""
     if include_agent:
-        lines.append(f"  {agent_name} agent;")
+        yield f"  {agent_name} agent;"
     if include_sb:
-        lines.append(f"  {sb_name} sb;")
-    lines.append("")
-    lines.append("  function new(string name, uvm_component parent);")
-    lines.append("    super.new(name, parent);")
-    lines.append("  endfunction")
-    lines.append("")
-    lines.append("  function void build_phase(uvm_phase phase);")
-    lines.append("    super.build_phase(phase);")
+        yield f"  {sb_name} sb;"
+    yield ""
+    yield "  function new(string name, uvm_component parent);"
+    yield "    super.new(name, parent);"
+    yield "  endfunction"
+    yield ""
+    yield "  function void build_phase(uvm_phase phase);"
+    yield "    super.build_phase(phase);"
     if include_agent:
-        lines.append(f"    agent = {agent_name}::type_id::create(\"agent\", this);")
+        yield f"    agent = {agent_name}::type_id::create(\"agent\", this);"
     if include_sb:
-        lines.append(f"    sb = {sb_name}::type_id::create(\"sb\", this);")
-    lines.append("  endfunction")
-    lines.append("")
-    lines.append("  function void connect_phase(uvm_phase phase);")
-    lines.append("    super.connect_phase(phase);")
+        yield f"    sb = {sb_name}::type_id::create(\"sb\", this);"
+    yield "  endfunction"
+    yield ""
+    yield "  function void connect_phase(uvm_phase phase);"
+    yield "    super.connect_phase(phase);"
     if include_agent and include_sb:
         if has_monitor:
-            lines.append("    // Connect monitor analysis port to scoreboard")
-            lines.append("    agent.mon.ap.connect(sb.ap);")
+            yield "    // Connect monitor analysis port to scoreboard"
+            yield "    agent.mon.ap.connect(sb.ap);"
         else:
-            lines.append("    // Monitor disabled in agent; no auto-connect to scoreboard")
-    lines.append("  endfunction")
-    lines.append("")
-    lines.append(f"endclass : {name}")
-    return "\n".join(lines) + "\n"
+            yield "    // Monitor disabled in agent; no auto-connect to scoreboard"
+    yield "  endfunction"
+    yield ""
+    yield f"endclass : {name}"
 
 
-def _render_test(state: dict) -> str:
+def _render_test(state: dict) -> Iterator[str]:
     test = state.get("test", {}) or {}
     name = _safe_name(test.get("name", "base_test"), "base_test")
-    base = _safe_name(test.get("base_class", "uvm_test"), "uvm_test")
-    create_env = bool(test.get("create_env", True))
+    defaults = DEFAULTS["test"]
+    base = _safe_name(test.get("base_class", defaults["base_class"]), defaults["base_class"])
+    create_env = bool(test.get("create_env", defaults["create_env"]))
     env_name = _safe_name((state.get("environment", {}) or {}).get("name", "env"), "env")
 
-    start_sequence = bool(test.get("start_sequence", False))
+    start_sequence = bool(test.get("start_sequence", defaults["start_sequence"]))
     sequence_name = _safe_name(test.get("sequence_name", (state.get("sequence", {}) or {}).get("name", "my_sequence")), "my_sequence")
-    raise_objection = bool(test.get("raise_objection", True))
-    print_topology = bool(test.get("print_topology", False))
+    raise_objection = bool(test.get("raise_objection", defaults["raise_objection"]))
+    print_topology = bool(test.get("print_topology", defaults["print_topology"]))
 
     agent_cfg = state.get("agent", {}) or {}
     agent_name = _safe_name(agent_cfg.get("agent_name", "my_agent"), "my_agent")
@@ -629,60 +661,61 @@ def _render_test(state: dict) -> str:
     )
     has_sequencer = True
     if isinstance(include_components, dict):
-        has_sequencer = bool(include_components.get("sequencer", True))
+        has_sequencer = bool(include_components.get("sequencer", DEFAULTS["agent.components"]["sequencer"]))
 
     env_cfg = state.get("environment", {}) or {}
-    env_includes_agent = bool(env_cfg.get("include_agent", True))
+    env_includes_agent = bool(env_cfg.get("include_agent", DEFAULTS["environment"]["include_agent"]))
 
-    lines = [f"class {name} extends {base};", f"  `uvm_component_utils({name})", ""]
+    yield f"class {name} extends {base};"
+    yield f"  `uvm_component_utils({name})"
+    yield ""
     if create_env:
-        lines.append(f"  {env_name} env_h;")
-        lines.append("")
-    lines.append("  function new(string name, uvm_component parent);")
-    lines.append("    super.new(name, parent);")
-    lines.append("  endfunction")
-    lines.append("")
-    lines.append("  function void build_phase(uvm_phase phase);")
-    lines.append("    super.build_phase(phase);")
+        yield f"  {env_name} env_h;"
+        yield ""
+    yield "  function new(string name, uvm_component parent);"
+    yield "    super.new(name, parent);"
+    yield "  endfunction"
+    yield ""
+    yield "  function void build_phase(uvm_phase phase);"
+    yield "    super.build_phase(phase);"
     if create_env:
-        lines.append(f"    env_h = {env_name}::type_id::create(\"env_h\", this);")
-    lines.append("  endfunction")
-    lines.append("")
+        yield f"    env_h = {env_name}::type_id::create(\"env_h\", this);"
+    yield "  endfunction"
+    yield ""
 
     if print_topology:
-        lines.append("  function void end_of_elaboration_phase(uvm_phase phase);")
-        lines.append("    super.end_of_elaboration_phase(phase);")
-        lines.append("    uvm_top.print_topology();")
-        lines.append("  endfunction")
-        lines.append("")
+        yield "  function void end_of_elaboration_phase(uvm_phase phase);"
+        yield "    super.end_of_elaboration_phase(phase);"
+        yield "    uvm_top.print_topology();"
+        yield "  endfunction"
+        yield ""
 
-    lines.append("  task run_phase(uvm_phase phase);")
-    lines.append("    super.run_phase(phase);")
+    yield "  task run_phase(uvm_phase phase);"
+    yield "    super.run_phase(phase);"
 
     if start_sequence:
-        lines.append("")
+        yield ""
         if not create_env:
-            lines.append("    // NOTE: start_sequence enabled but create_env is disabled")
+            yield "    // NOTE: start_sequence enabled but create_env is disabled"
         elif not env_includes_agent:
-            lines.append("    // NOTE: environment does not include an agent; cannot start sequence")
+            yield "    // NOTE: environment does not include an agent; cannot start sequence"
         elif not has_sequencer:
-            lines.append("    // NOTE: agent sequencer disabled; cannot start sequence")
+            yield "    // NOTE: agent sequencer disabled; cannot start sequence"
         else:
             if raise_objection:
-                lines.append("    phase.raise_objection(this);")
-            lines.append(f"    {sequence_name} seq;")
-            lines.append(f"    seq = {sequence_name}::type_id::create(\"seq\");")
+                yield "    phase.raise_objection(this);"
+            yield f"    {sequence_name} seq;"
+            yield f"    seq = {sequence_name}::type_id::create(\"seq\");"
             # The generator agent uses handle name "seqr" if included.
-            lines.append("    seq.start(env_h.agent.seqr);")
+            yield "    seq.start(env_h.agent.seqr);"
             if raise_objection:
-                lines.append("    phase.drop_objection(this);")
-    lines.append("  endtask")
-    lines.append("")
-    lines.append(f"endclass : {name}")
-    return "\n".join(lines) + "\n"
+                yield "    phase.drop_objection(this);"
+    yield "  endtask"
+    yield ""
+    yield f"endclass : {name}"
 
 
-def _render_top(state: dict) -> str:
+def _render_top(state: dict) -> Iterator[str]:
     project = state.get("project", {}) or {}
     top = state.get("top", {}) or {}
     interface = state.get("interface", {}) or {}
@@ -727,113 +760,147 @@ def _render_top(state: dict) -> str:
 
     port_map = ",\n".join(conns)
 
-    lines: list[str] = []
-    lines.append("`timescale 1ns/1ps")
-    lines.append("")
-    lines.append("module " + top_name + ";")
-    lines.append("")
+    yield "`timescale 1ns/1ps"
+    yield ""
+    yield "module " + top_name + ";"
+    yield ""
     if clk:
-        lines.append(f"  logic {clk};")
+        yield f"  logic {clk};"
     if rst:
-        lines.append(f"  logic {rst};")
-    lines.append("")
+        yield f"  logic {rst};"
+    yield ""
     if clk or rst:
         conn = []
         if clk:
             conn.append(f".{clk}({clk})")
         if rst:
             conn.append(f".{rst}({rst})")
-        lines.append(f"  {intf_name} {vif}({', '.join(conn)});")
+        yield f"  {intf_name} {vif}({', '.join(conn)});"
     else:
-        lines.append(f"  {intf_name} {vif}();")
-    lines.append("")
-    lines.append(f"  {dut_module} dut_inst (")
-    lines.append(port_map if port_map else "    // TODO: connect DUT ports")
-    lines.append("  );")
-    lines.append("")
+        yield f"  {intf_name} {vif}();"
+    yield ""
+    yield f"  {dut_module} dut_inst ("
+    yield port_map if port_map else "    // TODO: connect DUT ports"
+    yield "  );"
+    yield ""
     if missing:
-        lines.append("  // Unconnected DUT ports (not auto-matched):")
+        yield "  // Unconnected DUT ports (not auto-matched):"
         for p in missing:
-            lines.append(f"  // - {p}")
-        lines.append("")
+            yield f"  // - {p}"
+        yield ""
     if clk:
-        lines.append("  initial begin")
-        lines.append(f"    {clk} = 0;")
-        lines.append("    forever #5 " + clk + " = ~" + clk + ";")
-        lines.append("  end")
-        lines.append("")
+        yield "  initial begin"
+        yield f"    {clk} = 0;"
+        yield "    forever #5 " + clk + " = ~" + clk + ";"
+        yield "  end"
+        yield ""
     if rst:
-        lines.append("  initial begin")
-        lines.append(f"    {rst} = 1;")
-        lines.append("    #20;")
-        lines.append(f"    {rst} = 0;")
-        lines.append("  end")
-        lines.append("")
-    lines.append("  initial begin")
-    lines.append("    run_test(\"" + test_name + "\");")
-    lines.append("  end")
-    lines.append("")
-    lines.append("endmodule")
-    return "\n".join(lines) + "\n"
-
-
-def _render_pkg(file_names: Iterable[str]) -> str:
-    lines = ["package tb_pkg;", "  import uvm_pkg::*;", "  `include \"uvm_macros.svh\"", ""]
+        yield "  initial begin"
+        yield f"    {rst} = 1;"
+        yield "    #20;"
+        yield f"    {rst} = 0;"
+        yield "  end"
+        yield ""
+    yield "  initial begin"
+    yield "    run_test(\"" + test_name + "\");"
+    yield "  end"
+    yield ""
+    yield "endmodule"
+
+
+def _render_pkg(file_names: Iterable[str]) -> Iterator[str]:
+    yield "package tb_pkg;"
+    yield "  import uvm_pkg::*;"
+    yield "  `include \"uvm_macros.svh\""
+    yield ""
     for name in file_names:
-        lines.append(f"  `include \"{name}\"")
-    lines.append("")
-    lines.append("endpackage : tb_pkg")
-    return "\n".join(lines) + "\n"
+        yield f"  `include \"{name}\""
+    yield ""
+    yield "endpackage : tb_pkg"
 
 
-def generate_files(state: dict) -> tuple[dict[Path, str], list[str]]:
-    warnings: list[str] = []
+def _lines(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        yield line + "\n"
 
-    agent_files = _render_agent_and_components(state)
-    src_files: dict[str, str] = {
-        "interface.sv": _render_interface(state),
-        "transaction.sv": _render_transaction(state),
-        "sequence.sv": _render_sequence(state),
-        "scoreboard.sv": _render_scoreboard(state),
-        "environment.sv": _render_environment(state),
-        "test.sv": _render_test(state),
-        "top.sv": _render_top(state),
-        **agent_files,
-    }
 
-    include_order = ["transaction.sv", "sequence.sv", "agent.sv"]
-    for extra in [
-        "driver.sv",
-        "monitor.sv",
-        "sequencer.sv",
-        "scoreboard.sv",
-        "environment.sv",
-        "test.sv",
-    ]:
-        if extra in src_files and extra not in include_order:
-            include_order.append(extra)
+_AGENT_OUTPUTS = ("agent.sv", "driver.sv", "monitor.sv", "sequencer.sv")
 
-    src_files["tb_pkg.sv"] = _render_pkg([n for n in include_order if n in src_files])
 
-    project = state.get("project", {}) or {}
-    project_name = _safe_name(project.get("project_name", "testbench"), "testbench")
-    payload = {
-        "project_name": project_name,
-        "generated_files": sorted(src_files.keys()),
-    }
+def _agent_output(output: str) -> Callable[[dict], Iterable[str] | None]:
+    def render(state: dict) -> Iterable[str] | None:
+        return _render_agent_and_components(state).get(output)
+
+    return render
+
+
+def _register_builtin_renderers() -> None:
+    # ``depends`` must name every top-level key the renderer reads: watch mode
+    # only re-renders outputs whose depends intersect the changed keys.
+    builtin = [
+        RendererSpec("interface.sv", _render_interface, ("interface",)),
+        RendererSpec("transaction.sv", _render_transaction, ("transaction",), pkg_order=10),
+        RendererSpec("sequence.sv", _render_sequence, ("sequence", "transaction"), pkg_order=20),
+        RendererSpec("scoreboard.sv", _render_scoreboard, ("scoreboard", "transaction"), pkg_order=70),
+        RendererSpec("environment.sv", _render_environment, ("environment", "agent", "scoreboard"), pkg_order=80),
+        RendererSpec("test.sv", _render_test, ("test", "environment", "sequence", "agent"), pkg_order=90),
+        RendererSpec("top.sv", _render_top, ("top", "interface", "test", "project")),
+    ]
+    for order, output in zip((30, 40, 50, 60), _AGENT_OUTPUTS):
+        builtin.append(RendererSpec(output, _agent_output(output), ("agent", "agent_code"), pkg_order=order))
+    for spec in builtin:
+        registry.register(spec, builtin=True)
+
+
+_register_builtin_renderers()
 
-    files: dict[Path, str] = {}
-    files[Path("manifest.json")] = json.dumps(payload, indent=2) + "\n"
-    filelist_entries = [f"src/{n}" for n in ("interface.sv", "tb_pkg.sv", "top.sv") if n in src_files]
-    files[Path("filelist.f")] = "\n".join(filelist_entries) + "\n"
-    files[Path("README.md")] = (
-        f"# {project_name}\n\nGenerated by Testbench Ecosystem.\n\n"
-        "## Files\n\n- `src/tb_pkg.sv`\n- `src/top.sv`\n"
-    )
-    for filename, content in src_files.items():
-        files[Path("src") / filename] = content
 
-    # Optional user overrides (editable from Preview page)
+def _source_files(
+    state: dict, warnings: list[str] | None = None, only: Iterable[str] | None = None
+) -> dict[str, Iterable[str]]:
+    """Render ``src/`` files through the renderer registry.
+
+    ``only`` limits rendering (and plugin imports) to those file names; the
+    package file ``tb_pkg.sv`` is built only when ``only`` is None.
+    """
+    src_files: dict[str, Iterable[str]] = {}
+    order: dict[str, int] = {}
+    for spec in registry.specs(only, warnings):
+        try:
+            lines = spec.render(state)
+            if lines is not None and not registry.is_builtin(spec.output):
+                # A generator-function plugin fails while it is iterated; run it
+                # here so its errors become warnings instead of escaping later.
+                lines = list(lines)
+        except Exception as exc:
+            if registry.is_builtin(spec.output):
+                raise
+            if warnings is not None:
+                warnings.append(f"Renderer plugin {spec.output!r} failed: {type(exc).__name__}: {exc}")
+            continue
+        if lines is None:
+            continue
+        src_files[spec.output] = lines
+        if spec.pkg_order is not None:
+            order[spec.output] = spec.pkg_order
+
+    # Custom agent code may define files beyond the four built-in ones.
+    if (state.get("agent", {}) or {}).get("use_custom_code"):
+        wanted = None if only is None else set(only)
+        for name, lines in _render_agent_and_components(state).items():
+            if name not in _AGENT_OUTPUTS and (wanted is None or name in wanted):
+                src_files.setdefault(name, lines)
+
+    if only is None:
+        include_order = sorted(order, key=lambda n: order[n])
+        src_files["tb_pkg.sv"] = _render_pkg(include_order)
+    return src_files
+
+
+def _collect_overrides(state: dict, warnings: list[str]) -> dict[Path, str | dict]:
+    # Optional user overrides (editable from Preview page): whole files, or
+    # patches against the generated file (see utils.overrides).
+    overrides: dict[Path, str | dict] = {}
     custom_files = state.get("custom_files", {}) or {}
     enabled = bool(state.get("custom_files_enabled", True))
     if enabled and isinstance(custom_files, dict) and custom_files:
@@ -842,6 +909,9 @@ def generate_files(state: dict) -> tuple[dict[Path, str], list[str]]:
             if rel is None:
                 warnings.append(f"Ignored override with unsafe path: {k!r}")
                 continue
+            if is_patch(v):
+                overrides[rel] = v
+                continue
             try:
                 content = str(v)
             except Exception:
@@ -849,20 +919,359 @@ def generate_files(state: dict) -> tuple[dict[Path, str], list[str]]:
                 continue
             if content and not content.endswith("\n"):
                 content += "\n"
-            files[rel] = content
+            overrides[rel] = content
+    return overrides
+
+
+def _template_context(state: dict, rel_path: Path, builtin: Iterable[str]) -> dict[str, ContextValue]:
+    project = state.get("project", {}) or {}
+    interface = state.get("interface", {}) or {}
+    agent_name = _safe_name((state.get("agent", {}) or {}).get("agent_name", "my_agent"), "my_agent")
+    top = state.get("top", {}) or {}
+
+    rendered: list[str] = []
+
+    def builtin_text() -> str:
+        if not rendered:
+            rendered.append("".join(builtin))
+        return rendered[0]
+
+    return {
+        "file_name": rel_path.as_posix(),
+        "project_name": _safe_name(project.get("project_name", "testbench"), "testbench"),
+        "owner_name": str(project.get("owner_name") or ""),
+        "uvm_version": str(project.get("uvm_version") or ""),
+        "license": str(project.get("license") or ""),
+        "notes": str(project.get("notes") or ""),
+        "interface_name": _safe_name(interface.get("name", "my_if"), "my_if"),
+        "clock": (interface.get("clock") or "").strip(),
+        "reset": (interface.get("reset") or "").strip(),
+        "txn_class": _safe_name((state.get("transaction", {}) or {}).get("class_name", "txn_item"), "txn_item"),
+        "agent_name": agent_name,
+        "driver_name": f"{agent_name}_driver",
+        "monitor_name": f"{agent_name}_monitor",
+        "sequencer_name": f"{agent_name}_sequencer",
+        "scoreboard_name": _safe_name((state.get("scoreboard", {}) or {}).get("name", "my_scoreboard"), "my_scoreboard"),
+        "env_name": _safe_name((state.get("environment", {}) or {}).get("name", "env"), "env"),
+        "sequence_name": _safe_name((state.get("sequence", {}) or {}).get("name", "my_sequence"), "my_sequence"),
+        "test_name": _safe_name((state.get("test", {}) or {}).get("name", "base_test"), "base_test"),
+        "top_name": _safe_name(top.get("name", "top_tb"), "top_tb"),
+        "dut_module": (top.get("dut_module") or "").strip() or (project.get("module_name") or "").strip() or "dut",
+        "builtin": builtin_text,
+    }
+
+
+def _apply_template(
+    state: dict, dirs: list[Path], rel_path: Path, chunks: Iterable[str], warnings: list[str]
+) -> Iterable[str]:
+    try:
+        compiled = find_template(dirs, rel_path)
+    except TemplateError as exc:
+        warnings.append(f"Ignored template: {exc}")
+        return chunks
+    if compiled is None:
+        return chunks
+    context = _template_context(state, rel_path, chunks)
+    missing = compiled.names - context.keys()
+    if missing:
+        warnings.append(
+            f"Ignored template {compiled.path}: unknown placeholder(s): {', '.join(sorted(missing))}"
+        )
+        return chunks
+    return compiled.render(context)
+
+
+def iter_files(
+    state: dict,
+    warnings: list[str] | None = None,
+    recorder: MetricsRecorder | None = None,
+    only: Iterable[Path | str] | None = None,
+    overrides: bool = True,
+) -> Iterator[tuple[Path, Iterable[str]]]:
+    """Yield ``(relative_path, chunks)`` for every output file.
+
+    Files are rendered lazily while their chunks are consumed, so only one file
+    is ever materialized at a time. Warnings are appended to ``warnings`` as
+    soon as iteration starts; ``recorder`` receives per-file render metrics.
+    ``only`` restricts output to those relative paths, so page previews don't
+    render (or load renderer plugins for) the rest of the project.
+    ``overrides=False`` yields the files as generated, which is what saved
+    override patches are taken against.
+    """
+    if warnings is None:
+        warnings = []
+    wanted = None if only is None else {Path(p) for p in only}
+    with recorder.stage("overrides") if recorder else nullcontext():
+        saved = _collect_overrides(state, warnings) if overrides else {}
+    # The manifest, file list and package need to know every source file.
+    if wanted is None or wanted & {Path("manifest.json"), Path("filelist.f"), Path("src/tb_pkg.sv")}:
+        src_files = _source_files(state, warnings)
+    else:
+        src_files = _source_files(
+            state, warnings, [p.relative_to("src").as_posix() for p in wanted if p.parts[:1] == ("src",)]
+        )
 
+    project = state.get("project", {}) or {}
+    project_name = _safe_name(project.get("project_name", "testbench"), "testbench")
+    # Leave out output_dir so the tree is the same wherever it is written;
+    # regen takes it from where the tree is.
+    portable = _portable_state(state)
+    snapshot = json.dumps(portable, indent=2, sort_keys=True, default=str) + "\n"
+    payload = {
+        "project_name": project_name,
+        "generated_files": sorted(src_files.keys()),
+        "generator_version": __version__,
+        "state_hash": state_hash(portable),
+        "state_snapshot": STATE_SNAPSHOT.as_posix(),
+    }
+    filelist_entries = [f"src/{n}" for n in ("interface.sv", "tb_pkg.sv", "top.sv") if n in src_files]
+
+    entries: list[tuple[Path, Iterable[str]]] = [
+        (Path("manifest.json"), (json.dumps(payload, indent=2) + "\n",)),
+        (STATE_SNAPSHOT, (snapshot,)),
+        (Path("filelist.f"), ("\n".join(filelist_entries) + "\n",)),
+        (
+            Path("README.md"),
+            (
+                f"# {project_name}\n\nGenerated by Testbench Ecosystem.\n\n"
+                "## Files\n\n- `src/tb_pkg.sv`\n- `src/top.sv`\n",
+            ),
+        ),
+    ]
+    entries.extend((Path("src") / filename, _lines(lines)) for filename, lines in src_files.items())
+    if wanted is not None:
+        entries = [e for e in entries if e[0] in wanted]
+        saved = {p: c for p, c in saved.items() if p in wanted}
+
+    # User templates restyle built-in output; saved overrides still win, and
+    # override patches apply on top of the templated text.
+    dirs = template_dirs(project.get("template_dir"))
+    for rel_path, chunks in entries:
+        source = "builtin"
+        override = saved.pop(rel_path, None)
+        if isinstance(override, str):
+            chunks, source = (override,), "override"
+            yield rel_path, (recorder.measure(rel_path, source, chunks) if recorder else chunks)
+            continue
+        if dirs and rel_path not in (Path("manifest.json"), STATE_SNAPSHOT):
+            with recorder.stage("templates") if recorder else nullcontext():
+                templated = _apply_template(state, dirs, rel_path, chunks, warnings)
+            if templated is not chunks:
+                chunks, source = templated, "template"
+        if override is not None:
+            try:
+                text, problems = apply_override("".join(chunks), override)
+            except (TypeError, ValueError, IndexError) as exc:
+                warnings.append(f"Ignored malformed override for {rel_path.as_posix()}: {exc}")
+            else:
+                warnings.extend(
+                    f"Override for {rel_path.as_posix()} no longer matches the generated code: {p}; "
+                    "resolve the <<<<<<< markers in Preview"
+                    for p in problems
+                )
+                chunks, source = (text,), "override"
+        yield rel_path, (recorder.measure(rel_path, source, chunks) if recorder else chunks)
+    for rel_path, content in saved.items():
+        if not isinstance(content, str):
+            warnings.append(f"Ignored override for {rel_path.as_posix()}: the file is no longer generated")
+            continue
+        yield rel_path, (recorder.measure(rel_path, "override", (content,)) if recorder else (content,))
+
+
+def generate_files(
+    state: dict, only: Iterable[Path | str] | None = None, *, overrides: bool = True
+) -> tuple[dict[Path, str], list[str]]:
+    warnings: list[str] = []
+    files = {
+        rel_path: "".join(chunks) for rel_path, chunks in iter_files(state, warnings, only=only, overrides=overrides)
+    }
     return files, warnings
 
 
-def _atomic_write(path: Path, content: str) -> None:
+def _atomic_write(path: Path, chunks: Iterable[str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8", newline="\n", dir=str(path.parent)) as tmp:
-        tmp.write(content)
+        tmp.writelines(chunks)
         tmp_path = Path(tmp.name)
     tmp_path.replace(path)
 
 
-def generate_project(state: dict) -> GenerationResult:
+def _same_content(path: Path, data: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        return path.read_bytes() == data
+    except OSError:
+        return False
+
+
+def write_files(
+    output_root: Path,
+    files: Iterable[tuple[Path, Iterable[str]]],
+    recorder: MetricsRecorder | None = None,
+    unchanged: list[Path] | None = None,
+) -> list[Path]:
+    """Write ``files`` under ``output_root``; returns every path, written or not.
+
+    When ``unchanged`` is given, files whose bytes already match are left
+    alone (mtime included, so incremental compiles skip them) and appended to
+    it. That needs one file's content in memory at a time.
+    """
+    written: list[Path] = []
+    for rel_path, chunks in files:
+        abs_path = output_root / rel_path
+        t0 = time.perf_counter()
+        if unchanged is None:
+            _atomic_write(abs_path, chunks)
+        else:
+            text = "".join(chunks)
+            if _same_content(abs_path, text.encode("utf-8")):
+                unchanged.append(abs_path)
+            else:
+                _atomic_write(abs_path, (text,))
+        if recorder is not None:
+            recorder.add_elapsed(rel_path, time.perf_counter() - t0)
+        written.append(abs_path)
+    return written
+
+
+def _write_manifest_metrics(output_root: Path, metrics: GenerationMetrics) -> None:
+    manifest_path = output_root / "manifest.json"
+    try:
+        payload = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    if not isinstance(payload, dict):
+        return
+    payload["metrics"] = metrics.to_dict()
+    _atomic_write(manifest_path, (json.dumps(payload, indent=2) + "\n",))
+
+
+def state_fingerprint(state: dict) -> str:
+    """Hash of everything that determines generated output.
+
+    Covers the state itself except ``project.output_dir`` (the same project
+    written elsewhere reuses the cache), the generator version, the renderer
+    plugins and their versions, the DUT read by the top renderer and the stat
+    of every template that could apply.
+    """
+    h = hashlib.sha256()
+    h.update(__version__.encode("utf-8"))
+    h.update(registry.signature().encode("utf-8"))
+    h.update(json.dumps(_portable_state(state), sort_keys=True, default=str).encode("utf-8"))
+
+    dut_path = str((state.get("top", {}) or {}).get("dut_path") or "").strip()
+    if dut_path:
+        try:
+            h.update(Path(dut_path).read_bytes())
+        except OSError:
+            h.update(b"<missing dut>")
+
+    project = state.get("project", {}) or {}
+    for d in template_dirs(project.get("template_dir")):
+        h.update(str(d).encode("utf-8"))
+        if not d.is_dir():
+            continue
+        for tpl in sorted(d.rglob("*" + TEMPLATE_SUFFIX)):
+            try:
+                st = tpl.stat()
+            except OSError:
+                continue
+            h.update(f"{tpl.relative_to(d).as_posix()}:{st.st_mtime_ns}:{st.st_size}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _same_as_blob(path: Path, store: ContentStore, digest: str, size: int) -> bool:
+    # A hardlink left by a linking run is replaced by a copy unless this run links too.
+    if store.is_linked(path, digest):
+        return store.link
+    try:
+        return path.stat().st_size == size and filecmp.cmp(path, store.object_path(digest), shallow=False)
+    except OSError:
+        return False
+
+
+def _generate_cached(
+    state: dict,
+    output_root: Path,
+    store: ContentStore,
+    recorder: MetricsRecorder,
+    unchanged: list[Path] | None = None,
+) -> GenerationResult:
+    with recorder.stage("fingerprint"):
+        fingerprint = state_fingerprint(state)
+        cached = store.load_manifest(fingerprint)
+    if cached is not None:
+        written: list[Path] = []
+        for rel, digest, size, lines in cached["files"]:
+            abs_path = output_root / rel
+            t0 = time.perf_counter()
+            if unchanged is not None and _same_as_blob(abs_path, store, digest, size):
+                unchanged.append(abs_path)
+            elif not store.materialize(digest, size, abs_path):
+                break
+            recorder.record_file(Path(rel), "cache", size, lines)
+            recorder.add_elapsed(Path(rel), time.perf_counter() - t0)
+            written.append(abs_path)
+        else:
+            return GenerationResult(
+                output_root=output_root,
+                files_written=tuple(written),
+                warnings=tuple(cached.get("warnings") or ()),
+                cache_hit=True,
+                metrics=recorder.result(),
+                files_unchanged=tuple(unchanged or ()),
+            )
+        # A blob went missing; fall back to a full render with fresh metrics.
+        recorder = MetricsRecorder()
+        if unchanged is not None:
+            unchanged.clear()
+
+    warnings: list[str] = []
+    written = []
+    entries: list[tuple[str, str, int, int]] = []
+    for rel_path, chunks in iter_files(state, warnings, recorder):
+        t0 = time.perf_counter()
+        digest, size = store.put_chunks(chunks)
+        abs_path = output_root / rel_path
+        if unchanged is not None and _same_as_blob(abs_path, store, digest, size):
+            unchanged.append(abs_path)
+        else:
+            store.materialize(digest, size, abs_path)
+        recorder.add_elapsed(rel_path, time.perf_counter() - t0)
+        written.append(abs_path)
+        entries.append((rel_path.as_posix(), digest, size, recorder.file_lines(rel_path)))
+    store.save_manifest(fingerprint, entries, warnings)
+    return GenerationResult(
+        output_root=output_root,
+        files_written=tuple(written),
+        warnings=tuple(warnings),
+        metrics=recorder.result(),
+        files_unchanged=tuple(unchanged or ()),
+    )
+
+
+def generate_project(
+    state: dict,
+    *,
+    cache_dir: Path | str | None = None,
+    cache_links: bool = False,
+    manifest_metrics: bool = False,
+    incremental: bool = False,
+    only: Iterable[Path | str] | None = None,
+) -> GenerationResult:
+    """Write the project to ``<output_dir>/<project_name>``.
+
+    Per-file render/write timings, bytes and line counts are always returned
+    in ``GenerationResult.metrics``; ``manifest_metrics`` also records them
+    under a ``metrics`` key in the written ``manifest.json``. With
+    ``incremental``, files whose content is unchanged are not rewritten and
+    are reported in ``GenerationResult.files_unchanged``. Files served from
+    ``cache_dir`` are copies; ``cache_links`` hardlinks them to the cache
+    instead, which makes them read-only. ``only`` writes just those paths
+    relative to the project root (as for ``iter_files``) and bypasses the
+    cache, whose entries are whole trees.
+    """
     errors = validate_state(state)
     if errors:
         raise ValueError("\n".join(errors))
@@ -872,24 +1281,37 @@ def generate_project(state: dict) -> GenerationResult:
     project_name = _safe_name(project.get("project_name", "testbench"), "testbench")
     output_root = output_dir / project_name
 
-    files, warnings = generate_files(state)
-    written: list[Path] = []
-    for rel_path, content in files.items():
-        abs_path = output_root / rel_path
-        _atomic_write(abs_path, content)
-        written.append(abs_path)
+    recorder = MetricsRecorder()
+    unchanged: list[Path] | None = [] if incremental else None
+    if cache_dir is not None and only is None:
+        result = _generate_cached(state, output_root, ContentStore(Path(cache_dir), link=cache_links), recorder, unchanged)
+    else:
+        warnings: list[str] = []
+        written = write_files(output_root, iter_files(state, warnings, recorder, only), recorder, unchanged)
+        result = GenerationResult(
+            output_root=output_root,
+            files_written=tuple(written),
+            warnings=tuple(warnings),
+            metrics=recorder.result(),
+            files_unchanged=tuple(unchanged or ()),
+        )
 
-    return GenerationResult(output_root=output_root, files_written=tuple(written), warnings=tuple(warnings))
+    if manifest_metrics and result.metrics is not None:
+        _write_manifest_metrics(output_root, result.metrics)
+    return result
 
 
-def render_preview(state: dict) -> str:
-    files, warnings = generate_files(state)
-    parts: list[str] = []
+def iter_preview(state: dict) -> Iterator[str]:
+    warnings: list[str] = []
+    entries = sorted(iter_files(state, warnings), key=lambda e: str(e[0]))
     if warnings:
-        parts.append("// WARNINGS:\n" + "\n".join([f"// - {w}" for w in warnings]) + "\n\n")
-    for path in sorted(files.keys(), key=lambda p: str(p)):
+        yield "// WARNINGS:\n" + "\n".join([f"// - {w}" for w in warnings]) + "\n\n"
+    for path, chunks in entries:
         if str(path).endswith(".sv"):
-            parts.append(f"// ===== {path.as_posix()} =====\n")
-            parts.append(files[path])
-            parts.append("\n")
-    return "".join(parts)
+            yield f"// ===== {path.as_posix()} =====\n"
+            yield from chunks
+            yield "\n"
+
+
+def render_preview(state: dict) -> str:
+    return "".join(iter_preview(state))
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+import time
+from typing import Iterable, Iterator
+
+
+@dataclass(frozen=True)
+class FileMetrics:
+    path: Path
+    source: str
+    render_seconds: float
+    write_seconds: float
+    bytes: int
+    lines: int
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path.as_posix(),
+            "source": self.source,
+            "render_ms": round(self.render_seconds * 1000, 3),
+            "write_ms": round(self.write_seconds * 1000, 3),
+            "bytes": self.bytes,
+            "lines": self.lines,
+        }
+
+
+@dataclass(frozen=True)
+class GenerationMetrics:
+    files: tuple[FileMetrics, ...]
+    stages: tuple[tuple[str, float], ...]
+    total_seconds: float
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(f.bytes for f in self.files)
+
+    @property
+    def total_lines(self) -> int:
+        return sum(f.lines for f in self.files)
+
+    def slowest(self, n: int = 3) -> list[FileMetrics]:
+        return sorted(self.files, key=lambda f: f.render_seconds + f.write_seconds, reverse=True)[:n]
+
+    def summary_lines(self, top: int = 3) -> list[str]:
+        lines = [
+            f"{len(self.files)} files, {self.total_bytes / 1024:.1f} KiB, {self.total_lines} lines "
+            f"in {self.total_seconds * 1000:.1f} ms"
+        ]
+        if self.stages:
+            lines.append(", ".join(f"{name} {secs * 1000:.1f} ms" for name, secs in self.stages))
+        for f in self.slowest(top):
+            lines.append(
+                f"{f.path.as_posix()}: render {f.render_seconds * 1000:.1f} ms, "
+                f"write {f.write_seconds * 1000:.1f} ms ({f.source})"
+            )
+        return lines
+
+    def to_dict(self) -> dict:
+        return {
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "total_bytes": self.total_bytes,
+            "total_lines": self.total_lines,
+            "stages_ms": {name: round(secs * 1000, 3) for name, secs in self.stages},
+            "files": [f.to_dict() for f in self.files],
+        }
+
+
+class _FileStat:
+    __slots__ = ("source", "render", "elapsed", "bytes", "lines")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.render = 0.0
+        self.elapsed = 0.0
+        self.bytes = 0
+        self.lines = 0
+
+
+class MetricsRecorder:
+    """Collects per-file and per-stage timings while files stream through."""
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self._files: dict[Path, _FileStat] = {}
+        self._stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stages[name] = self._stages.get(name, 0.0) + (time.perf_counter() - t0)
+
+    def measure(self, rel_path: Path, source: str, chunks: Iterable[str]) -> Iterator[str]:
+        """Wrap ``chunks`` so time spent producing them counts as render time."""
+        stat = self._files.setdefault(rel_path, _FileStat(source))
+        stat.source = source
+        it = iter(chunks)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                chunk = next(it)
+            except StopIteration:
+                stat.render += time.perf_counter() - t0
+                return
+            stat.render += time.perf_counter() - t0
+            stat.bytes += len(chunk.encode("utf-8"))
+            stat.lines += chunk.count("\n")
+            yield chunk
+
+    def record_file(self, rel_path: Path, source: str, size: int, lines: int) -> None:
+        stat = self._files.setdefault(rel_path, _FileStat(source))
+        stat.source = source
+        stat.bytes = size
+        stat.lines = lines
+
+    def file_lines(self, rel_path: Path) -> int:
+        stat = self._files.get(rel_path)
+        return stat.lines if stat is not None else 0
+
+    def add_elapsed(self, rel_path: Path, seconds: float) -> None:
+        """Wall time spent handling a file, render time included."""
+        stat = self._files.setdefault(rel_path, _FileStat("builtin"))
+        stat.elapsed += seconds
+
+    def result(self) -> GenerationMetrics:
+        files = tuple(
+            FileMetrics(
+                path=path,
+                source=stat.source,
+                render_seconds=stat.render,
+                write_seconds=max(stat.elapsed - stat.render, 0.0),
+                bytes=stat.bytes,
+                lines=stat.lines,
+            )
+            for path, stat in self._files.items()
+        )
+        render = sum(f.render_seconds for f in files)
+        write = sum(f.write_seconds for f in files)
+        stages = [*self._stages.items(), ("render", render), ("write", write)]
+        return GenerationMetrics(
+            files=files,
+            stages=tuple(stages),
+            total_seconds=time.perf_counter() - self._start,
+        )
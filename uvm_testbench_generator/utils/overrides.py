@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from difflib import SequenceMatcher
+import hashlib
+from typing import Any
+
+# An override in state["custom_files"] is either the whole file as a string
+# (older projects, plugins) or a patch against the generated file:
+#
+#   {"patch": 1, "base": "<digest of the generated text>",
+#    "hunks": [[line, [old lines...], [new lines...]], ...]}
+#
+# Each hunk replaces ``old`` (the edited lines plus a little unchanged
+# context, which anchors it) starting at 0-based ``line`` of the base. While
+# the generated file is unchanged the patch applies as is; after the state or
+# a template changes it, each hunk is merged three ways (old = common
+# ancestor, new = the user's edit, the generated text = theirs) and
+# conflicts are written out with diff3 markers.
+PATCH_VERSION = 1
+CONTEXT_LINES = 2
+_SEARCH_WINDOW = 200  # lines either side of where a hunk used to be
+
+
+def base_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def is_patch(value: Any) -> bool:
+    return isinstance(value, dict) and value.get("patch") == PATCH_VERSION and isinstance(value.get("hunks"), list)
+
+
+def make_override(base: str, text: str) -> dict | None:
+    """The patch turning ``base`` into ``text``, or None when they are the same."""
+    if text == base:
+        return None
+    a = base.splitlines(keepends=True)
+    b = text.splitlines(keepends=True)
+    hunks = [
+        [group[0][1], a[group[0][1] : group[-1][2]], b[group[0][3] : group[-1][4]]]
+        for group in SequenceMatcher(None, a, b, autojunk=False).get_grouped_opcodes(CONTEXT_LINES)
+    ]
+    return {"patch": PATCH_VERSION, "base": base_digest(base), "hunks": hunks}
+
+
+def _common_ends(old: list, new: list) -> tuple[int, int]:
+    lead = 0
+    while lead < min(len(old), len(new)) and old[lead] == new[lead]:
+        lead += 1
+    trail = 0
+    while trail < min(len(old), len(new)) - lead and old[-1 - trail] == new[-1 - trail]:
+        trail += 1
+    return lead, trail
+
+
+def _find(lines: list, block: list, near: int, start: int) -> int:
+    """Index of ``block`` in ``lines`` at or after ``start``, closest to ``near``; -1 if absent."""
+    n = len(block)
+    hi = len(lines) - n
+    if hi < start:
+        return -1
+    if not block:
+        return min(max(near, start), len(lines))
+    near = min(max(near, start), hi)
+    for d in range(0, max(near - start, hi - near, 0) + 1):
+        if d > _SEARCH_WINDOW:
+            break
+        for i in (near - d, near + d) if d else (near,):
+            if start <= i <= hi and lines[i : i + n] == block:
+                return i
+    return -1
+
+
+def _anchor(lines: list, pos: int, near: int, head: list, ancestor: list, tail: list) -> tuple[int, int]:
+    """Where the edited region (between ``head`` and ``tail`` context) is now: ``(start, end)``, or (-1, -1).
+
+    Either context side is enough when the lines next to it still read like
+    ``ancestor``. No leading (trailing) context means the file start (end).
+    """
+    n = len(ancestor)
+    start = _find(lines, head, near, pos) if head else (pos if near <= 0 else -1)
+    if start >= 0:
+        mid = start + len(head)
+        if not tail:
+            return mid, len(lines)
+        end = _find(lines, tail, mid + n, mid)
+        if end >= 0:
+            return mid, end
+        if lines[mid : mid + n] == ancestor:
+            return mid, mid + n
+    if tail:
+        end = _find(lines, tail, near + len(head) + n, pos)
+        if end >= 0 and end - n >= pos and lines[end - n : end] == ancestor:
+            return end - n, end
+    return -1, -1
+
+
+def _conflict(ours: list, ancestor: list, theirs: list) -> list[str]:
+    def block(lines: list) -> list[str]:
+        return [ln if ln.endswith("\n") else ln + "\n" for ln in lines]
+
+    return (
+        ["<<<<<<< override\n"]
+        + block(ours)
+        + ["||||||| generated before\n"]
+        + block(ancestor)
+        + ["=======\n"]
+        + block(theirs)
+        + [">>>>>>> generated now\n"]
+    )
+
+
+def apply_override(base: str, override: Any) -> tuple[str, list[str]]:
+    """Return ``(text, problems)`` for ``override`` applied to the generated ``base``.
+
+    A whole-file string is returned as is. ``problems`` describes hunks that
+    had to be merged with diff3 conflict markers because the generated code
+    they edited has changed too.
+    """
+    if not is_patch(override):
+        return str(override), []
+    lines = base.splitlines(keepends=True)
+    hunks = override["hunks"]
+    if override.get("base") == base_digest(base):
+        out: list[str] = []
+        pos = 0
+        for at, old, new in hunks:
+            out.extend(lines[pos:at])
+            out.extend(new)
+            pos = at + len(old)
+        out.extend(lines[pos:])
+        return "".join(out), []
+
+    out = []
+    problems: list[str] = []
+    pos = 0
+    drift = 0  # how far the generated file has moved so far
+    for at, old, new in hunks:
+        found = _find(lines, old, at + drift, pos)
+        if found >= 0:
+            # The lines this hunk edited are still generated the same way.
+            out.extend(lines[pos:found])
+            out.extend(new)
+            pos = found + len(old)
+            drift = found - at
+            continue
+        lead, trail = _common_ends(old, new)
+        ancestor, ours = old[lead : len(old) - trail], new[lead : len(new) - trail]
+        head, tail = old[:lead], old[len(old) - trail :]
+        mid, end = _anchor(lines, pos, at + drift, head, ancestor, tail)
+        if mid >= 0:
+            theirs = lines[mid:end]
+            out.extend(lines[pos:mid])
+            if theirs in (ancestor, ours):
+                out.extend(ours)
+            else:
+                problems.append(f"conflict at line {len(out) + 1}")
+                out.extend(_conflict(ours, ancestor, theirs))
+            pos = end
+            drift = mid - lead - at
+        else:
+            # Nothing left to anchor to: keep the edit where it used to be.
+            cut = min(max(at + drift + lead, pos), len(lines))
+            out.extend(lines[pos:cut])
+            problems.append(f"conflict at line {len(out) + 1} (the generated code around this edit is gone)")
+            out.extend(_conflict(ours, ancestor, []))
+            pos = cut
+    out.extend(lines[pos:])
+    return "".join(out), problems
+
+
+def with_override(custom_files: Any, name: str, base: str, text: str) -> dict:
+    """A copy of ``custom_files`` with ``name`` overridden by ``text``, stored as a patch against ``base``.
+
+    Text identical to the generated file drops the override instead.
+    """
+    custom_files = dict(custom_files) if isinstance(custom_files, dict) else {}
+    patch = make_override(base, text)
+    if patch is None:
+        custom_files.pop(name, None)
+    else:
+        custom_files[name] = patch
+    return custom_files
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import queue
+import tempfile
+import threading
+import time
+from typing import Callable
+
+from .. import __version__
+
+PROJECT_SUFFIX = ".tbproj"
+PROJECT_FORMAT = "tbgen-project"
+PROJECT_FORMAT_VERSION = 1
+
+# The autosave journal is JSON Lines: a "base" line holding a full state,
+# followed by one "set"/"clear" line per StateManager change. Replaying it
+# rebuilds the state after a crash; compaction rewrites it as a single base.
+JOURNAL_SUFFIX = ".journal"
+COMPACT_AFTER = 500
+
+
+def default_journal_path() -> Path:
+    """The single journal older versions kept; still recovered."""
+    return Path.home() / ".tbgen" / f"autosave{JOURNAL_SUFFIX}"
+
+
+def journal_dir() -> Path:
+    """Where the GUI keeps one journal per open project."""
+    return Path.home() / ".tbgen" / "autosave"
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether process ``pid`` exists on this host."""
+    if os.name == "nt":
+        # os.kill(pid, 0) would send CTRL+C there; ask the process table instead.
+        import ctypes
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)  # type: ignore[attr-defined]
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5  # access denied: it exists
+        code = ctypes.c_ulong()
+        try:
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        finally:
+            kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _abandoned(journal: Path) -> bool:
+    # Journals are named <pid>-<n>; one whose writer still runs is another
+    # window's live crash protection. The older single journal has no owner.
+    if journal == default_journal_path():
+        return True
+    pid = journal.stem.partition("-")[0]
+    return not pid.isdigit() or int(pid) == os.getpid() or not pid_alive(int(pid))
+
+
+def find_journals(directory: str | Path | None = None) -> list[Path]:
+    """Journals in ``directory`` (default: ``journal_dir()``) whose GUI is gone, plus the older single one, oldest first."""
+    directory = Path(directory) if directory is not None else journal_dir()
+    found = [default_journal_path(), *directory.glob(f"*{JOURNAL_SUFFIX}")]
+    stamped = []
+    for path in found:
+        if not _abandoned(path):
+            continue
+        try:
+            stamped.append((path.stat().st_mtime_ns, path))
+        except OSError:
+            continue
+    return [path for _, path in sorted(stamped)]
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def dumps_project(state: dict) -> str:
+    payload = {
+        "format": PROJECT_FORMAT,
+        "version": PROJECT_FORMAT_VERSION,
+        "generator_version": __version__,
+        "saved": time.time(),
+        "state": state,
+    }
+    return json.dumps(payload, separators=(",", ":"), default=str) + "\n"
+
+
+def write_project_text(path: str | Path, text: str) -> None:
+    """Atomically write ``dumps_project`` output; lets the GUI serialize on Tk and write elsewhere."""
+    _atomic_write_text(Path(path), text)
+
+
+def save_project(path: str | Path, state: dict) -> None:
+    write_project_text(path, dumps_project(state))
+
+
+def unwrap_project(data: object, source: str | Path = "<project>") -> dict:
+    """Return the state from a project file payload; plain state objects pass through."""
+    if not isinstance(data, dict):
+        raise ValueError(f"{source}: expected a JSON object")
+    if data.get("format") != PROJECT_FORMAT:
+        return data
+    if int(data.get("version", 0)) > PROJECT_FORMAT_VERSION:
+        raise ValueError(f"{source}: project format {data.get('version')} is newer than this generator supports")
+    state = data.get("state")
+    if not isinstance(state, dict):
+        raise ValueError(f"{source}: project has no state")
+    return state
+
+
+def load_project(path: str | Path) -> dict:
+    return unwrap_project(json.loads(Path(path).read_text(encoding="utf-8")), path)
+
+
+def replay_journal(path: str | Path) -> dict | None:
+    """Rebuild the state recorded in a journal, or None if there is nothing to recover.
+
+    A torn last line (crash mid-append) is ignored.
+    """
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except OSError:
+        return None
+    state: dict | None = None
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            break
+        op = entry.get("op") if isinstance(entry, dict) else None
+        if op == "base" and isinstance(entry.get("state"), dict):
+            state = dict(entry["state"])
+        elif op == "set" and "key" in entry:
+            state = state if state is not None else {}
+            state[entry["key"]] = entry.get("value")
+        elif op == "clear":
+            state = {}
+    return state
+
+
+class AutosaveJournal:
+    """Appends StateManager changes to a journal from a background thread.
+
+    ``record`` is meant to be a ``StateManager.subscribe_changes`` listener: it
+    only serializes the changed values and queues them, so the Tk loop never waits on the disk. The
+    writer keeps the latest serialized value per key, which lets it compact
+    the journal without touching live state.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        compact_after: int = COMPACT_AFTER,
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.compact_after = compact_after
+        self.on_error = on_error
+        self._queue: queue.Queue = queue.Queue()
+        self._values: dict[str, str] = {}
+        self._lines = 0
+        self._thread = threading.Thread(target=self._run, name="tbgen-autosave", daemon=True)
+        self._thread.start()
+
+    # -- producer side (any thread) -------------------------------------
+
+    def start(self, state: dict) -> None:
+        """Begin a fresh journal whose base is ``state``."""
+        self._queue.put(("base", {k: json.dumps(v, default=str) for k, v in state.items()}))
+
+    def record(self, keys, snapshot) -> None:
+        """``StateManager.subscribe_changes`` listener: journal the changed keys, or a new base."""
+        if keys is None:
+            self.start(snapshot)
+            return
+        for key in keys:
+            self._queue.put(("set", (str(key), json.dumps(snapshot.get(key), default=str))))
+
+    def discard(self) -> None:
+        """Delete the journal, e.g. after the project was saved."""
+        self._queue.put(("discard", None))
+
+    def flush(self, timeout: float | None = None) -> None:
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait(timeout)
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        self._queue.put(("stop", None))
+        self._thread.join(timeout)
+
+    # -- writer thread ----------------------------------------------------
+
+    def _base_line(self) -> str:
+        body = ",".join(f"{json.dumps(k)}:{v}" for k, v in self._values.items())
+        return '{"op":"base","state":{' + body + "}}\n"
+
+    def _compact(self) -> None:
+        _atomic_write_text(self.path, self._base_line())
+        self._lines = 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply(batch)
+            except Exception as exc:
+                self._lines = 0  # the next write rewrites the whole journal from _values
+                if self.on_error is not None:
+                    self.on_error(exc)
+            finally:
+                # Even after a failed write: flush() must not hang and stop must not be lost.
+                for op, arg in batch:
+                    if op == "flush":
+                        arg.set()
+            if any(op == "stop" for op, _ in batch):
+                return
+
+    def _apply(self, batch: list) -> None:
+        out: list[str] = []
+        for op, arg in batch:
+            if op == "base":
+                self._values = dict(arg)
+                out = []
+                self._compact()
+            elif op == "set":
+                key, value = arg
+                self._values[key] = value
+                out.append(f'{{"op":"set","key":{json.dumps(key)},"value":{value}}}\n')
+            elif op == "clear":
+                self._values.clear()
+                out.append('{"op":"clear"}\n')
+            elif op == "discard":
+                out = []
+                self._lines = 0
+                self.path.unlink(missing_ok=True)
+        if out:
+            if self._lines == 0:
+                self._compact()
+            else:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8", newline="\n") as f:
+                    f.writelines(out)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._lines += len(out)
+                if self._lines > self.compact_after:
+                    self._compact()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+from typing import Iterator
+
+from .. import __version__
+from .generator import STATE_SNAPSHOT, _safe_name, generate_project, state_hash, validate_state
+
+# Trees are found by their manifest.json; everything else needed to rebuild
+# them comes from the state snapshot written next to it.
+
+
+@dataclass(frozen=True)
+class TreeStatus:
+    root: Path
+    stale: bool
+    reason: str
+    generator_version: str = ""
+    has_snapshot: bool = False
+
+
+@dataclass(frozen=True)
+class RegenOutcome:
+    root: Path
+    ok: bool
+    changed: tuple[str, ...] = ()
+    error: str = ""
+
+
+def find_manifests(root: str | Path) -> Iterator[Path]:
+    """Yield every generated tree under ``root`` (directories holding a manifest.json)."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        if "manifest.json" in filenames:
+            dirnames[:] = []  # generated trees don't nest
+            yield Path(os.path.abspath(dirpath))
+            continue
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def check_tree(root: Path) -> TreeStatus:
+    manifest = _read_json(root / "manifest.json")
+    if manifest is None:
+        return TreeStatus(root, False, "unreadable manifest.json")
+    version = str(manifest.get("generator_version") or "")
+    snapshot_rel = manifest.get("state_snapshot")
+    if not snapshot_rel:
+        return TreeStatus(root, False, "no state snapshot (older generator)", version)
+    state = _read_json(root / snapshot_rel)
+    if state is None:
+        return TreeStatus(root, False, f"missing {snapshot_rel}", version)
+    if version != __version__:
+        return TreeStatus(root, True, f"generator {version or '?'} -> {__version__}", version, True)
+    if manifest.get("state_hash") != state_hash(state):
+        return TreeStatus(root, True, f"{snapshot_rel} edited", version, True)
+    return TreeStatus(root, False, "up to date", version, True)
+
+
+def regen_tree(root: Path) -> RegenOutcome:
+    """Regenerate ``root`` in place from its snapshot; only changed files are rewritten."""
+    try:
+        manifest = _read_json(root / "manifest.json") or {}
+        state = _read_json(root / str(manifest.get("state_snapshot") or STATE_SNAPSHOT))
+        if state is None:
+            raise ValueError("no readable state snapshot")
+        project = dict(state.get("project") or {})
+        if _safe_name(project.get("project_name", "testbench"), "testbench") != root.name:
+            raise ValueError(f"tree was renamed (project_name is {project.get('project_name')!r})")
+        project["output_dir"] = str(root.parent)
+        state["project"] = project
+        errors = validate_state(state)
+        if errors:
+            raise ValueError("; ".join(errors))
+        result = generate_project(state, incremental=True)
+    except (OSError, ValueError) as exc:
+        return RegenOutcome(root, False, error=str(exc))
+    unchanged = set(result.files_unchanged)
+    changed = tuple(p.relative_to(root).as_posix() for p in result.files_written if p not in unchanged)
+    return RegenOutcome(root, True, changed)
+
+
+def regenerate_all(
+    root: str | Path, *, workers: int | None = None, force: bool = False, dry_run: bool = False
+) -> tuple[list[TreeStatus], list[RegenOutcome]]:
+    """Check every tree under ``root`` and regenerate the stale ones in parallel.
+
+    ``force`` regenerates every tree that has a snapshot, stale or not.
+    """
+    statuses = [check_tree(r) for r in find_manifests(root)]
+    todo = [s.root for s in statuses if s.stale or (force and s.has_snapshot)]
+    if dry_run or not todo:
+        return statuses, []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+    if workers == 1:
+        return statuses, [regen_tree(r) for r in todo]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return statuses, list(pool.map(regen_tree, todo))
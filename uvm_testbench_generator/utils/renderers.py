@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+from typing import Callable, Iterable, Optional
+
+ENTRY_POINT_GROUP = "uvm_testbench_generator.renderers"
+
+RenderFunc = Callable[[dict], Optional[Iterable[str]]]
+
+
+@dataclass(frozen=True)
+class RendererSpec:
+    """One generated file under ``src/``.
+
+    ``render`` returns the file's lines (without newlines), or None when the
+    state doesn't call for the file. ``depends`` names the top-level state
+    keys it reads; ``pkg_order`` places it in ``tb_pkg.sv`` (lower first) and
+    None leaves it out of the package.
+    """
+
+    output: str
+    render: RenderFunc
+    depends: tuple[str, ...] = ()
+    pkg_order: int | None = None
+
+
+def _entry_points() -> list:
+    from importlib.metadata import entry_points
+
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    return list(eps.get(ENTRY_POINT_GROUP, ()))  # Python 3.9
+
+
+class RendererRegistry:
+    """Built-in renderers plus plugins from the ``uvm_testbench_generator.renderers`` entry point group.
+
+    Plugins are listed by entry point name (their output path under ``src/``)
+    and only imported when that output is rendered; built-in names win. The
+    entry point may refer to a ``RendererSpec`` or to a plain render function,
+    optionally carrying ``depends`` and ``pkg_order`` attributes.
+    """
+
+    def __init__(self) -> None:
+        self._specs: dict[str, RendererSpec] = {}
+        self._builtin: set[str] = set()
+        self._pending: dict[str, object] | None = None
+        self._installed: list[str] = []  # "name=value@version" per discovered entry point
+        self._failed: dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def register(self, spec: RendererSpec, *, builtin: bool = False) -> RendererSpec:
+        self._specs[spec.output] = spec
+        if builtin:
+            self._builtin.add(spec.output)
+        return spec
+
+    def is_builtin(self, output: str) -> bool:
+        return output in self._builtin
+
+    def unregister(self, output: str) -> None:
+        self._specs.pop(output, None)
+        self._builtin.discard(output)
+
+    def _discover(self) -> dict[str, object]:
+        if self._pending is None:
+            self._pending = {}  # set first: a broken environment is only tried once
+            try:
+                eps = _entry_points()
+            except Exception:
+                eps = []
+            for ep in eps:
+                dist = getattr(ep, "dist", None)  # Python 3.10+
+                self._installed.append(f"{ep.name}={ep.value}@{getattr(dist, 'version', '')}")
+                if ep.name not in self._specs:
+                    self._pending[ep.name] = ep
+        return self._pending
+
+    def names(self) -> list[str]:
+        """Every output name, builtin or plugin, without importing any plugin."""
+        with self._lock:
+            pending = list(self._discover())
+            return [*self._specs, *(n for n in pending if n not in self._specs), *self._failed]
+
+    def _load(self, name: str, warnings: list[str] | None) -> RendererSpec | None:
+        ep = self._discover().pop(name, None)
+        if ep is None:
+            return None
+        try:
+            obj = ep.load()  # type: ignore[attr-defined]
+            if isinstance(obj, RendererSpec):
+                spec = obj if obj.output == name else RendererSpec(name, obj.render, obj.depends, obj.pkg_order)
+            elif callable(obj):
+                spec = RendererSpec(
+                    name,
+                    obj,
+                    tuple(getattr(obj, "depends", ()) or ()),
+                    getattr(obj, "pkg_order", None),
+                )
+            else:
+                raise TypeError(f"{ep.value} is neither a RendererSpec nor callable")  # type: ignore[attr-defined]
+        except Exception as exc:
+            self._failed[name] = f"{type(exc).__name__}: {exc}"
+            if warnings is not None:
+                warnings.append(f"Renderer plugin {name!r} failed to load: {self._failed[name]}")
+            return None
+        return self.register(spec)
+
+    def get(self, name: str, warnings: list[str] | None = None) -> RendererSpec | None:
+        spec = self._specs.get(name)
+        if spec is not None:
+            return spec
+        with self._lock:
+            spec = self._specs.get(name)
+            if spec is None and name not in self._failed:
+                return self._load(name, warnings)
+        if name in self._failed and warnings is not None:
+            warnings.append(f"Renderer plugin {name!r} failed to load: {self._failed[name]}")
+        return spec
+
+    def specs(self, only: Iterable[str] | None = None, warnings: list[str] | None = None) -> list[RendererSpec]:
+        """Specs for ``only`` (default: all), importing just those plugins."""
+        wanted = None if only is None else set(only)
+        names = [n for n in self.names() if wanted is None or n in wanted]
+        out = []
+        for name in names:
+            spec = self.get(name, warnings)
+            if spec is not None:
+                out.append(spec)
+        return out
+
+    def signature(self) -> str:
+        """The plugins in play, as a string for the output cache key.
+
+        Lists installed entry points with their distribution versions and
+        renderers registered at run time.
+        """
+        with self._lock:
+            self._discover()
+            parts = sorted(self._installed)
+            for name, spec in self._specs.items():
+                if name not in self._builtin:
+                    render = spec.render
+                    parts.append(f"{name}:{getattr(render, '__module__', '')}.{getattr(render, '__qualname__', '')}")
+        return "\n".join(parts)
+
+    def affected(self, keys: Iterable[str]) -> list[str]:
+        """Outputs that may change when the top-level state ``keys`` change.
+
+        Those whose ``depends`` intersect ``keys``, plus plugins not imported
+        yet (their ``depends`` are unknown) and specs declaring no ``depends``.
+        """
+        keys = set(keys)
+        with self._lock:
+            pending = [n for n in self._discover() if n not in self._specs]
+            specs = list(self._specs.values())
+        return [s.output for s in specs if not s.depends or keys.intersection(s.depends)] + pending
+
+
+registry = RendererRegistry()
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+# Shape checks for the state slices the forms save. StateManager validates a
+# slice here before storing it (set) and a whole state before loading it, but
+# still stores the plain JSON values: the records are not kept.
+
+from dataclasses import dataclass, fields
+from typing import Any, Callable
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def _slotted(cls):
+    # dataclass(slots=True) needs Python 3.10; rebuild the class with
+    # __slots__ instead (defaults live in the generated __init__).
+    names = tuple(f.name for f in fields(cls))
+    ns = {k: v for k, v in cls.__dict__.items() if k not in names and k not in ("__dict__", "__weakref__")}
+    ns["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, ns)
+
+
+def record(cls):
+    return _slotted(dataclass(frozen=True)(cls))
+
+
+# What the generator renders when a field is missing. The records below and
+# utils.generator both read these, so a record never disagrees with the
+# output. Names have no entry: a record leaves them "" and the generator
+# substitutes its placeholder (my_if, txn_item, ...).
+DEFAULTS: dict[str, dict[str, Any]] = {
+    "signal": {"direction": "input", "width": "1"},
+    "field": {"type": "bit", "rand": False},
+    "agent": {"type": "active", "use_custom_code": False},
+    "agent.components": {"sequencer": True, "driver": True, "monitor": True},
+    "scoreboard": {"compare_mode": "uvm_compare", "use_expected_queue": True, "enable_coverage": False},
+    "environment": {"include_agent": True, "include_scoreboard": True},
+    "step": {"repeat": "1", "delay": "0", "randomize": True},
+    "test": {
+        "base_class": "uvm_test",
+        "create_env": True,
+        "start_sequence": False,
+        "raise_objection": True,
+        "print_topology": False,
+    },
+}
+_SIGNAL = DEFAULTS["signal"]
+_FIELD = DEFAULTS["field"]
+_AGENT = DEFAULTS["agent"]
+_COMPONENTS = DEFAULTS["agent.components"]
+_SCOREBOARD = DEFAULTS["scoreboard"]
+_ENVIRONMENT = DEFAULTS["environment"]
+_STEP = DEFAULTS["step"]
+_TEST = DEFAULTS["test"]
+
+
+# -- field readers: lenient where the generator already is, strict on shape ----
+
+
+def _text(where: str, value: Any, default: str = "") -> str:
+    if value is None:
+        return default
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return str(value).strip()
+    raise SchemaError(f"{where}: expected text, got {type(value).__name__}")
+
+
+def _flag(where: str, value: Any, default: bool = False) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, (bool, int)):
+        return bool(value)
+    raise SchemaError(f"{where}: expected true/false, got {type(value).__name__}")
+
+
+def _mapping(where: str, value: Any) -> dict:
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise SchemaError(f"{where}: expected an object, got {type(value).__name__}")
+    return value
+
+
+def _items(where: str, value: Any, parse: Callable[[str, dict], Any]) -> tuple:
+    if value is None:
+        return ()
+    if not isinstance(value, (list, tuple)):
+        raise SchemaError(f"{where}: expected a list, got {type(value).__name__}")
+    return tuple(parse(f"{where}[{i}]", _mapping(f"{where}[{i}]", v)) for i, v in enumerate(value))
+
+
+# -- records -------------------------------------------------------------------
+
+
+@record
+class Signal:
+    name: str
+    direction: str = _SIGNAL["direction"]
+    width: str = _SIGNAL["width"]
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Signal:
+        return cls(
+            _text(f"{where}.name", d.get("name")),
+            _text(f"{where}.direction", d.get("direction")) or _SIGNAL["direction"],
+            _text(f"{where}.width", d.get("width")) or _SIGNAL["width"],
+        )
+
+
+@record
+class DutInfo:
+    module_name: str = ""
+    parameters: tuple[tuple[str, str], ...] = ()
+    signals: tuple[Signal, ...] = ()
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> DutInfo:
+        params = _mapping(f"{where}.parameters", d.get("parameters"))
+        return cls(
+            _text(f"{where}.module_name", d.get("module_name")),
+            tuple((str(k), _text(f"{where}.parameters.{k}", v)) for k, v in params.items()),
+            _items(f"{where}.signals", d.get("signals"), Signal.parse),
+        )
+
+
+@record
+class Project:
+    project_name: str = ""
+    owner_name: str = ""
+    output_dir: str = ""
+    dut_path: str = ""
+    module_name: str = ""
+    uvm_version: str = ""
+    template_dir: str = ""
+    license: str = ""
+    notes: str = ""
+    dut_info: DutInfo = DutInfo()
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Project:
+        t = {k: _text(f"{where}.{k}", d.get(k)) for k in (
+            "project_name", "owner_name", "output_dir", "dut_path", "module_name",
+            "uvm_version", "template_dir", "license", "notes",
+        )}
+        return cls(**t, dut_info=DutInfo.parse(f"{where}.dut_info", _mapping(f"{where}.dut_info", d.get("dut_info"))))
+
+
+@record
+class Interface:
+    name: str = ""
+    clock: str = ""
+    reset: str = ""
+    signals: tuple[Signal, ...] = ()
+    modports: tuple[tuple[str, tuple[tuple[str, str], ...]], ...] = ()  # (modport, ((signal, access), ...))
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Interface:
+        modports = []
+        for mod, sigs in _mapping(f"{where}.modports", d.get("modports")).items():
+            sigs = _mapping(f"{where}.modports.{mod}", sigs)
+            modports.append((str(mod), tuple((str(s), _text(f"{where}.modports.{mod}.{s}", a)) for s, a in sigs.items())))
+        return cls(
+            _text(f"{where}.name", d.get("name")),
+            _text(f"{where}.clock", d.get("clock")),
+            _text(f"{where}.reset", d.get("reset")),
+            _items(f"{where}.signals", d.get("signals"), Signal.parse),
+            tuple(modports),
+        )
+
+
+@record
+class Field:
+    name: str
+    type: str = _FIELD["type"]
+    rand: bool = _FIELD["rand"]
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Field:
+        return cls(
+            _text(f"{where}.name", d.get("name")),
+            _text(f"{where}.type", d.get("type")) or _FIELD["type"],
+            _flag(f"{where}.rand", d.get("rand"), _FIELD["rand"]),
+        )
+
+
+@record
+class Constraint:
+    name: str
+    body: str = ""
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Constraint:
+        return cls(_text(f"{where}.name", d.get("name")), _text(f"{where}.body", d.get("body")))
+
+
+@record
+class Transaction:
+    class_name: str = ""
+    base_class: str = ""
+    fields: tuple[Field, ...] = ()
+    constraints: tuple[Constraint, ...] = ()
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Transaction:
+        return cls(
+            _text(f"{where}.class_name", d.get("class_name")),
+            _text(f"{where}.base_class", d.get("base_class")),
+            _items(f"{where}.fields", d.get("fields"), Field.parse),
+            _items(f"{where}.constraints", d.get("constraints"), Constraint.parse),
+        )
+
+
+@record
+class AgentComponents:
+    sequencer: bool = _COMPONENTS["sequencer"]
+    driver: bool = _COMPONENTS["driver"]
+    monitor: bool = _COMPONENTS["monitor"]
+
+
+@record
+class Agent:
+    agent_name: str = ""
+    type: str = _AGENT["type"]
+    transaction: str = ""
+    components: AgentComponents = AgentComponents()
+    use_custom_code: bool = _AGENT["use_custom_code"]
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Agent:
+        # include_components is current; components is the older spelling.
+        raw = d.get("include_components")
+        key = "include_components"
+        if not isinstance(raw, dict):
+            raw, key = d.get("components"), "components"
+        comps = _mapping(f"{where}.{key}", raw)
+        return cls(
+            _text(f"{where}.agent_name", d.get("agent_name")),
+            _text(f"{where}.type", d.get("type")) or _AGENT["type"],
+            _text(f"{where}.transaction", d.get("transaction")),
+            AgentComponents(*(_flag(f"{where}.{key}.{c}", comps.get(c), _COMPONENTS[c]) for c in _COMPONENTS)),
+            _flag(f"{where}.use_custom_code", d.get("use_custom_code"), _AGENT["use_custom_code"]),
+        )
+
+
+@record
+class Scoreboard:
+    name: str = ""
+    transaction: str = ""
+    compare_mode: str = _SCOREBOARD["compare_mode"]
+    fields: tuple[str, ...] = ()
+    use_expected_queue: bool = _SCOREBOARD["use_expected_queue"]
+    enable_coverage: bool = _SCOREBOARD["enable_coverage"]
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Scoreboard:
+        names = d.get("fields")
+        if names is not None and not isinstance(names, (list, tuple)):
+            raise SchemaError(f"{where}.fields: expected a list, got {type(names).__name__}")
+        return cls(
+            _text(f"{where}.name", d.get("name")),
+            _text(f"{where}.transaction", d.get("transaction")),
+            _text(f"{where}.compare_mode", d.get("compare_mode")) or _SCOREBOARD["compare_mode"],
+            tuple(_text(f"{where}.fields[{i}]", n) for i, n in enumerate(names or ())),
+            _flag(
+                f"{where}.use_expected_queue",
+                d.get("use_expected_queue", d.get("use_queue")),
+                _SCOREBOARD["use_expected_queue"],
+            ),
+            _flag(
+                f"{where}.enable_coverage",
+                d.get("enable_coverage", d.get("use_coverage")),
+                _SCOREBOARD["enable_coverage"],
+            ),
+        )
+
+
+@record
+class Environment:
+    name: str = ""
+    include_agent: bool = _ENVIRONMENT["include_agent"]
+    include_scoreboard: bool = _ENVIRONMENT["include_scoreboard"]
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Environment:
+        return cls(
+            _text(f"{where}.name", d.get("name")),
+            _flag(f"{where}.include_agent", d.get("include_agent"), _ENVIRONMENT["include_agent"]),
+            _flag(f"{where}.include_scoreboard", d.get("include_scoreboard"), _ENVIRONMENT["include_scoreboard"]),
+        )
+
+
+@record
+class Step:
+    item_name: str = ""
+    item: str = ""
+    repeat: str = _STEP["repeat"]
+    delay: str = _STEP["delay"]
+    randomize: bool = _STEP["randomize"]
+    assignments: tuple[tuple[str, str], ...] = ()
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Step:
+        assigns = _mapping(f"{where}.assignments", d.get("assignments"))
+        return cls(
+            _text(f"{where}.item_name", d.get("item_name")),
+            _text(f"{where}.item", d.get("item")),
+            _text(f"{where}.repeat", d.get("repeat")) or _STEP["repeat"],
+            _text(f"{where}.delay", d.get("delay")) or _STEP["delay"],
+            _flag(f"{where}.randomize", d.get("randomize"), _STEP["randomize"]),
+            tuple((str(k), _text(f"{where}.assignments.{k}", v)) for k, v in assigns.items()),
+        )
+
+
+@record
+class Sequence:
+    name: str = ""
+    transaction_class: str = ""
+    steps: tuple[Step, ...] = ()
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Sequence:
+        return cls(
+            _text(f"{where}.name", d.get("name")),
+            _text(f"{where}.transaction_class", d.get("transaction_class")),
+            _items(f"{where}.steps", d.get("steps"), Step.parse),
+        )
+
+
+@record
+class Test:
+    name: str = ""
+    base_class: str = _TEST["base_class"]
+    create_env: bool = _TEST["create_env"]
+    start_sequence: bool = _TEST["start_sequence"]
+    sequence_name: str = ""
+    raise_objection: bool = _TEST["raise_objection"]
+    print_topology: bool = _TEST["print_topology"]
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Test:
+        return cls(
+            _text(f"{where}.name", d.get("name")),
+            _text(f"{where}.base_class", d.get("base_class")) or _TEST["base_class"],
+            _flag(f"{where}.create_env", d.get("create_env"), _TEST["create_env"]),
+            _flag(f"{where}.start_sequence", d.get("start_sequence"), _TEST["start_sequence"]),
+            _text(f"{where}.sequence_name", d.get("sequence_name")),
+            _flag(f"{where}.raise_objection", d.get("raise_objection"), _TEST["raise_objection"]),
+            _flag(f"{where}.print_topology", d.get("print_topology"), _TEST["print_topology"]),
+        )
+
+
+@record
+class Top:
+    name: str = ""
+    dut_module: str = ""
+    dut_path: str = ""
+
+    @classmethod
+    def parse(cls, where: str, d: dict) -> Top:
+        return cls(
+            _text(f"{where}.name", d.get("name")),
+            _text(f"{where}.dut_module", d.get("dut_module")),
+            _text(f"{where}.dut_path", d.get("dut_path")),
+        )
+
+
+SLICES: dict[str, Any] = {
+    "project": Project,
+    "interface": Interface,
+    "transaction": Transaction,
+    "agent": Agent,
+    "scoreboard": Scoreboard,
+    "environment": Environment,
+    "sequence": Sequence,
+    "test": Test,
+    "top": Top,
+}
+
+
+def parse_slice(key: str, value: Any):
+    """The typed record for state[key], or None for keys without a schema.
+
+    Raises SchemaError when the value has the wrong shape (a list where an
+    object belongs, a dict where text belongs, ...). Text is stripped,
+    missing fields get ``DEFAULTS`` and missing names stay "".
+    """
+    cls = SLICES.get(key)
+    if cls is None:
+        return None
+    return cls.parse(key, _mapping(key, value))
+
+
+def check_state(state: dict) -> None:
+    """Raise SchemaError for the first malformed slice of a whole state."""
+    for key, value in state.items():
+        parse_slice(key, value)
+
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import socket
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable
+
+from .generator import generate_project, validate_state
+from .project_io import pid_alive
+from .synthesis import fill_dut_info
+
+# A job is `<id>.job.json` in the spool directory. A worker claims it by renaming
+# it to `<id>.job.json.claimed-<host>-<pid>`; rename is atomic on local disks and
+# NFS alike, so exactly one worker wins. When done the worker writes
+# `<id>.result.json` and `<id>.metrics.json` and renames the claim to
+# `<id>.job.json.done` or `<id>.job.json.failed`. While it runs the job the
+# worker touches the claim every HEARTBEAT_INTERVAL seconds, so the claim's
+# mtime tells other hosts whether it is still alive.
+JOB_SUFFIX = ".job.json"
+CLAIM_MARK = ".claimed-"
+HEARTBEAT_INTERVAL = 30.0
+
+
+@dataclass(frozen=True)
+class SpoolOutcome:
+    job_id: str
+    ok: bool
+    seconds: float
+    error: str = ""
+
+
+def _write_json(path: Path, data: object) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def submit_job(spool_dir: str | Path, state: dict, *, output_dir: str | None = None, job_id: str | None = None) -> Path:
+    """Drop a job into ``spool_dir``. It only becomes visible to workers once complete."""
+    spool = Path(spool_dir)
+    spool.mkdir(parents=True, exist_ok=True)
+    job_id = job_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    job: dict = {"state": state}
+    if output_dir:
+        job["output_dir"] = output_dir
+    path = spool / f"{job_id}{JOB_SUFFIX}"
+    _write_json(path, job)
+    return path
+
+
+def _claim_name(job: Path) -> Path:
+    return job.with_name(f"{job.name}{CLAIM_MARK}{socket.gethostname()}-{os.getpid()}")
+
+
+def claim_next(spool_dir: str | Path) -> Path | None:
+    """Claim the oldest pending job, or return None if the queue is empty."""
+    for job in sorted(Path(spool_dir).glob("*" + JOB_SUFFIX)):
+        claimed = _claim_name(job)
+        try:
+            os.rename(job, claimed)
+        except FileNotFoundError:
+            continue  # another worker got there first
+        os.utime(claimed)  # the first heartbeat, for requeue_stale
+        return claimed
+    return None
+
+
+@contextmanager
+def _heartbeat(claimed: Path, interval: float):
+    """Touch ``claimed`` every ``interval`` seconds until the block exits."""
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(interval):
+            try:
+                os.utime(claimed)
+            except OSError:
+                return  # requeued or finished under us
+
+    thread = threading.Thread(target=beat, name="tbgen-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def requeue_stale(spool_dir: str | Path, *, stale_after: float | None = None) -> list[Path]:
+    """Return abandoned claims to the queue.
+
+    Claims made on this host by processes that no longer exist are always
+    requeued; claims from other hosts only once their last heartbeat (the
+    claim's mtime) is older than ``stale_after`` seconds, which should be a
+    few times the workers' heartbeat interval.
+    """
+    host = socket.gethostname()
+    now = time.time()
+    requeued: list[Path] = []
+    for claimed in Path(spool_dir).glob(f"*{JOB_SUFFIX}{CLAIM_MARK}*"):
+        job_name, _, owner = claimed.name.partition(CLAIM_MARK)
+        owner_host, _, pid = owner.rpartition("-")
+        if owner_host == host and pid.isdigit():
+            stale = not pid_alive(int(pid))
+        else:
+            try:
+                stale = stale_after is not None and now - claimed.stat().st_mtime > stale_after
+            except OSError:
+                continue
+        if not stale:
+            continue
+        try:
+            os.rename(claimed, claimed.with_name(job_name))
+        except OSError:
+            continue
+        requeued.append(claimed.with_name(job_name))
+    return requeued
+
+
+def _in_spool(spool: Path, value: object) -> str:
+    path = Path(str(value).strip()).expanduser()
+    return str(path if path.is_absolute() else spool / path)
+
+
+def run_claimed(claimed: Path, *, cache_dir: str | None = None, heartbeat: float = HEARTBEAT_INTERVAL) -> SpoolOutcome:
+    """Run a claimed job, touching the claim every ``heartbeat`` seconds, and publish its result, metrics and final state."""
+    job_name = claimed.name.partition(CLAIM_MARK)[0]
+    job_id = job_name[: -len(JOB_SUFFIX)]
+    spool = claimed.parent
+    started = time.time()
+    t0 = time.perf_counter()
+    record: dict = {"job": job_id, "host": socket.gethostname(), "pid": os.getpid(), "started": started}
+    metrics = None
+    try:
+        with _heartbeat(claimed, heartbeat):
+            job = json.loads(claimed.read_text(encoding="utf-8"))
+            if not isinstance(job, dict) or not isinstance(job.get("state"), dict):
+                raise ValueError("job must be an object with a 'state' object")
+            state = job["state"]
+            if job.get("output_dir"):
+                state["project"] = {**(state.get("project") or {}), "output_dir": str(job["output_dir"])}
+            # Relative paths mean the same thing on every worker: relative to the spool.
+            for section, key in (("project", "output_dir"), ("project", "dut_path"), ("top", "dut_path")):
+                block = state.get(section)
+                if isinstance(block, dict) and str(block.get(key) or "").strip():
+                    block[key] = _in_spool(spool, block[key])
+            fill_dut_info(state)
+            errors = validate_state(state)
+            if errors:
+                raise ValueError("; ".join(errors))
+            result = generate_project(state, cache_dir=job.get("cache_dir") or cache_dir)
+        record.update(ok=True, result=result.to_dict())
+        metrics = result.metrics
+    except Exception as exc:
+        record.update(ok=False, error=f"{type(exc).__name__}: {exc}", traceback=traceback.format_exc())
+    seconds = time.perf_counter() - t0
+    record.update(finished=time.time(), seconds=round(seconds, 6))
+    if isinstance(record.get("result"), dict):
+        record["result"].pop("metrics", None)
+
+    # requeue_stale elsewhere may have taken the job back (e.g. after a long
+    # pause); then whoever runs it next publishes the result, not us.
+    lost = SpoolOutcome(job_id=job_id, ok=False, seconds=seconds, error="lost claim: the job was requeued while running")
+    if not claimed.exists():
+        return lost
+    _write_json(spool / f"{job_id}.result.json", record)
+    if metrics is not None:
+        _write_json(spool / f"{job_id}.metrics.json", metrics.to_dict())
+    try:
+        os.replace(claimed, spool / f"{job_name}.{'done' if record['ok'] else 'failed'}")
+    except FileNotFoundError:
+        return lost
+    return SpoolOutcome(job_id=job_id, ok=record["ok"], seconds=seconds, error=record.get("error", ""))
+
+
+def run_worker(
+    spool_dir: str | Path,
+    *,
+    once: bool = False,
+    poll_interval: float = 1.0,
+    cache_dir: str | None = None,
+    stale_after: float | None = None,
+    heartbeat: float = HEARTBEAT_INTERVAL,
+    on_outcome: Callable[[SpoolOutcome], None] | None = None,
+) -> int:
+    """Drain ``spool_dir``; with ``once`` stop when it is empty, otherwise keep polling.
+
+    Returns the number of jobs this worker ran. Raises ValueError unless
+    ``stale_after`` is more than twice ``heartbeat``: anything shorter would
+    requeue jobs that are still running.
+    """
+    if stale_after is not None and stale_after <= 2 * heartbeat:
+        raise ValueError(f"stale_after ({stale_after:g}s) must be more than twice the heartbeat ({heartbeat:g}s)")
+    spool = Path(spool_dir)
+    spool.mkdir(parents=True, exist_ok=True)
+    done = 0
+    requeue_stale(spool, stale_after=stale_after)
+    while True:
+        claimed = claim_next(spool)
+        if claimed is None:
+            if once:
+                return done
+            time.sleep(poll_interval)
+            requeue_stale(spool, stale_after=stale_after)
+            continue
+        outcome = run_claimed(claimed, cache_dir=cache_dir, heartbeat=heartbeat)
+        done += 1
+        if on_outcome is not None:
+            on_outcome(outcome)
@@ -1,12 +1,207 @@
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from .schema import check_state, parse_slice
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; copy it (dict(x), list(x)) before changing it")
+
+
+class FrozenDict(dict):
+    """A dict that refuses changes. StateManager stores every value frozen, so
+    one snapshot can be handed to every listener without copying.
+
+    ``copy.deepcopy`` (and pickling) give back an ordinary mutable dict.
+    """
+
+    __slots__ = ("_fp",)  # memoized fingerprint(); safe because the contents never change
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    __slots__ = ("_fp",)
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __copy__(self):
+        return list(self)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+_MISSING = object()
+
+
+def freeze(value, like=_MISSING):
+    """Return ``value`` with dicts/lists (recursively) replaced by frozen ones.
+
+    Already-frozen containers are returned as they are, so a value built from
+    an earlier snapshot shares its unchanged parts with it. Parts equal to
+    the matching part of ``like`` (usually the previous value) are replaced
+    by it, so "unchanged" can be checked with ``is``.
+    """
+    if value is like:
+        return value
+    if isinstance(value, dict):
+        same = isinstance(like, FrozenDict)
+        old = like if same else {}
+        items = [(k, freeze(v, old.get(k, _MISSING))) for k, v in value.items()]
+        if same and len(items) == len(old) and all(k in old and v is old[k] for k, v in items):
+            return like
+        if isinstance(value, FrozenDict) and all(v is value[k] for k, v in items):
+            return value
+        return FrozenDict(items)
+    if isinstance(value, (list, tuple)):
+        same = isinstance(like, FrozenList)
+        old = like if same else ()
+        items = [freeze(v, old[i] if i < len(old) else _MISSING) for i, v in enumerate(value)]
+        if same and len(items) == len(old) and all(a is b for a, b in zip(items, old)):
+            return like
+        if isinstance(value, FrozenList) and all(a is b for a, b in zip(items, value)):
+            return value
+        return FrozenList(items)
+    if like is not _MISSING and type(like) is type(value) and like == value:
+        return like
+    return value
+
+
+def lookup(snapshot, path, default=None):
+    """The value at a dotted ``path`` ("interface.signals", "agent.include_components.driver")."""
+    value = snapshot
+    for part in path.split(".") if isinstance(path, str) else path:
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        elif isinstance(value, list) and str(part).isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return default
+        if value is _MISSING:
+            return default
+    return value
+
+
+def fingerprint(value):
+    """Content hash of a state value: equal values (dict order aside) hash equal.
+
+    Frozen containers remember their own hash, and a changed value shares
+    its unchanged parts with the previous one, so re-fingerprinting after a
+    change only hashes the containers on the changed path.
+    """
+    if isinstance(value, (FrozenDict, FrozenList)):
+        try:
+            return value._fp
+        except AttributeError:
+            pass
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(value, dict):
+        h.update(b"d")
+        for k in sorted(value, key=str):
+            h.update(json.dumps(str(k)).encode("utf-8"))
+            h.update(fingerprint(value[k]).encode("ascii"))
+    elif isinstance(value, (list, tuple)):
+        h.update(b"l")
+        for v in value:
+            h.update(fingerprint(v).encode("ascii"))
+    else:
+        h.update(b"v" + json.dumps(value, default=str).encode("utf-8"))
+    digest = h.hexdigest()
+    if isinstance(value, (FrozenDict, FrozenList)):
+        value._fp = digest
+    return digest
+
+
+def thaw(value):
+    """Return a plain, mutable deep copy of a (possibly frozen) value."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class ListenerStats:
+    """What ``StateManager.instrument()`` measured for one listener.
+
+    Bound methods are counted per class and method, so every open form of
+    the same kind adds up in one row.
+    """
+
+    name: str
+    kind: str  # "any", "key", "path" or "changes": how it subscribed
+    calls: int
+    total_seconds: float
+    max_seconds: float
+    errors: int
+    last_error: str = ""
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+def _listener_name(cb):
+    owner = getattr(cb, "__self__", None)
+    func = getattr(cb, "__func__", cb)
+    if owner is not None:
+        return f"{type(owner).__module__}.{type(owner).__qualname__}.{func.__name__}"
+    return f"{getattr(func, '__module__', '?')}.{getattr(func, '__qualname__', repr(func))}"
+
+
 class StateManager:
     _instance = None
 
-    def __init__(self):
-        if StateManager._instance is not None:
+    def __init__(self, *, detached=False):
+        # detached=True builds another project's state (see utils.workspace);
+        # get_instance() keeps returning the active one.
+        if StateManager._instance is not None and not detached:
             raise Exception("This is a singleton class. Use get_instance().")
-        self.state = {}
+        # Never changed in place: every change swaps in a new FrozenDict that
+        # shares the untouched values with the previous one.
+        self.state = FrozenDict()
         self._listeners = []
         self._key_listeners = {}
+        self._change_listeners = []
+        self._path_listeners = {}  # (path as given, path as tuple) -> callbacks
+        self._notified = self.state  # snapshot the listeners last saw
+        self._version = 0
+        self._key_versions = {}
+        self._batch_depth = 0
+        self._pending = {}  # key -> value set inside the open batch
+        self._pending_reset = False  # clear()/load() inside the open batch
+        # Writers (and a whole batch) hold the lock; readers just take the
+        # current frozen snapshot, which is swapped in with one assignment.
+        self._lock = threading.RLock()
+        self._dispatch = None
+        self._dispatch_thread = None
+        # Notifications wait here in change order; one thread at a time
+        # delivers them, so listeners never see changes out of order.
+        self._outbox = deque()
+        self._delivering = threading.Lock()
+        self._stats = None  # (kind, name) -> [calls, total, max, errors, last error]; None when off
+        self._slow_seconds = 0.0
+        self._log = None
 
     @staticmethod
     def get_instance():
@@ -14,35 +209,289 @@ class StateManager:
             StateManager._instance = StateManager()
         return StateManager._instance
 
+    @staticmethod
+    def set_instance(manager):
+        """Make ``manager`` what get_instance() returns, e.g. when switching projects."""
+        StateManager._instance = manager
+
     def set(self, key, value):
-        self.state[key] = value
-        self._notify(key, value)
+        """Store ``value`` under ``key``; slices with a schema (see utils.schema) are validated first.
+
+        Raises ``schema.SchemaError`` (a ValueError) for a malformed slice and
+        leaves the state unchanged.
+        """
+        parse_slice(key, value)
+        with self._lock:
+            old = self.state.get(key, _MISSING)
+            value = freeze(value, old)
+            if value is old:
+                return  # equal to what is stored: nothing to tell anyone
+            self.state = FrozenDict({**self.state, key: value})
+            self._version += 1
+            self._key_versions[key] = self._version
+            if self._batch_depth:
+                self._pending.pop(key, None)  # keep keys in last-changed order
+                self._pending[key] = value
+                return
+            self._note(key, value)
+        self._deliver()
 
     def get(self, key, default=None):
         return self.state.get(key, default)
 
     def get_all(self):
-        return self.state.copy()
+        # Shallow and mutable, for callers that tweak a key before rendering;
+        # read-only callers should use snapshot().
+        return dict(self.state)
+
+    def snapshot(self):
+        """The current state as a read-only mapping; cheap, and stable after later changes."""
+        return self.state
+
+    def version(self, key=None):
+        """A counter that grows with every change: to the whole state, or to one top-level key.
+
+        Two equal readings mean nothing (or nothing under ``key``) changed in
+        between; a key that was never set reads 0.
+        """
+        if key is None:
+            return self._version
+        return self._key_versions.get(key, 0)
+
+    def fingerprint(self, key=None):
+        """``fingerprint()`` of the whole state or of one top-level key.
+
+        Unlike ``version``, this matches across sessions and after reloading
+        the same project. Cached per value, so repeated calls are O(1).
+        """
+        if key is None:
+            return fingerprint(self.state)
+        return fingerprint(self.state.get(key))
 
     def clear(self):
-        self.state.clear()
-        self._notify(None, None)
+        self._replace(FrozenDict())
+
+    def load(self, state):
+        # Replace everything at once (project open / recovery / undo): one
+        # notification, like clear(). An earlier snapshot is put back as is;
+        # anything else is validated first (SchemaError leaves the state as it was).
+        if not isinstance(state, FrozenDict):
+            check_state(state)
+        with self._lock:
+            if not isinstance(state, FrozenDict):
+                state = freeze(dict(state), self.state)
+            self._replace(state)
+
+    def _replace(self, new):
+        with self._lock:
+            old, self.state = self.state, new
+            self._version += 1
+            for key in set(old) | set(new):
+                if old.get(key, _MISSING) is not new.get(key, _MISSING):
+                    self._key_versions[key] = self._version
+            if self._batch_depth:
+                self._pending_reset = True
+                self._pending.clear()
+                return
+            self._note(None, None)
+        self._deliver()
+
+    @contextmanager
+    def batch(self):
+        """Group changes so listeners hear about them once, when the outermost batch ends.
+
+        ``get()`` inside the batch already sees the new values. A batch that
+        changed one key notifies exactly like a plain ``set()``; one that
+        changed several notifies ``subscribe`` listeners once with key None
+        (like ``load()``), each ``subscribe_key`` listener once, and
+        ``subscribe_changes`` listeners with the changed keys.
+
+        The batch holds the state lock, so other threads' changes wait for it
+        rather than landing in the middle of it.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    pending, reset = self._pending, self._pending_reset
+                    self._pending, self._pending_reset = {}, False
+                    if reset:
+                        self._note(None, None)
+                    elif len(pending) == 1:
+                        self._note(*next(iter(pending.items())))
+                    elif pending:
+                        self._note(None, None, tuple(pending))
+        self._deliver()
+
+    def set_dispatcher(self, dispatch, thread=None):
+        """Run listeners for changes made off ``thread`` (default: the caller's) via ``dispatch(fn)``.
+
+        The GUI passes a function that schedules ``fn`` on the Tk loop, so
+        worker threads can change the state while listeners (which touch
+        widgets) still only run on the Tk thread. ``dispatch=None`` restores
+        calling listeners on whatever thread made the change.
+        """
+        self._dispatch = dispatch
+        self._dispatch_thread = thread or threading.current_thread()
+
+    def _disposer(self, callbacks, callback, registry=None, key=None):
+        def unsubscribe():
+            with self._lock:
+                for i, cb in enumerate(callbacks):
+                    if cb is callback:
+                        del callbacks[i]
+                        break
+                if registry is not None and not callbacks and registry.get(key) is callbacks:
+                    del registry[key]
+
+        return unsubscribe
+
+    # Every subscribe* returns a function that removes the listener again;
+    # forms call it when they are destroyed (see ui.release_on_destroy).
 
     def subscribe(self, callback):
-        self._listeners.append(callback)
+        with self._lock:
+            self._listeners.append(callback)
+        return self._disposer(self._listeners, callback)
 
     def subscribe_key(self, key, callback):
-        self._key_listeners.setdefault(key, []).append(callback)
+        with self._lock:
+            callbacks = self._key_listeners.setdefault(key, [])
+            callbacks.append(callback)
+        return self._disposer(callbacks, callback, self._key_listeners, key)
 
-    def _notify(self, key, value):
-        for cb in list(self._listeners):
+    def subscribe_path(self, path, callback):
+        """Call ``callback(path, value, snapshot)`` when the value at ``path`` changes.
+
+        ``path`` is dotted ("interface.signals") or a tuple of keys, for keys
+        that contain dots (``("custom_files", "src/top.sv")``).
+
+        Equal values are stored as the same objects (see ``freeze``), so this
+        costs an identity check per change instead of a deep comparison, and
+        re-saving an unchanged form notifies nobody.
+        """
+        parts = tuple(path.split(".")) if isinstance(path, str) else tuple(path)
+        entry = (path, parts)
+        with self._lock:
+            callbacks = self._path_listeners.setdefault(entry, [])
+            callbacks.append(callback)
+        return self._disposer(callbacks, callback, self._path_listeners, entry)
+
+    def subscribe_changes(self, callback):
+        """Call ``callback(keys, snapshot)`` once per change or batch.
+
+        ``keys`` is a tuple of the changed keys, or None when the whole state
+        was replaced (``clear()``/``load()``).
+        """
+        with self._lock:
+            self._change_listeners.append(callback)
+        return self._disposer(self._change_listeners, callback)
+
+    def instrument(self, slow_seconds=0.016, log=None):
+        """Start timing listeners; see ``listener_stats()``. Restarts the counts.
+
+        A call slower than ``slow_seconds`` (default: one 60 Hz frame) or one
+        that raises is reported through ``log(message)``, by default a
+        warning on this module's logger. Off by default: without it a failing
+        listener is skipped silently.
+        """
+        with self._lock:
+            self._slow_seconds = slow_seconds
+            self._log = log or logging.getLogger(__name__).warning
+            self._stats = {}
+
+    def uninstrument(self):
+        with self._lock:
+            self._stats = None
+
+    @property
+    def instrumented(self):
+        return self._stats is not None
+
+    def listener_stats(self):
+        """``ListenerStats`` per listener since ``instrument()``, slowest in total first."""
+        stats = self._stats or {}
+        rows = [
+            ListenerStats(name, kind, calls, total, longest, errors, last_error)
+            for (kind, name), (calls, total, longest, errors, last_error) in list(stats.items())
+        ]
+        return sorted(rows, key=lambda r: r.total_seconds, reverse=True)
+
+    def _call(self, kind, cb, *args):
+        stats = self._stats
+        if stats is None:
             try:
-                cb(key, value, self.get_all())
+                cb(*args)
             except Exception:
                 pass
-        if key is not None:
-            for cb in list(self._key_listeners.get(key, [])):
-                try:
-                    cb(key, value, self.get_all())
-                except Exception:
-                    pass
+            return
+        error = None
+        start = time.perf_counter()
+        try:
+            cb(*args)
+        except Exception as exc:
+            error = exc
+        elapsed = time.perf_counter() - start
+        # Only the delivering thread gets here (see _drain), so no lock.
+        name = _listener_name(cb)
+        row = stats.setdefault((kind, name), [0, 0.0, 0.0, 0, ""])
+        row[0] += 1
+        row[1] += elapsed
+        row[2] = max(row[2], elapsed)
+        if error is not None:
+            row[3] += 1
+            row[4] = f"{type(error).__name__}: {error}"
+            self._log(f"state listener {name} raised {row[4]}")
+        elif elapsed > self._slow_seconds:
+            self._log(f"state listener {name} took {elapsed * 1000:.1f} ms ({kind}, args {args[0]!r})")
+
+    def _note(self, key, value, keys=None):
+        # Called with the lock held: fixes what this notification reports, in
+        # change order, even if it is delivered later on another thread.
+        previous, self._notified = self._notified, self.state
+        if keys is None and key is not None:
+            keys = (key,)
+        self._outbox.append((key, value, keys, self.state, previous))
+
+    def _deliver(self):
+        dispatch = self._dispatch
+        if dispatch is not None and threading.current_thread() is not self._dispatch_thread:
+            dispatch(self._drain)
+        else:
+            self._drain()
+
+    def _drain(self):
+        # A listener that changes the state queues a note that is delivered
+        # right after the current one instead of nested inside it.
+        while self._outbox:
+            if not self._delivering.acquire(blocking=False):
+                return  # the thread delivering now will pick ours up
+            try:
+                while True:
+                    try:
+                        note = self._outbox.popleft()
+                    except IndexError:
+                        break
+                    self._notify(*note)
+            finally:
+                self._delivering.release()
+
+    def _notify(self, key, value, keys, snapshot, previous):
+        for cb in list(self._listeners):
+            self._call("any", cb, key, value, snapshot)
+        for k in keys or ():
+            for cb in list(self._key_listeners.get(k, [])):
+                self._call("key", cb, k, snapshot.get(k), snapshot)
+        for (path, parts), callbacks in list(self._path_listeners.items()):
+            if keys is not None and parts[0] not in keys:
+                continue
+            new = lookup(snapshot, parts, _MISSING)
+            if new is lookup(previous, parts, _MISSING):
+                continue
+            for cb in list(callbacks):
+                self._call("path", cb, path, None if new is _MISSING else new, snapshot)
+        for cb in list(self._change_listeners):
+            self._call("changes", cb, keys, snapshot)
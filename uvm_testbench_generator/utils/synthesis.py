@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import copy
+from pathlib import Path
+import re
+
+from .verilog_parser import extract_module_info, extract_module_info_cached
+
+
+def _guess_signal(candidates: list[str], needles: tuple[str, ...]) -> str:
+    for needle in needles:
+        for c in candidates:
+            if needle in c.lower():
+                return c
+    return ""
+
+
+def _field_type(width: str) -> str:
+    try:
+        w = int(str(width))
+    except Exception:
+        return f"bit {width}"
+    return "bit" if w == 1 else f"bit [{w - 1}:0]"
+
+
+def deep_merge(base: dict, overrides: dict) -> dict:
+    """Return ``base`` with ``overrides`` merged in; nested dicts merge, everything else replaces."""
+    out = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = deep_merge(out[key], value)
+        else:
+            out[key] = copy.deepcopy(value)
+    return out
+
+
+def state_from_module_info(
+    info: dict, *, dut_path: str = "", project_name: str = "", output_dir: str = ""
+) -> dict:
+    """Build a complete generator state from parsed DUT info.
+
+    Mirrors what the GUI produces when every page is imported and saved with
+    its defaults, except that class names are prefixed with the module name
+    and clock/reset are left out of the transaction fields.
+    """
+    module = str(info.get("module_name") or "dut")
+    prefix = re.sub(r"[^A-Za-z0-9_]+", "_", module).strip("_") or "dut"
+    signals = [
+        {
+            "direction": str(s.get("direction", "input")),
+            "name": str(s.get("name", "")),
+            "width": str(s.get("width", "1")),
+        }
+        for s in info.get("signals", []) or []
+        if s.get("name")
+    ]
+    inputs = [s["name"] for s in signals if s["direction"] == "input"]
+    clock = _guess_signal(inputs, ("clk", "clock"))
+    reset = _guess_signal(inputs, ("rst", "reset"))
+
+    txn = f"{prefix}_txn"
+    agent = f"{prefix}_agent"
+    env = f"{prefix}_env"
+    seq = f"{prefix}_seq"
+    test = f"{prefix}_test"
+    intf = f"{prefix}_if"
+    components = {"sequencer": True, "driver": True, "monitor": True}
+
+    return {
+        "project": {
+            "project_name": project_name or prefix,
+            "output_dir": output_dir,
+            "dut_path": dut_path,
+            "module_name": module,
+            "dut_info": info,
+        },
+        "interface": {
+            "name": intf,
+            "clock": clock,
+            "reset": reset,
+            "signals": signals,
+            "modports": {},
+        },
+        "transaction": {
+            "class_name": txn,
+            "base_class": "uvm_sequence_item",
+            "fields": [
+                {
+                    "rand": s["direction"] == "input",
+                    "type": _field_type(s["width"]),
+                    "name": s["name"],
+                    "default": "0",
+                }
+                for s in signals
+                if s["name"] not in (clock, reset)
+            ],
+            "constraints": [],
+        },
+        "agent": {
+            "agent_name": agent,
+            "type": "active",
+            "agent_type": "active",
+            "transaction": txn,
+            "include_components": dict(components),
+            "components": dict(components),
+            "use_custom_code": False,
+        },
+        "scoreboard": {
+            "name": f"{prefix}_scoreboard",
+            "transaction": txn,
+            "use_expected_queue": True,
+            "compare_mode": "uvm_compare",
+            "enable_coverage": False,
+            "fields": [],
+        },
+        "environment": {"name": env, "include_agent": True, "include_scoreboard": True},
+        "sequence": {"name": seq, "transaction_class": txn, "steps": []},
+        "test": {
+            "name": test,
+            "base_class": "uvm_test",
+            "create_env": True,
+            "start_sequence": True,
+            "sequence_name": seq,
+            "raise_objection": True,
+            "print_topology": False,
+        },
+        "top": {
+            "name": f"{prefix}_tb_top",
+            "dut_module": module,
+            "dut_path": dut_path,
+            "interface": intf,
+            "test": test,
+        },
+    }
+
+
+def state_from_dut(dut_path: str | Path, **kwargs: str) -> dict:
+    path = str(dut_path)
+    return state_from_module_info(extract_module_info(path), dut_path=path, **kwargs)
+
+
+def fill_dut_info(state: dict) -> None:
+    """Parse ``project.dut_path`` into ``dut_info``/``module_name`` if that hasn't happened yet.
+
+    The GUI does this when Project Details are saved; hand-written state files
+    often only name the DUT file.
+    """
+    project = state.get("project")
+    if not isinstance(project, dict):
+        return
+    dut_path = str(project.get("dut_path") or "").strip()
+    if not dut_path or project.get("module_name"):
+        return
+    info = extract_module_info_cached(dut_path)
+    project["dut_info"] = info
+    project["module_name"] = info["module_name"]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import re
+import threading
+from typing import Callable, Iterable, Iterator, Mapping, Union
+
+# Only the braced form is recognised so SystemVerilog system tasks such as
+# `$display` or `$sformatf` pass through templates untouched.
+_PLACEHOLDER = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+TEMPLATE_SUFFIX = ".tpl"
+TEMPLATE_DIRS_ENV = "TBGEN_TEMPLATES"
+
+ContextValue = Union[str, Callable[[], str]]
+
+
+class TemplateError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    path: Path
+    segments: tuple[tuple[bool, str], ...]
+    names: frozenset[str]
+
+    def render(self, context: Mapping[str, ContextValue]) -> Iterator[str]:
+        missing = self.names - context.keys()
+        if missing:
+            raise TemplateError(f"{self.path}: unknown placeholder(s): {', '.join(sorted(missing))}")
+        for is_name, text in self.segments:
+            if not is_name:
+                yield text
+                continue
+            value = context[text]
+            yield value() if callable(value) else value
+
+
+def compile_template(text: str, path: Path) -> CompiledTemplate:
+    segments: list[tuple[bool, str]] = []
+    names: set[str] = set()
+    pos = 0
+    for m in _PLACEHOLDER.finditer(text):
+        if m.start() > pos:
+            segments.append((False, text[pos : m.start()]))
+        segments.append((True, m.group(1)))
+        names.add(m.group(1))
+        pos = m.end()
+    if pos < len(text):
+        segments.append((False, text[pos:]))
+    return CompiledTemplate(path=path, segments=tuple(segments), names=frozenset(names))
+
+
+_cache: dict[Path, tuple[int, int, CompiledTemplate]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_template(path: Path) -> CompiledTemplate | None:
+    """Return the compiled template at ``path``; recompiled only when the file changes."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        hit = _cache.get(path)
+    if hit is not None and hit[:2] == key:
+        return hit[2]
+    try:
+        text = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as exc:
+        raise TemplateError(f"{path}: {exc}") from exc
+    compiled = compile_template(text, path)
+    with _cache_lock:
+        _cache[path] = (key[0], key[1], compiled)
+    return compiled
+
+
+def template_dirs(project_dir: str | None = None) -> list[Path]:
+    """Project template directory first, then any from ``$TBGEN_TEMPLATES``."""
+    dirs: list[Path] = []
+    if project_dir and project_dir.strip():
+        dirs.append(Path(project_dir.strip()).expanduser())
+    for raw in os.environ.get(TEMPLATE_DIRS_ENV, "").split(os.pathsep):
+        if raw.strip():
+            dirs.append(Path(raw.strip()).expanduser())
+    return dirs
+
+
+def find_template(dirs: Iterable[Path], rel_path: Path) -> CompiledTemplate | None:
+    for d in dirs:
+        compiled = load_template(d / (rel_path.as_posix() + TEMPLATE_SUFFIX))
+        if compiled is not None:
+            return compiled
+    return None
@@ -4,6 +4,17 @@ import tkinter as tk
 from tkinter import ttk
 
 
+def release_on_destroy(widget: tk.Misc, *disposers) -> None:
+    """Call ``disposers`` (what ``StateManager.subscribe*`` returns) when ``widget`` is destroyed."""
+
+    def on_destroy(event) -> None:
+        if event.widget is widget:
+            for dispose in disposers:
+                dispose()
+
+    widget.bind("<Destroy>", on_destroy, add="+")
+
+
 def app_bg(widget: tk.Misc, fallback: str = "#f5f7fb") -> str:
     try:
         return str(widget.winfo_toplevel().cget("bg"))
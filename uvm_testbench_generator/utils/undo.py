@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from collections import deque
+import sys
+
+from .state import FrozenDict, FrozenList, StateManager
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_STEPS = 500
+
+
+def _new_bytes(value, previous) -> int:
+    """Approximate bytes held by ``value`` but not shared with ``previous``.
+
+    Snapshots share every unchanged container (see ``state.freeze``), so this
+    only walks the parts that changed.
+    """
+    if value is previous:
+        return 0
+    if isinstance(value, FrozenDict):
+        old = previous if isinstance(previous, FrozenDict) else {}
+        return sys.getsizeof(value) + sum(_new_bytes(v, old.get(k)) for k, v in value.items())
+    if isinstance(value, FrozenList):
+        old = previous if isinstance(previous, FrozenList) else ()
+        return sys.getsizeof(value) + sum(
+            _new_bytes(v, old[i] if i < len(old) else None) for i, v in enumerate(value)
+        )
+    return sys.getsizeof(value)
+
+
+class UndoHistory:
+    """Undo/redo for a StateManager, one step per notification.
+
+    A ``state.batch()`` notifies once, so it is undone as one step. Each
+    step keeps a whole snapshot, but snapshots share unchanged values, so a
+    step only costs the values that changed; that cost is estimated when the
+    step is recorded and the oldest steps are dropped once ``max_bytes`` or
+    ``max_steps`` is exceeded.
+    """
+
+    def __init__(
+        self,
+        manager: StateManager,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_steps: int = DEFAULT_MAX_STEPS,
+    ) -> None:
+        self.manager = manager
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+        # (snapshot, bytes it holds beyond its newer neighbour), oldest first
+        self._undo: deque = deque()
+        self._redo: list = []
+        self._bytes = 0
+        self._current = manager.snapshot()
+        self._restoring = None  # snapshot an undo/redo is putting back
+        manager.subscribe_changes(self._on_change)
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def reset(self) -> None:
+        """Forget all steps, e.g. after opening another project."""
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+        self._current = self.manager.snapshot()
+
+    def _on_change(self, _keys, snapshot) -> None:
+        if snapshot is self._current:
+            return
+        if snapshot is self._restoring:
+            self._restoring = None
+            self._current = snapshot
+            return
+        cost = _new_bytes(self._current, snapshot)
+        self._undo.append((self._current, cost))
+        self._bytes += cost
+        self._bytes -= sum(c for _s, c in self._redo)
+        self._redo.clear()
+        self._current = snapshot
+        while self._undo and (len(self._undo) > self.max_steps or self._bytes > self.max_bytes):
+            _s, c = self._undo.popleft()
+            self._bytes -= c
+
+    def _restore(self, snapshot) -> None:
+        self._restoring = snapshot
+        self._current = snapshot
+        self.manager.load(snapshot)
+
+    def undo(self) -> bool:
+        if not self._undo:
+            return False
+        snapshot, cost = self._undo.pop()
+        self._redo.append((self._current, _new_bytes(self._current, snapshot)))
+        self._bytes += self._redo[-1][1] - cost
+        self._restore(snapshot)
+        return True
+
+    def redo(self) -> bool:
+        if not self._redo:
+            return False
+        snapshot, cost = self._redo.pop()
+        self._undo.append((self._current, _new_bytes(self._current, snapshot)))
+        self._bytes += self._undo[-1][1] - cost
+        self._restore(snapshot)
+        return True
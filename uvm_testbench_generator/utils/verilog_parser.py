@@ -1,4 +1,7 @@
+import copy
+import os
 import re
+import threading
 
 def extract_parameters(file_path):
     with open(file_path, "r") as file:
@@ -79,3 +82,28 @@ def extract_module_info(file_path):
         "parameters": parameters,
         "signals": signals
     }
+
+
+_info_cache = {}
+_info_cache_lock = threading.Lock()
+
+
+def extract_module_info_cached(file_path):
+    """extract_module_info, reusing the previous parse while the file's mtime and size are unchanged."""
+    st = os.stat(file_path)
+    key = os.path.abspath(file_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _info_cache_lock:
+        hit = _info_cache.get(key)
+    if hit is None or hit[0] != stamp:
+        hit = (stamp, extract_module_info(file_path))
+        with _info_cache_lock:
+            _info_cache[key] = hit
+    return copy.deepcopy(hit[1])
+
+
+def prime_module_info(file_path, info):
+    """Seed the extract_module_info_cached cache with a known parse of file_path (e.g. from a bundle)."""
+    st = os.stat(file_path)
+    with _info_cache_lock:
+        _info_cache[os.path.abspath(file_path)] = ((st.st_mtime_ns, st.st_size), copy.deepcopy(info))
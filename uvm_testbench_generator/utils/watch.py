@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable
+
+from .generator import STATE_SNAPSHOT, GenerationResult, generate_project, validate_state
+from .project_io import load_project
+from .renderers import registry
+from .synthesis import fill_dut_info
+from .templates import TEMPLATE_SUFFIX, template_dirs
+
+Stamp = tuple[int, int]
+
+# Keys that can change any file: the output location and names, overrides
+# and custom agent files (which no renderer declares).
+_WHOLE_TREE_KEYS = frozenset({"project", "custom_files", "custom_files_enabled", "agent_code"})
+# Files that list or snapshot the whole tree.
+_TREE_FILES = ("manifest.json", STATE_SNAPSHOT.as_posix(), "filelist.f", "README.md", "src/tb_pkg.sv")
+
+
+def _stamp(path: Path) -> Stamp | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def watched_paths(state_path: Path, state: dict | None) -> list[Path]:
+    """The state file, every DUT it names and every template that could apply."""
+    paths = [state_path]
+    if state:
+        project = state.get("project", {}) or {}
+        for section in ("project", "top"):
+            dut = str((state.get(section, {}) or {}).get("dut_path") or "").strip()
+            if dut and Path(dut) not in paths:
+                paths.append(Path(dut))
+        for d in template_dirs(project.get("template_dir")):
+            paths.append(d)  # the directory stamp catches added/removed templates
+            if d.is_dir():
+                paths.extend(sorted(d.rglob("*" + TEMPLATE_SUFFIX)))
+    return paths
+
+
+def snapshot(paths: list[Path]) -> dict[Path, Stamp | None]:
+    return {p: _stamp(p) for p in paths}
+
+
+def outputs_to_rebuild(old: dict | None, new: dict) -> list[str] | None:
+    """Paths a change of the state from ``old`` to ``new`` can affect; None means all of them."""
+    if old is None or template_dirs((new.get("project") or {}).get("template_dir")):
+        return None  # templates see most of the state
+    changed = {k for k in old.keys() | new.keys() if old.get(k) != new.get(k)}
+    if changed & _WHOLE_TREE_KEYS:
+        return None
+    if "agent" in changed and any((s.get("agent") or {}).get("use_custom_code") for s in (old, new)):
+        return None
+    return [*_TREE_FILES, *(f"src/{name}" for name in registry.affected(changed))]
+
+
+def _load(state_path: Path, output_dir: str | None) -> dict:
+    state = load_project(state_path)
+    if output_dir:
+        state["project"] = {**(state.get("project") or {}), "output_dir": output_dir}
+    fill_dut_info(state)
+    errors = validate_state(state)
+    if errors:
+        raise ValueError("; ".join(errors))
+    return state
+
+
+def watch(
+    state_path: str | Path,
+    *,
+    output_dir: str | None = None,
+    cache_dir: str | None = None,
+    interval: float = 0.2,
+    debounce: float = 0.3,
+    on_result: Callable[[GenerationResult, float], None] | None = None,
+    on_error: Callable[[Exception], None] | None = None,
+    stop: threading.Event | None = None,
+) -> None:
+    """Regenerate whenever the state file, its DUT or a template changes.
+
+    Watched files are polled with ``stat`` every ``interval`` seconds. A burst
+    of saves is folded into one regeneration once nothing has changed for
+    ``debounce`` seconds. Only outputs whose renderers read a changed state
+    key are rendered (all of them after a DUT or template edit), and of those
+    only the ones whose content changed are rewritten. Runs until ``stop`` is
+    set.
+    """
+    state_path = Path(state_path)
+    stop = stop or threading.Event()
+    state: dict | None = None
+    seen: dict[Path, Stamp | None] = {}
+    built: tuple[dict | None, dict[Path, Stamp | None]] = (None, {})  # state and stamps of the last good build
+    pending_since: float | None = 0.0  # regenerate once at start-up
+
+    while not stop.is_set():
+        current = snapshot(watched_paths(state_path, state))
+        now = time.monotonic()
+        if current != seen:
+            seen = current
+            pending_since = now
+        elif pending_since is not None and now - pending_since >= debounce:
+            pending_since = None
+            t0 = time.perf_counter()
+            good = False
+            try:
+                state = _load(state_path, output_dir)
+                others = any(stamp != built[1].get(p) for p, stamp in current.items() if p != state_path)
+                only = None if others else outputs_to_rebuild(built[0], state)
+                result = generate_project(state, cache_dir=cache_dir, incremental=True, only=only)
+            except (OSError, ValueError) as exc:
+                if on_error is not None:
+                    on_error(exc)
+            else:
+                good = True
+                if on_result is not None:
+                    on_result(result, time.perf_counter() - t0)
+            # The state may now name a different DUT or template directory. Keep
+            # the pre-build stamps of known paths so edits made meanwhile count.
+            seen = {p: current[p] if p in current else _stamp(p) for p in watched_paths(state_path, state)}
+            if good:
+                built = (state, seen)
+        stop.wait(interval)
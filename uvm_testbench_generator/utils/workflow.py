@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from enum import Enum
+import weakref
 
 
 class Status(str, Enum):
@@ -183,3 +184,25 @@ def compute_module_statuses(state: dict) -> dict[str, ModuleStatus]:
 
     return statuses
 
+
+
+# Top-level state keys compute_module_statuses reads.
+STATUS_KEYS = ("project", "interface", "transaction", "agent", "scoreboard", "environment", "sequence", "test", "top")
+
+_statuses_memo: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()  # manager -> (versions, statuses)
+
+
+def module_statuses(manager) -> dict[str, ModuleStatus]:
+    """compute_module_statuses for a StateManager, recomputed only when a key it reads changed.
+
+    The footer, sidebar, dashboard and state machine view all ask after every
+    change; this answers them from one computation. Treat the result as
+    read-only. Each manager (one per open workspace project) keeps its own
+    entry, so switching projects does not throw the others away.
+    """
+    versions, statuses = _statuses_memo.get(manager, (None, None))
+    current = tuple(manager.version(k) for k in STATUS_KEYS)
+    if versions != current:
+        statuses = compute_module_statuses(manager.snapshot())
+        _statuses_memo[manager] = (current, statuses)
+    return statuses
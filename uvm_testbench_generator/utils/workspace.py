@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import itertools
+from pathlib import Path
+import shutil
+import tempfile
+from typing import Any, Callable
+
+from .project_io import PROJECT_SUFFIX, dumps_project, load_project, write_project_text
+from .state import StateManager
+from .undo import UndoHistory, _new_bytes
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_RESIDENT = 4
+
+
+class WorkspaceProject:
+    """One open project.
+
+    While resident it has its own StateManager, undo history and section
+    widgets (``widgets``, filled in by the GUI). When evicted all of that is
+    dropped and only ``spill``, its state saved to disk, remains.
+    """
+
+    def __init__(self, name: str, path: Path | None = None) -> None:
+        self.name = name
+        self.path = path  # the project file it was opened from or saved to
+        self.section = "dashboard"  # section shown when it was last active
+        self.manager: StateManager | None = None
+        self.history: UndoHistory | None = None
+        self.widgets: dict[str, Any] = {}
+        self.spill: Path | None = None
+        self._sized: tuple = (None, 0)  # (snapshot, its size)
+
+    @property
+    def resident(self) -> bool:
+        return self.manager is not None
+
+    def resident_bytes(self) -> int:
+        """Approximate memory held by the state and undo history; 0 once evicted."""
+        if self.manager is None:
+            return 0
+        snapshot = self.manager.snapshot()
+        if self._sized[0] is not snapshot:
+            self._sized = (snapshot, _new_bytes(snapshot, None))
+        return self._sized[1] + (self.history.bytes_used if self.history else 0)
+
+
+class Workspace:
+    """Several open projects, at most one of them active.
+
+    The active project's manager is what ``StateManager.get_instance()``
+    returns, so forms built while it is active bind to its state. Switching
+    to a resident project only swaps which widgets are shown. The least
+    recently used inactive projects are evicted to ``spill_dir`` once more
+    than ``max_resident`` are resident or together they hold more than
+    ``max_bytes``, and are loaded back when activated again (their undo
+    history does not survive eviction).
+
+    ``on_attach(project)`` runs after a project gets a manager (open or
+    rehydrate), to subscribe listeners; ``on_evict(project)`` runs before it
+    loses it, to destroy its widgets.
+    """
+
+    def __init__(
+        self,
+        spill_dir: str | Path | None = None,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_resident: int = DEFAULT_MAX_RESIDENT,
+        on_attach: Callable[[WorkspaceProject], None] | None = None,
+        on_evict: Callable[[WorkspaceProject], None] | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_resident = max(1, max_resident)
+        self.on_attach = on_attach
+        self.on_evict = on_evict
+        self.projects: list[WorkspaceProject] = []  # in the order they were opened
+        self.active: WorkspaceProject | None = None
+        self._spill_dir = Path(spill_dir) if spill_dir else None
+        self._own_spill_dir = spill_dir is None
+        self._lru: list[WorkspaceProject] = []  # least recently active first
+        self._ids = itertools.count(1)
+
+    def open(
+        self,
+        state: dict | None,
+        name: str,
+        path: Path | None = None,
+        *,
+        manager: StateManager | None = None,
+    ) -> WorkspaceProject:
+        """Add a project holding ``state`` and make it active.
+
+        Pass ``manager`` to adopt an existing StateManager (the GUI's first
+        project uses the singleton); ``state=None`` keeps what it holds.
+        """
+        project = WorkspaceProject(name, path)
+        self._attach(project, state, manager)
+        self.projects.append(project)
+        return self.activate(project)
+
+    def activate(self, project: WorkspaceProject) -> WorkspaceProject:
+        """Make ``project`` active, loading it back from disk if it was evicted.
+
+        Raises OSError/ValueError when the evicted state cannot be read back;
+        the previously active project stays active.
+        """
+        if project.manager is None:
+            self._rehydrate(project)
+        StateManager.set_instance(project.manager)
+        self.active = project
+        if project in self._lru:
+            self._lru.remove(project)
+        self._lru.append(project)
+        self._trim()
+        return project
+
+    def close(self, project: WorkspaceProject) -> WorkspaceProject | None:
+        """Forget ``project``; returns the project that is active afterwards, if any."""
+        if project.resident and self.on_evict is not None:
+            self.on_evict(project)
+        if project.manager is not None:
+            project.manager.set_dispatcher(None)
+        self._drop(project)
+        if project.spill is not None:
+            project.spill.unlink(missing_ok=True)
+            project.spill = None
+        self.projects.remove(project)
+        if project in self._lru:
+            self._lru.remove(project)
+        if self.active is project:
+            self.active = None
+            if self._lru:
+                return self.activate(self._lru[-1])
+        return self.active
+
+    def bytes_used(self) -> int:
+        return sum(p.resident_bytes() for p in self.projects)
+
+    def shutdown(self) -> None:
+        """Delete the spill files (call on exit; spilled state is not a save)."""
+        for project in self.projects:
+            if project.spill is not None:
+                project.spill.unlink(missing_ok=True)
+                project.spill = None
+        if self._own_spill_dir and self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def _attach(self, project: WorkspaceProject, state: dict | None, manager: StateManager | None = None) -> None:
+        manager = manager or StateManager(detached=True)
+        if state is not None:
+            manager.load(state)
+        project.manager = manager
+        project.history = UndoHistory(manager)
+        if self.on_attach is not None:
+            self.on_attach(project)
+
+    def _drop(self, project: WorkspaceProject) -> None:
+        project.manager = None
+        project.history = None
+        project.widgets = {}
+        project._sized = (None, 0)
+
+    def _spill_path(self) -> Path:
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="tbgen-workspace-"))
+        return self._spill_dir / f"{next(self._ids)}{PROJECT_SUFFIX}"
+
+    def _evict(self, project: WorkspaceProject) -> None:
+        # Write first: if the disk is full the project just stays resident.
+        spill = self._spill_path()
+        write_project_text(spill, dumps_project(project.manager.snapshot()))
+        if self.on_evict is not None:
+            self.on_evict(project)
+        project.manager.set_dispatcher(None)
+        self._drop(project)
+        project.spill = spill
+
+    def _rehydrate(self, project: WorkspaceProject) -> None:
+        state = load_project(project.spill)
+        self._attach(project, state)
+        project.spill.unlink(missing_ok=True)
+        project.spill = None
+
+    def _trim(self) -> None:
+        while True:
+            resident = [p for p in self._lru if p.resident]
+            inactive = [p for p in resident if p is not self.active]
+            if not inactive:
+                return
+            if len(resident) <= self.max_resident and sum(p.resident_bytes() for p in resident) <= self.max_bytes:
+                return
+            try:
+                self._evict(inactive[0])
+            except OSError:
+                return